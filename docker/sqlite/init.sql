@@ -229,4 +229,28 @@ CREATE INDEX IF NOT EXISTS idx_space_messages_create_time ON space_messages(crea
 
 -- Space Table Indexes
 CREATE INDEX IF NOT EXISTS idx_spaces_create_time ON spaces(create_time);
-CREATE INDEX IF NOT EXISTS idx_spaces_status ON spaces(status);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_spaces_status ON spaces(status);
+
+-- Embedding Cache Table
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model_name VARCHAR(200) NOT NULL,
+    text_hash VARCHAR(64) NOT NULL,
+    dimension INTEGER NOT NULL,
+    embedding BLOB NOT NULL,  -- float32 vector bytes
+    last_access_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_name, text_hash)
+);
+
+-- Embedding Cache Table Indexes
+CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_access_time ON embedding_cache(last_access_time);
+
+-- Topic Cache Table
+CREATE TABLE IF NOT EXISTS topic_cache (
+    model_name VARCHAR(200) NOT NULL,
+    prompt_hash VARCHAR(64) NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    topic VARCHAR(500) NOT NULL,
+    tags JSON,
+    create_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_name, prompt_hash, content_hash)
+);
@@ -312,12 +312,37 @@ class Cluster:
     def add_memory(self, memory: Memory):
         self.memory_list.append(memory)
         self.size += 1
-        self.get_cluster_center()
+        if self.size == 1:
+            # the default center of an empty cluster may not match the embedding dim
+            self.cluster_center = np.asarray(memory.embedding)
+            return
+        # running mean: memories restored from json carry no embedding, so the
+        # center cannot be recomputed from memory_list
+        self.cluster_center = (
+            self.cluster_center + (memory.embedding - self.cluster_center) / self.size
+        )
+
+    def extend_memory_list(self, memory_list: List[Memory], center=None):
+        """Add memories and move the center by their weighted mean.
 
-    def extend_memory_list(self, memory_list: List[Memory]):
+        Args:
+            memory_list: Memories to add.
+            center: Mean embedding of memory_list if already known (e.g. the
+                center of a cluster being merged in).
+        """
+        if not memory_list:
+            return
+        if center is None:
+            center = np.mean([memory.embedding for memory in memory_list], axis=0)
+        was_empty = self.size == 0
         self.memory_list.extend(memory_list)
         self.size += len(memory_list)
-        self.get_cluster_center()
+        if was_empty:
+            self.cluster_center = np.asarray(center)
+            return
+        self.cluster_center = self.cluster_center + (
+            np.asarray(center) - self.cluster_center
+        ) * (len(memory_list) / self.size)
 
     def get_cluster_center(self):
         if not self.memory_list:
@@ -288,6 +288,11 @@ TOPICS_TEMPLATE_USR = """Please generate a topic and tags for the knowledge chun
 {chunk}
 """
 
+TOPICS_BATCH_TEMPLATE_USR = """Please generate a topic and tags for each of the knowledge chunks provided below, using the format of the examples previously mentioned. Each chunk starts with a line "### Chunk <id>". Answer with a single JSON object that maps every chunk id to its topic and tags, like {{"results": [{{"id": "<id>", "topic": "...", "tags": ["...", "..."]}}]}}.
+
+{chunks}
+"""
+
 SYS_COMB = """You are a skilled wordsmith with extensive experience in managing structured knowledge documents. Given a set of topics and a set of tags, your main task involves crafting a new topic and a new set of tags that accurately represent the provided topics and tags. Here are some examples illustrating effective merging of topics and tags:
 1. Given topics: "Decoder-only transformers pretraining on large-scale corpora", "Parameter Effcient LLM Finetuning" and tags: ["Transformers", "Pretraining", "Large-scale corpora"], ["LLM", "Parameter Efficient", Finetuning"], you can merge them into: {"topic": "Efficient transformers pretraining and finetuning on large-scale corpora", "tags": ["Transformers", "Pretraining", "Finetuning"]}.
 2. Given topics: "Formula 1 racing car aerodynamics learning", "Formula 1 racing car design optimization" and tags: ["Formula 1", "Racing", "Aerodynamics"], ["Formula 1", "Design", "Optimization"], you can merge them into: {"topic": "Formula 1 racing car aerodynamics and design optimization", "tags": ["Formula 1", "Racing", "Aerodynamics", "Design", "Optimization"]}.
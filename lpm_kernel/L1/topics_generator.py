@@ -1,4 +1,5 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional, Union
 import copy
 import itertools
@@ -6,23 +7,29 @@ import json
 import logging
 import math
 import os
+import random
+import time
 import traceback
 
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, APITimeoutError, OpenAI, RateLimitError
 from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import cdist
 import numpy as np
 
 from lpm_kernel.L1.bio import Cluster, Memory, Note
 from lpm_kernel.L1.prompt import (
     TOPICS_TEMPLATE_SYS,
     TOPICS_TEMPLATE_USR,
+    TOPICS_BATCH_TEMPLATE_USR,
     SYS_COMB,
     USR_COMB,
 )
-from lpm_kernel.L1.utils import find_connected_components
+from lpm_kernel.L1.utils import find_connected_components, micro_cluster
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
+from lpm_kernel.kernel.l1.topic_cache import TopicCache, prompt_hash
 from lpm_kernel.common.logging import logger
 from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data.embedding_cache import text_hash
 
 
 class TopicsGenerator:
@@ -54,24 +61,48 @@ class TopicsGenerator:
         logger.info(f"user_llm_config: {self.user_llm_config}")
         self.threshold = 0.85
 
+        config = Config.from_env()
+        # chunk topic tagging: concurrent requests, retries and chunks per request
+        self.topic_max_workers = max(1, int(config.get("TOPICS_MAX_WORKERS", "4")))
+        self.topic_max_retries = max(1, int(config.get("TOPICS_MAX_RETRIES", "3")))
+        self.topic_retry_backoff = float(config.get("TOPICS_RETRY_BACKOFF", "1.0"))
+        self.topic_chunks_per_request = max(
+            1, int(config.get("TOPICS_CHUNKS_PER_REQUEST", "1"))
+        )
+        # clustering backend: hierarchical, minibatch, or auto (minibatch above threshold)
+        self.clustering_backend = config.get("CLUSTERING_BACKEND", "auto").lower()
+        self.scalable_clustering_threshold = int(
+            config.get("CLUSTERING_SCALABLE_THRESHOLD", "5000")
+        )
+        self.micro_cluster_size = max(
+            1, int(config.get("CLUSTERING_MICRO_CLUSTER_SIZE", "10"))
+        )
+        self.topic_cache = TopicCache(self.model_name)
+        self.chunk_prompt_hash = prompt_hash(TOPICS_TEMPLATE_SYS, TOPICS_TEMPLATE_USR)
+        self.cluster_prompt_hash = prompt_hash(SYS_COMB, USR_COMB)
+
 
-    def __find_nearest_cluster(self, cluster_list: List[Cluster], memory: Memory) -> tuple:
+    def __find_nearest_clusters(
+        self, cluster_list: List[Cluster], memory_list: List[Memory]
+    ) -> tuple:
         """
-        Find the nearest cluster to a memory based on embedding distance.
+        Find the nearest cluster of every memory based on embedding distance.
+        
+        All memories are scored against the stacked cluster centers with a single
+        pairwise distance call.
         
         Args:
             cluster_list: List of clusters to search
-            memory: Memory to find nearest cluster for
+            memory_list: Memories to find nearest clusters for
             
         Returns:
-            A tuple containing (nearest_cluster, distance_to_cluster)
+            A tuple of arrays (nearest_cluster_indices, distances_to_cluster)
         """
-        distances = [
-            np.linalg.norm(memory.embedding - cluster.cluster_center)
-            for cluster in cluster_list
-        ]
-        nearest_cluster_idx = np.argmin(distances)
-        return cluster_list[nearest_cluster_idx], distances[nearest_cluster_idx]
+        centers = np.vstack([cluster.cluster_center for cluster in cluster_list])
+        embeddings = np.vstack([memory.embedding for memory in memory_list])
+        distances = cdist(embeddings, centers)
+        nearest = np.argmin(distances, axis=1)
+        return nearest, distances[np.arange(len(memory_list)), nearest]
 
 
     def __merge_closed_clusters(
@@ -111,7 +142,7 @@ class TopicsGenerator:
         """
         new_cluster = Cluster(clusterId=connected_clusters[0].cluster_id, is_new=True)
         for cluster in connected_clusters:
-            new_cluster.extend_memory_list(cluster.memory_list)
+            new_cluster.extend_memory_list(cluster.memory_list, cluster.cluster_center)
         new_cluster.merge_list = [
             cluster.cluster_id for cluster in connected_clusters if not cluster.is_new
         ]
@@ -143,30 +174,33 @@ class TopicsGenerator:
         """
         updated_cluster_ids = set()
 
-        for memory in new_memory_list:
-            if memory.embedding is None:
-                continue
-            nearest_cluster, distance = self.__find_nearest_cluster(
-                cluster_list, memory
+        new_memory_list = [
+            memory for memory in new_memory_list if memory.embedding is not None
+        ]
+        if new_memory_list:
+            nearest, distances = self.__find_nearest_clusters(
+                cluster_list, new_memory_list
             )
-            if distance < outlier_cutoff_distance:
-                nearest_cluster.add_memory(memory)
-                updated_cluster_ids.add(nearest_cluster.cluster_id)
-            else:
-                outlier_memory_list.append(memory)
+            assigned = defaultdict(list)
+            for memory, cluster_idx, distance in zip(new_memory_list, nearest, distances):
+                if distance < outlier_cutoff_distance:
+                    assigned[cluster_idx].append(memory)
+                else:
+                    outlier_memory_list.append(memory)
+            for cluster_idx, memories in assigned.items():
+                cluster = cluster_list[cluster_idx]
+                cluster.extend_memory_list(memories)
+                updated_cluster_ids.add(cluster.cluster_id)
 
         merge_cluster_ids_list, merge_cluster_list = self.__merge_closed_clusters(
             cluster_list, cluster_merge_distance
         )
+        merged_cluster_ids = set(itertools.chain(*merge_cluster_ids_list))
         updated_cluster_list = [
             cluster
             for cluster in cluster_list
-            if cluster.cluster_id in list(updated_cluster_ids)
-        ]
-        updated_cluster_list = [
-            cluster
-            for cluster in updated_cluster_list
-            if cluster.cluster_id not in list(itertools.chain(*merge_cluster_ids_list))
+            if cluster.cluster_id in updated_cluster_ids
+            and cluster.cluster_id not in merged_cluster_ids
         ]
 
         # Initial calculation of size_threshold using updated_cluster_list
@@ -222,6 +256,19 @@ class TopicsGenerator:
 
         if len(memory_embeddings) == 1:
             clusters = np.array([1])
+        elif self.__use_scalable_clustering(len(memory_embeddings)):
+            # ward linkage over micro-cluster centers, members inherit their center's label
+            micro_labels, centers = micro_cluster(
+                memory_embeddings,
+                self.micro_cluster_size,
+                max_clusters=self.scalable_clustering_threshold,
+            )
+            if len(centers) == 1:
+                clusters = np.ones(len(memory_embeddings), dtype=int)
+            else:
+                linked = linkage(centers, method="ward")
+                clusters = fcluster(linked, cophenetic_distance, criterion="distance")
+                clusters = clusters[micro_labels]
         else:
             linked = linkage(memory_embeddings, method="ward")
             clusters = fcluster(linked, cophenetic_distance, criterion="distance")
@@ -441,13 +488,79 @@ class TopicsGenerator:
             }
             return cluster_data
 
-        Z = linkage(embedding_matrix, method="complete", metric="cosine")
-        clusters = self.__collect_cluster_indices(Z, self.threshold)
+        if self.__use_scalable_clustering(len(embedding_matrix)):
+            clusters = self.__collect_scalable_cluster_indices(embedding_matrix)
+        else:
+            Z = linkage(embedding_matrix, method="complete", metric="cosine")
+            clusters = self.__collect_cluster_indices(Z, self.threshold)
         cluster_data = self.__gen_cluster_data(clusters, chunks_with_topics)
 
         return cluster_data
 
 
+    def __use_scalable_clustering(self, n: int) -> bool:
+        """
+        Decide whether to cluster n points with the mini-batch backend.
+        
+        Args:
+            n: Number of points to cluster
+            
+        Returns:
+            True if micro-clustering should run before linkage
+        """
+        if self.clustering_backend == "minibatch":
+            return n > self.micro_cluster_size
+        if self.clustering_backend == "auto":
+            return n > self.scalable_clustering_threshold
+        return False
+
+
+    def __collect_scalable_cluster_indices(self, embedding_matrix: List) -> dict:
+        """
+        Collect cluster indices for large inputs without a full linkage matrix.
+        
+        Points are compressed into micro-clusters with mini-batch k-means, complete
+        linkage runs on the micro-cluster centers, and every merged group of centers
+        is expanded back to its points. Micro-clusters that merge with nothing are
+        kept when they hold more than one point.
+        
+        Args:
+            embedding_matrix: Matrix of embeddings for the chunks
+            
+        Returns:
+            A dictionary mapping cluster IDs to lists of point indices in each cluster
+        """
+        micro_labels, centers = micro_cluster(
+            embedding_matrix,
+            self.micro_cluster_size,
+            max_clusters=self.scalable_clustering_threshold,
+            normalize=True,
+        )
+        members = defaultdict(list)
+        for i, label in enumerate(micro_labels):
+            members[int(label)].append(i)
+
+        center_clusters = {}
+        if len(centers) > 1:
+            Z = linkage(centers, method="complete", metric="cosine")
+            center_clusters = self.__collect_cluster_indices(Z, self.threshold)
+        logger.info(
+            f"Clustered {len(embedding_matrix)} chunks via {len(centers)} micro-clusters"
+        )
+
+        clusters = {}
+        grouped = set()
+        for center_indices in center_clusters.values():
+            grouped.update(center_indices)
+            clusters[len(clusters)] = [
+                i for center in center_indices for i in members[center]
+            ]
+        for center, indices in members.items():
+            if center not in grouped and len(indices) > 1:
+                clusters[len(clusters)] = indices
+        return clusters
+
+
     def __collect_cluster_indices(self, Z: np.ndarray, threshold: float) -> dict:
         """
         Collect the leaf indices of each cluster from the linkage matrix.
@@ -537,9 +650,15 @@ class TopicsGenerator:
         Returns:
             A tuple containing (new_tags, new_topic)
         """
+        user_content = USR_COMB.format(topics=c_topics, tags=c_tags)
+        cached = self.topic_cache.get_many(self.cluster_prompt_hash, [user_content])
+        if cached:
+            new_topic, new_tags = next(iter(cached.values()))
+            return new_tags, new_topic
+
         messages = [
             {"role": "system", "content": SYS_COMB},
-            {"role": "user", "content": USR_COMB.format(topics=c_topics, tags=c_tags)},
+            {"role": "user", "content": user_content},
         ]
         res = self.client.chat.completions.create(
             model=self.model_name, messages=messages, **self.topic_params
@@ -547,6 +666,9 @@ class TopicsGenerator:
         new_topic, new_tags = self.__parse_response(
             res.choices[0].message.content, "topic", "tags"
         )
+        self.topic_cache.put_many(
+            self.cluster_prompt_hash, {user_content: (new_topic, new_tags)}
+        )
 
         return new_tags, new_topic
 
@@ -555,6 +677,10 @@ class TopicsGenerator:
         """
         Generate topics and keywords for each chunk.
         
+        Requests run concurrently on a bounded thread pool. With
+        TOPICS_CHUNKS_PER_REQUEST > 1 several chunks are packed into one JSON-mode
+        request; chunks missing from a packed answer are retried one by one.
+        
         Args:
             chunks: List of chunks to generate topics for
             
@@ -562,49 +688,194 @@ class TopicsGenerator:
             List of chunks with added topic and tags information
         """
         chunks = copy.deepcopy(chunks)
-        max_retries = 3  # maximum number of retries
+        if not chunks:
+            return chunks
 
+        # answers memoized by chunk content, only new or changed chunks go to the LLM
+        self.topic_cache.seed_from_chunk_topics(self.chunk_prompt_hash)
+        cached = self.topic_cache.get_many(
+            self.chunk_prompt_hash, [chunk.content for chunk in chunks]
+        )
+        results: Dict[Any, tuple] = {}
+        pending = []
         for chunk in chunks:
-            for attempt in range(max_retries):
-                try:
-                    tmp_msg = [
-                        {
-                            "role": "system",
-                            "content": TOPICS_TEMPLATE_SYS,
-                        },
-                        {
-                            "role": "user",
-                            "content": TOPICS_TEMPLATE_USR.format(chunk=chunk.content),
-                        },
-                    ]
-                    logger.info(f"Attempt {attempt + 1}/{max_retries}")
-                    logger.info(
-                        f"Request messages: {json.dumps(tmp_msg, ensure_ascii=False)}"
-                    )
-
-                    answer = self.client.chat.completions.create(
-                        model=self.model_name, messages=tmp_msg, **self.topic_params
-                    )
-                    content = answer.choices[0].message.content
-                    logger.info(f"Generated content: {content}")
-
-                    topic, tags = self.__parse_response(content, "topic", "tags")
-                    chunk.topic = topic
-                    chunk.tags = tags
-                    break  # exit the retry loop after a successful attempt
-
-                except Exception as e:
-                    logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                    if attempt == max_retries - 1:  # last attempt failed
+            answer = cached.get(text_hash(chunk.content))
+            if answer:
+                results[chunk.id] = answer
+            else:
+                pending.append(chunk)
+        logger.info(
+            f"Topic cache: {len(chunks) - len(pending)} hits, {len(pending)} misses"
+        )
+
+        size = self.topic_chunks_per_request
+        groups = [pending[i : i + size] for i in range(0, len(pending), size)]
+        if groups:
+            with ThreadPoolExecutor(
+                max_workers=min(self.topic_max_workers, len(groups)),
+                thread_name_prefix="topics",
+            ) as executor:
+                futures = {
+                    executor.submit(self.__tag_chunk_group, group): group
+                    for group in groups
+                }
+                for future in as_completed(futures):
+                    try:
+                        results.update(future.result())
+                    except Exception:
                         logger.error(
-                            f"All attempts failed for chunk: {traceback.format_exc()}"
+                            f"Topic generation failed for chunk group: {traceback.format_exc()}"
                         )
-                        # use default values or remove the chunk
-                        chunk.topic = "Unknown Topic"  # set default value
-                        chunk.tags = ["unclassified"]  # set default value
-                        # or: chunks.remove(chunk)  # remove the chunk
 
-            return chunks
+            self.topic_cache.put_many(
+                self.chunk_prompt_hash,
+                {
+                    chunk.content: results[chunk.id]
+                    for chunk in pending
+                    if chunk.id in results
+                },
+            )
+
+        # write results back by chunk id, chunks without an answer get defaults
+        for chunk in chunks:
+            topic, tags = results.get(chunk.id, ("Unknown Topic", ["unclassified"]))
+            chunk.topic = topic
+            chunk.tags = tags
+
+        failed = sum(1 for chunk in chunks if chunk.id not in results)
+        logger.info(
+            f"Generated topics for {len(chunks) - failed}/{len(chunks)} chunks, {failed} failed"
+        )
+        return chunks
+
+
+    def __tag_chunk_group(self, group: List) -> Dict[Any, tuple]:
+        """
+        Generate topic and tags for a group of chunks.
+        
+        Args:
+            group: Chunks to tag, sent in one request when there is more than one
+            
+        Returns:
+            A dictionary mapping chunk id to (topic, tags)
+        """
+        results = {}
+        if len(group) > 1:
+            try:
+                results = self.__tag_chunk_batch(group)
+            except Exception as e:
+                logger.warning(
+                    f"Packed topic request for {len(group)} chunks failed: {str(e)}"
+                )
+
+        for chunk in group:
+            if chunk.id in results:
+                continue
+            try:
+                results[chunk.id] = self.__tag_single_chunk(chunk)
+            except Exception:
+                logger.error(
+                    f"All attempts failed for chunk {chunk.id}: {traceback.format_exc()}"
+                )
+        return results
+
+
+    def __tag_single_chunk(self, chunk) -> tuple:
+        """
+        Generate topic and tags for one chunk.
+        
+        Args:
+            chunk: Chunk to tag
+            
+        Returns:
+            A tuple containing (topic, tags)
+        """
+        messages = [
+            {"role": "system", "content": TOPICS_TEMPLATE_SYS},
+            {"role": "user", "content": TOPICS_TEMPLATE_USR.format(chunk=chunk.content)},
+        ]
+        for attempt in range(self.topic_max_retries):
+            content = self.__chat_with_retry(messages)
+            logger.info(f"Generated content for chunk {chunk.id}: {content}")
+            try:
+                return self.__parse_response(content, "topic", "tags")
+            except (ValueError, KeyError) as e:
+                # malformed answer, ask again
+                if attempt == self.topic_max_retries - 1:
+                    raise
+                logger.warning(
+                    f"Attempt {attempt + 1}/{self.topic_max_retries} returned unparsable content: {str(e)}"
+                )
+
+
+    def __tag_chunk_batch(self, group: List) -> Dict[Any, tuple]:
+        """
+        Generate topics and tags for several chunks with one JSON-mode request.
+        
+        Args:
+            group: Chunks to tag
+            
+        Returns:
+            A dictionary mapping chunk id to (topic, tags) for every chunk answered
+        """
+        chunks_text = "\n\n".join(
+            f"### Chunk {chunk.id}\n{chunk.content}" for chunk in group
+        )
+        messages = [
+            {"role": "system", "content": TOPICS_TEMPLATE_SYS},
+            {"role": "user", "content": TOPICS_BATCH_TEMPLATE_USR.format(chunks=chunks_text)},
+        ]
+        params = dict(self.topic_params)
+        params["max_tokens"] = params["max_tokens"] * len(group)
+        content = self.__chat_with_retry(messages, **params)
+        logger.info(f"Generated content for {len(group)} chunks: {content}")
+
+        ids = {str(chunk.id): chunk.id for chunk in group}
+        results = {}
+        for item in json.loads(content).get("results", []):
+            chunk_id = ids.get(str(item.get("id")))
+            if chunk_id is not None and item.get("topic") and item.get("tags"):
+                results[chunk_id] = (item["topic"], item["tags"])
+        return results
+
+
+    def __chat_with_retry(self, messages: List[Dict], **params) -> str:
+        """
+        Call the chat completion API, backing off on rate limits and transient errors.
+        
+        Args:
+            messages: Chat messages to send
+            params: Completion parameters, defaults to topic_params
+            
+        Returns:
+            Content of the first choice
+        """
+        params = params or self.topic_params
+        for attempt in range(self.topic_max_retries):
+            try:
+                answer = self.client.chat.completions.create(
+                    model=self.model_name, messages=messages, **params
+                )
+                return answer.choices[0].message.content
+            except (RateLimitError, APITimeoutError, APIConnectionError, APIStatusError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.topic_max_retries - 1:
+                    raise
+                delay = self.topic_retry_backoff * (2**attempt)
+                response = getattr(e, "response", None)
+                retry_after = response.headers.get("retry-after") if response is not None else None
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                # jitter so throttled workers do not retry in lockstep
+                delay += random.uniform(0, delay / 2)
+                logger.warning(
+                    f"Attempt {attempt + 1}/{self.topic_max_retries} failed ({str(e)}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
 
 
     def __parse_response(self, content: str, key1: str, key2: str) -> tuple:
@@ -1,9 +1,13 @@
-from collections import deque
 from datetime import datetime
 from typing import List, Dict, Any
 import json
+import math
 
 import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial.distance import cdist
+from sklearn.cluster import MiniBatchKMeans
 
 from lpm_kernel.L1.bio import Cluster
 import logging
@@ -36,42 +40,63 @@ def find_connected_components(
     Returns:
         List[List[Cluster]]: List of connected components, where each component is a list of clusters.
     """
-    adjacency_matrix = np.array(
-        [
-            [
-                np.linalg.norm(cluster1.cluster_center - cluster2.cluster_center)
-                for cluster2 in cluster_list
-            ]
-            for cluster1 in cluster_list
-        ]
+    if not cluster_list:
+        return []
+
+    centers = np.vstack([cluster.cluster_center for cluster in cluster_list])
+    adjacency = csr_matrix(cdist(centers, centers) < cluster_merge_distance)
+    n_components, labels = connected_components(adjacency, directed=False)
+
+    # components are labeled in order of their lowest cluster index
+    components = [[] for _ in range(n_components)]
+    for i, label in enumerate(labels):
+        components[label].append(cluster_list[i])
+    return components
+
+
+def micro_cluster(
+    embeddings,
+    micro_cluster_size: int,
+    max_clusters: int = None,
+    normalize: bool = False,
+) -> tuple:
+    """
+    Compresses an embedding matrix into micro-clusters with mini-batch k-means.
+    
+    Used as the first stage of hierarchical clustering on large inputs: linkage
+    then runs on the micro-cluster centers instead of the full O(n^2) matrix.
+    
+    Args:
+        embeddings: Embedding vectors, one per row.
+        micro_cluster_size: Average number of points per micro-cluster.
+        max_clusters: Upper bound on the number of micro-clusters.
+        normalize: Whether to L2-normalize rows first (for cosine distances).
+        
+    Returns:
+        tuple: (labels, centers) where labels[i] is the micro-cluster of row i and
+        centers holds one row per non-empty micro-cluster.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if normalize:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+    n_clusters = math.ceil(len(matrix) / micro_cluster_size)
+    if max_clusters:
+        n_clusters = min(n_clusters, max_clusters)
+    n_clusters = max(2, min(len(matrix), n_clusters))
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        batch_size=max(1024, 3 * n_clusters),
+        n_init=3,
+        random_state=0,
     )
+    labels = kmeans.fit_predict(matrix)
 
-    cluster_n = len(cluster_list)
-    visited = [False] * cluster_n
-    components = []
-
-    def bfs(start: int):
-        queue = deque([start])
-        component = []
-        visited[start] = True
-
-        while queue:
-            node = queue.popleft()
-            component.append(node)
-            for neighbor in range(cluster_n):
-                if (
-                    not visited[neighbor]
-                    and adjacency_matrix[node, neighbor] < cluster_merge_distance
-                ):
-                    visited[neighbor] = True
-                    queue.append(neighbor)
-        return component
-
-    for i in range(cluster_n):
-        if not visited[i]:
-            components.append(bfs(i))
-
-    return [[cluster_list[i] for i in component] for component in components]
+    # drop empty micro-clusters and renumber labels to 0..len(centers)
+    used, labels = np.unique(labels, return_inverse=True)
+    return labels, kmeans.cluster_centers_[used]
 
 
 def is_valid_note(note: Dict[str, Any]) -> bool:
@@ -28,6 +28,7 @@ from lpm_kernel.L1.bio import (
 )
 from lpm_kernel.L2.data_pipeline.data_prep.context_data.context_generator import ContextGenerator
 from lpm_kernel.L2.data_pipeline.data_prep.diversity.diversity_data_generator import DiversityDataGenerator
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink, jsonl_to_json
 from lpm_kernel.L2.data_pipeline.data_prep.preference.preference_QA_generate import PreferenceQAGenerator
 from lpm_kernel.L2.data_pipeline.data_prep.selfqa.selfqa_generator import SelfQA
 from lpm_kernel.L2.note_templates import OBJECTIVE_TEMPLATES, SUBJECTIVE_TEMPLATES
@@ -198,7 +199,6 @@ class L2DataProcessor:
             self._merge_context_data(data_output_base_dir, "context_merged.json")
 
         # Merge the four specified JSON files
-        merged_data = []
         if do_context:
             json_files_to_merge = [
                 preference_output_path,
@@ -212,7 +212,16 @@ class L2DataProcessor:
                 diversity_output_path,
                 selfqa_output_path,
             ]
+        self.merge_subjective_data(data_output_base_dir, json_files_to_merge)
 
+    def merge_subjective_data(self, data_output_base_dir: str, json_files_to_merge: List[str]):
+        """Merge generated data files into merged.json, the training dataset.
+        
+        Args:
+            data_output_base_dir: Base directory for output data.
+            json_files_to_merge: Paths of the JSON files to merge, missing files are skipped.
+        """
+        merged_data = []
         logging.info("---" * 30 + "\nMerging JSON files\n" + "---" * 30)
 
         for file_path in json_files_to_merge:
@@ -229,8 +238,6 @@ class L2DataProcessor:
                 except Exception as e:
                     logging.error(f"Error merging file {file_path}: {str(e)}")
             else:
-                if file_path == context_output_path and do_context == False:
-                    continue
                 logging.warning(f"File not found or path is None: {file_path}")
 
         # Save the merged data
@@ -593,6 +600,9 @@ class L2DataProcessor:
     def creat_mapping(self, graph_dir, note_list, mapped_json_file):
         """Create a mapping between entities and documents.
         
+        Entities are joined to note documents through their shared text units,
+        doc_id lists keep the order of the entity's text units, then of the documents.
+        
         Args:
             graph_dir: Directory containing GraphRAG output.
             note_list: List of Note objects.
@@ -608,35 +618,64 @@ class L2DataProcessor:
         except Exception as e:
             return
 
-        json_data = []
-
         # show the column names
         logging.info(f"Entity Column names: {entities.columns}")
 
         logging.info(f"Document Column names: {document.columns}")
 
-        for e_i, e_r in tqdm(entities.iterrows(), total=len(entities)):
-            json_item = {}
-            json_item["entity_id"] = e_r["id"]
-            json_item["entity_name"] = e_r["title"]
-            json_item["entity_description"] = e_r["description"]
-            json_item["doc_id"] = []
-            text_unit_ids = e_r["text_unit_ids"]
-
-            for text_unit_id in text_unit_ids:
-                for d_i, d_r in document.iterrows():
-                    if text_unit_id in d_r["text_unit_ids"]:
-                        if "note" in d_r["title"]:
-                            json_item["doc_id"].append(
-                                note_list[
-                                    int(
-                                        d_r["title"]
-                                        .replace(".txt", "")
-                                        .replace("note_", "")
-                                    )
-                                ].id
-                            )
-            json_data.append(json_item)
+        # one row per (note document, text unit), documents keep their row order
+        note_docs = document.loc[
+            document["title"].astype(str).str.contains("note", regex=False), ["title", "text_unit_ids"]
+        ].reset_index(drop=True)
+        note_docs["doc_order"] = range(len(note_docs))
+        doc_units = (
+            note_docs[["doc_order", "text_unit_ids"]]
+            .explode("text_unit_ids")
+            .dropna(subset=["text_unit_ids"])
+            .drop_duplicates()
+        )
+
+        # one row per (entity, text unit), in entity then text unit order
+        entity_units = (
+            entities[["text_unit_ids"]]
+            .reset_index(drop=True)
+            .rename_axis("entity_order")
+            .reset_index()
+            .explode("text_unit_ids")
+            .dropna(subset=["text_unit_ids"])
+        )
+        entity_units["unit_order"] = range(len(entity_units))
+
+        # empty frames explode to float64 keys, which merge refuses to join with object keys
+        doc_units["text_unit_ids"] = doc_units["text_unit_ids"].astype(object)
+        entity_units["text_unit_ids"] = entity_units["text_unit_ids"].astype(object)
+
+        matches = entity_units.merge(doc_units, on="text_unit_ids").sort_values(
+            ["unit_order", "doc_order"], kind="stable"
+        )
+
+        titles = note_docs["title"].tolist()
+        note_ids = {}
+        doc_ids = {}
+        for entity_order, doc_order in zip(matches["entity_order"].tolist(), matches["doc_order"].tolist()):
+            if doc_order not in note_ids:
+                note_ids[doc_order] = note_list[
+                    int(titles[doc_order].replace(".txt", "").replace("note_", ""))
+                ].id
+            doc_ids.setdefault(entity_order, []).append(note_ids[doc_order])
+
+        json_data = [
+            {
+                "entity_id": entity_id,
+                "entity_name": entity_name,
+                "entity_description": entity_description,
+                "doc_id": doc_ids.get(entity_order, []),
+            }
+            for entity_order, (entity_id, entity_name, entity_description) in enumerate(
+                zip(entities["id"].tolist(), entities["title"].tolist(), entities["description"].tolist())
+            )
+        ]
+        logging.info(f"Mapped {len(json_data)} entities to {len(note_ids)} note documents")
 
         with open(os.path.join(mapped_json_file), "w", encoding="utf-8") as file:
             json.dump(json_data, file, ensure_ascii=False, indent=4)
@@ -695,9 +734,10 @@ class L2DataProcessor:
             user_global_bio=bio,
             preferred_language=self.prefered_lang,
         )
-        q_a_list = selfqa.generate_qa()
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(q_a_list, f, ensure_ascii=False, indent=4)
+        jsonl_path = os.path.splitext(output_path)[0] + ".jsonl"
+        with JsonlSink(jsonl_path) as sink:
+            selfqa.generate_qa(sink=sink)
+        jsonl_to_json(jsonl_path, output_path)
 
     def _gen_context_data(
             self,
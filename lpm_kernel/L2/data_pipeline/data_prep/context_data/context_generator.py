@@ -1,14 +1,12 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple, Any
 import ast
-import concurrent.futures
 import json
-import jsonlines
 import logging
 import os
 import random
 import traceback
 
+import numpy as np
 from openai import OpenAI
 from tqdm import tqdm
 
@@ -23,8 +21,11 @@ from lpm_kernel.L2.data_pipeline.data_prep.context_data.prompt import (
 from lpm_kernel.L2.data_pipeline.data_prep.context_data.utils import (
     get_max_doc_id_length, save_to_json, map_doc_id_length_to_needs_count, multi_process_request
 )
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink
+from lpm_kernel.L2.data_pipeline.data_prep.llm_scheduler import llm_scheduler, PRIORITY_CONTEXT
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data.embedding_cache import EmbeddingCache
 
 
 def parse_model_response(response_content: str) -> List[str]:
@@ -81,6 +82,8 @@ class ContextGenerator:
         self.multi_time = 1
         self.user_name = user_name
         self.user_bio = user_bio
+        # candidate notes per need shown to the LLM, 0 sends every note
+        self.notes_top_k = int(Config.from_env().get("CONTEXT_NOTES_TOP_K", "20"))
 
 
     def get_notes_content(self, entity_json: Dict, 
@@ -148,7 +151,9 @@ class ContextGenerator:
             A tuple containing the model response and entity name, or (None, None) if there's an error
         """
         try:
-            response = self.client.chat.completions.create(
+            response = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_CONTEXT,
                 model=self.model_name,
                 messages=[{"role": "user", "content": needs_prompt_content}],
                 temperature=1,
@@ -186,43 +191,42 @@ class ContextGenerator:
         
         selected_needs = []
         
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            for entity in tqdm(entity_map, desc="Processing entities"):
-                doc_id_length = len(entity.get("doc_id", []))
-                needs_count = map_doc_id_length_to_needs_count(
-                    doc_id_length, 
-                    max_length,
-                    min_needs_count * 1,
-                    max_needs_count * 1
+        requests = []
+        for entity in tqdm(entity_map, desc="Processing entities"):
+            doc_id_length = len(entity.get("doc_id", []))
+            needs_count = map_doc_id_length_to_needs_count(
+                doc_id_length, 
+                max_length,
+                min_needs_count * 1,
+                max_needs_count * 1
+            )
+            logging.info(f"Entity: {entity['entity_name']}, Doc ID Length: {doc_id_length}, Needs Count: {needs_count}")
+
+            # get notes content
+            notes_content = self.get_notes_content(entity, note_list)
+
+            # randomly select needs_count needs from needs_dict with replacement
+            for _ in range(needs_count):
+                primary_need = random.choice(list(needs_dict.keys()))
+                secondary_need = random.choice(needs_dict[primary_need])
+                needs_prompt_content = needs_prompt_v1.format(
+                    needs=f"{list(secondary_need.keys())[0]}: {list(secondary_need.values())[0]}", 
+                    note_content=notes_content, 
+                    preferred_language=self.preferred_language
                 )
-                logging.info(f"Entity: {entity['entity_name']}, Doc ID Length: {doc_id_length}, Needs Count: {needs_count}")
-
-                # get notes content
-                notes_content = self.get_notes_content(entity, note_list)
-
-                # randomly select needs_count needs from needs_dict with replacement
-                for _ in range(needs_count):
-                    primary_need = random.choice(list(needs_dict.keys()))
-                    secondary_need = random.choice(needs_dict[primary_need])
-                    needs_prompt_content = needs_prompt_v1.format(
-                        needs=f"{list(secondary_need.keys())[0]}: {list(secondary_need.values())[0]}", 
-                        note_content=notes_content, 
-                        preferred_language=self.preferred_language
-                    )
-                    futures.append(executor.submit(self._generate_needs, needs_prompt_content, entity['entity_name']))
-
-            for future in as_completed(futures):
-                needs_response, entity_name = future.result()
-                if needs_response:
-                    selected_needs.append({
-                        "needs_response": needs_response,
-                        "entity_name": entity_name,
-                        "notes_content": notes_content
-                    })
-                    logging.info(f"length of selected_needs: {len(selected_needs)}")
-                else:
-                    logging.info(f"Error generating needs response for {primary_need}: {secondary_need}")
+                requests.append((needs_prompt_content, entity['entity_name'], notes_content, secondary_need))
+
+        results = llm_scheduler.map(lambda request: self._generate_needs(request[0], request[1]), requests)
+        for (_, _, notes_content, secondary_need), (needs_response, entity_name) in zip(requests, results):
+            if needs_response:
+                selected_needs.append({
+                    "needs_response": needs_response,
+                    "entity_name": entity_name,
+                    "notes_content": notes_content
+                })
+                logging.info(f"length of selected_needs: {len(selected_needs)}")
+            else:
+                logging.info(f"Error generating needs response for {secondary_need}")
         
         save_to_json(selected_needs, data_output_base_dir + "/" + needs_file_name)
 
@@ -273,7 +277,9 @@ class ContextGenerator:
             The model's response content or None if there's an error
         """
         try:
-            response = self.client.chat.completions.create(
+            response = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_CONTEXT,
                 model=self.model_name,
                 messages=messages,
             )
@@ -329,7 +335,9 @@ class ContextGenerator:
             The model's response content or an error message
         """
         try:
-            response = self.client.chat.completions.create(
+            response = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_CONTEXT,
                 model=self.model_name,
                 messages=messages,
             )
@@ -338,57 +346,161 @@ class ContextGenerator:
             return f"Raise ERROR: {e} WHEN GENERATE RESPONSE"
 
 
-    def _context_enhance(self, needsAndContext: List[Dict], max_workers: int = 10) -> List[str]:
+    def _context_enhance(self, needsAndContext: List[Dict], max_workers: Optional[int] = None) -> List[str]:
         """
         Enhance context for given needs and context data.
         
         Args:
             needsAndContext: List of dictionaries containing needs and context data
-            max_workers: Maximum number of workers for parallel processing
+            max_workers: Maximum number of workers for parallel processing, defaults to
+                the scheduler's highest concurrency limit
             
         Returns:
             A list of enhanced context strings
         """
         processed_data = self.preprocess4contextEnhance(needsAndContext)
-        results = multi_process_request(processed_data, max_workers, self._send_request)
+        results = multi_process_request(
+            processed_data, max_workers or llm_scheduler.limiter.max_limit, self._send_request
+        )
         return results
 
 
+    @staticmethod
+    def _format_note_line(note: Dict) -> str:
+        """
+        Format a note as one entry of the note list shown to the LLM.
+        
+        Args:
+            note: A dictionary containing note data
+            
+        Returns:
+            A single-line string with the note id, title, content and insight
+        """
+        return f"Note id: {note['id']}, Note title: {note['title']}, Note content: {note['content']}, Note AI Insight: {note.get('insight', '')}"
+
+
+    def _note_embedding_matrix(self, all_notes: List[Dict], note_list: List[Note],
+                               embedding_cache: EmbeddingCache, dim: int) -> np.ndarray:
+        """
+        Build the embedding matrix of the notes, one row per entry of all_notes.
+        
+        Stored note embeddings are reused, only notes without one (or with one from
+        a different embedding model) are embedded.
+        
+        Args:
+            all_notes: List of all notes
+            note_list: A list of Note objects carrying the stored embeddings
+            embedding_cache: Cache used to embed the notes lacking an embedding
+            dim: Dimension of the need embeddings
+            
+        Returns:
+            A (len(all_notes), dim) float32 matrix
+        """
+        stored = {
+            note.id: note.embedding for note in note_list
+            if note.embedding is not None and np.size(note.embedding) == dim
+        }
+        matrix = np.zeros((len(all_notes), dim), dtype=np.float32)
+        missing = []
+        for i, note in enumerate(all_notes):
+            if note['id'] in stored:
+                matrix[i] = stored[note['id']]
+            else:
+                missing.append(i)
+        if missing:
+            logging.info(f"Embedding {len(missing)} notes without a stored embedding")
+            matrix[missing] = embedding_cache.get_embedding(
+                [self._format_note_line(all_notes[i]) for i in missing]
+            )
+        return matrix
+
+
+    def _prefilter_candidate_notes(self, initial_needs: List[str], all_notes: List[Dict],
+                                   note_list: Optional[List[Note]]) -> Optional[List[List[Dict]]]:
+        """
+        Select the top-K most similar notes for each need by embedding similarity.
+        
+        Args:
+            initial_needs: List of initial needs
+            all_notes: List of all notes
+            note_list: A list of Note objects carrying the stored embeddings
+            
+        Returns:
+            Per need, the candidate notes in similarity order, or None when every note
+            should be sent (few notes, prefilter disabled, or embedding failed)
+        """
+        top_k = self.notes_top_k
+        if top_k <= 0 or len(all_notes) <= top_k or not initial_needs:
+            return None
+        try:
+            embedding_cache = EmbeddingCache()
+            need_vectors = np.asarray(embedding_cache.get_embedding(initial_needs), dtype=np.float32)
+            note_vectors = self._note_embedding_matrix(
+                all_notes, note_list or [], embedding_cache, need_vectors.shape[1]
+            )
+        except Exception as e:
+            logging.warning(f"Note prefilter unavailable, sending all notes: {e}")
+            return None
+
+        need_vectors = need_vectors / np.maximum(np.linalg.norm(need_vectors, axis=1, keepdims=True), 1e-12)
+        note_vectors = note_vectors / np.maximum(np.linalg.norm(note_vectors, axis=1, keepdims=True), 1e-12)
+        scores = need_vectors @ note_vectors.T
+        top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+        logging.info(f"Prefiltered {len(all_notes)} notes to {top_k} candidates for each of {len(initial_needs)} needs")
+        return [[all_notes[i] for i in row] for row in top]
+
+
     def _find_related_notes_and_todos(self, initial_needs: List[str], all_notes: List[Dict], 
-                                  all_note_str: str, output_file: str) -> List[Dict]:
+                                  all_note_str: str, output_file: str,
+                                  note_list: Optional[List[Note]] = None) -> List[Dict]:
         """
         Find notes and todos related to each need and save results to a file.
         
+        When there are more than CONTEXT_NOTES_TOP_K notes, each need is first matched
+        against the notes by embedding similarity and the LLM only picks related IDs
+        among its top-K candidates instead of the whole note corpus.
+        
         Args:
             initial_needs: List of initial needs
             all_notes: List of all notes
             all_note_str: String representation of all notes
             output_file: Path to the output file
+            note_list: Optional list of Note objects whose stored embeddings are reused
             
         Returns:
             A list of dictionaries containing needs and related notes/todos
         """
+        candidates = self._prefilter_candidate_notes(initial_needs, all_notes, note_list)
+        # Select template based on preferred language
+        template = find_related_note_todos__SYS_ZH if self.preferred_language == "Chinese" else find_related_note_todos__SYS_EN
+
         # Find related notes and todos for each need
         all_cot_messages = []
-        for query in initial_needs:
-            # Select template based on preferred language
-            template = find_related_note_todos__SYS_ZH if self.preferred_language == "Chinese" else find_related_note_todos__SYS_EN
+        for i, query in enumerate(initial_needs):
+            note_str = all_note_str if candidates is None else "\n\n".join(
+                self._format_note_line(note) for note in candidates[i]
+            )
             all_cot_messages.append([{
                 "role": "user",
-                "content": template.format(all_note_str=all_note_str+'\n\n', user_query=query)
+                "content": template.format(all_note_str=note_str+'\n\n', user_query=query)
             }])
 
         # Multi-process the COT task
         trying_limit = len(all_cot_messages)
         
-        cot_results = multi_process_request(all_cot_messages[:trying_limit], 16, self._process_request)
-        all_notes_todos = all_notes
+        cot_results = multi_process_request(
+            all_cot_messages[:trying_limit], llm_scheduler.limiter.max_limit, self._process_request
+        )
         needsAndRelatedNotesTodos_res = []
         
-        for cot_result, need in zip(cot_results, initial_needs):
+        for i, (cot_result, need) in enumerate(zip(cot_results, initial_needs)):
             try:
                 # Try to parse cot_result
                 note_todos_ids = ast.literal_eval(cot_result.replace("note_todos_ids: ", ""))
+                # Only notes the LLM was shown can be related
+                all_notes_todos = all_notes if candidates is None else candidates[i]
                 related_note_todos = [note_todo for note_todo in all_notes_todos if note_todo['id'] in note_todos_ids]
                 
                 # Simplify the related notes and todos and calculate token count
@@ -436,10 +548,7 @@ class ContextGenerator:
         all_notes = json.load(open(cleaned_note_file_path, 'r', encoding='utf-8'))
         
         # Prepare string representations of notes
-        all_note_str = "\n\n".join([
-            f"Note id: {note['id']}, Note title: {note['title']}, Note content: {note['content']}, Note AI Insight: {note.get('insight', '')}"
-            for note in all_notes
-        ])
+        all_note_str = "\n\n".join([self._format_note_line(note) for note in all_notes])
         
         return all_notes, all_note_str
 
@@ -462,10 +571,7 @@ class ContextGenerator:
             note.pop("origin_input", None)
         
         # Prepare string representations of notes
-        all_note_str = "\n\n".join([
-            f"Note id: {note['id']}, Note title: {note['title']}, Note content: {note['content']}, Note AI Insight: {note.get('insight', '')}"
-            for note in note_data
-        ])
+        all_note_str = "\n\n".join([self._format_note_line(note) for note in note_data])
         
         return note_data, all_note_str
 
@@ -535,7 +641,8 @@ class ContextGenerator:
         # Find related notes and todos for each need
         needsAndRelatedNotesTodos_res = self._find_related_notes_and_todos(
             initial_needs, all_notes, all_note_str, 
-            data_output_base_dir + "/" + related_notes_for_needs_file_name
+            data_output_base_dir + "/" + related_notes_for_needs_file_name,
+            note_list=note_list
         )
         logging.info(f"Found related notes and todos for {len(needsAndRelatedNotesTodos_res)} needs")
         
@@ -573,13 +680,8 @@ class ContextGenerator:
         with open(data_output_base_dir + "/" + context_enhanced_res_file_name, 'r', encoding='utf-8') as f:
             needs = json.load(f)
         
-        max_workers = 2
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(tqdm(
-                executor.map(self._process_single_need, needs),
-                total=len(needs),
-                desc="Processing needs"
-            ))
+        results = llm_scheduler.map(self._process_single_need, needs)
+        logging.info(f"Processed {len(results)} needs")
 
         with open(data_output_base_dir + "/" + output_file_name, 'w', encoding='utf-8') as f:
             json.dump(results, f, ensure_ascii=False, indent=4)
@@ -617,7 +719,9 @@ class ContextGenerator:
         responses = []
         for _ in range(self.multi_time):
             try:
-                response = self.client.chat.completions.create(
+                response = llm_scheduler.chat_completion(
+                        self.client,
+                        priority=PRIORITY_CONTEXT,
                         model=self.model_name,
                         messages=[
                             {"role": "system", "content": expert_response_prompt.format(preferred_language=self.preferred_language)},
@@ -696,17 +800,19 @@ class ContextGenerator:
         return all_prompts, prompt_metadata
 
 
-    def _process_prompt(self, prompt: str, metadata: Dict, output_file: str) -> None:
+    def _process_prompt(self, prompt: str, metadata: Dict, sink: JsonlSink) -> None:
         """
-        Process a single prompt and save the result to a file.
+        Process a single prompt and queue the result for the output file.
         
         Args:
             prompt: The prompt string
             metadata: Metadata dictionary for the prompt
-            output_file: Path to the output file
+            sink: JSONL sink of the output file
         """
         try:
-            response = self.client.chat.completions.create(
+            response = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_CONTEXT,
                 model=self.model_name,
                 messages=[
                     {"role": "system", "content": prompt},
@@ -724,38 +830,29 @@ class ContextGenerator:
                 "prompt_type": metadata["prompt_type"]
             }
             
-            # Write result immediately to JSONL file
-            with jsonlines.open(output_file, mode='a') as writer:
-                writer.write(result)
-            logging.info("record saved")
+            # The sink's writer thread appends it to the JSONL file
+            sink.write(result)
         except Exception as e:
             logging.error(f"Error processing prompt: {e}")
 
 
     def _process_prompts_with_threading(self, all_prompts: List[str], prompt_metadata: List[Dict], 
-                                    output_file: str, max_workers: int = 10) -> None:
+                                    output_file: str) -> None:
         """
-        Process all prompts using multi-threading.
+        Process all prompts concurrently through the shared LLM scheduler.
         
         Args:
             all_prompts: List of all prompt strings
             prompt_metadata: List of prompt metadata dictionaries
             output_file: Path to the output file
-            max_workers: Maximum number of worker threads
-        """
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = []
-            for prompt, metadata in zip(all_prompts, prompt_metadata):
-                future = executor.submit(
-                    self._process_prompt,
-                    prompt,
-                    metadata,
-                    output_file
-                )
-                futures.append(future)
-            
-            # Wait for all tasks to complete
-            concurrent.futures.wait(futures)
+        """
+        with JsonlSink(output_file, mode="a") as sink:
+            llm_scheduler.map(
+                lambda item: self._process_prompt(item[0], item[1], sink),
+                zip(all_prompts, prompt_metadata),
+                return_exceptions=True,
+            )
+        logging.info(f"{sink.count} records saved to {output_file}")
 
 
     def gen_context_critic_data(self, data_output_base_dir: str, expert_response_file_name: str, out_file_name: str) -> None:
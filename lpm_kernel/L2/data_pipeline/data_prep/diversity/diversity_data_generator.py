@@ -1,4 +1,3 @@
-from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
 import os
@@ -13,6 +12,8 @@ from tqdm import tqdm
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.configs.config import Config
 from lpm_kernel.L2.data_pipeline.data_prep.diversity.utils import remove_similar_dicts
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink, jsonl_to_json
+from lpm_kernel.L2.data_pipeline.data_prep.llm_scheduler import llm_scheduler, PRIORITY_DIVERSITY
 import lpm_kernel.L2.data_pipeline.data_prep.diversity.template_diversity as template_diversity
 
 
@@ -273,42 +274,37 @@ class DiversityDataGenerator:
 
         logging.info(f"Filtered tiny clusters: {len(filtered_tiny_clusters)}")
 
-        if len(exploded_clusters) > 0:
-            logging.info("Execute large cluster generation")
-            data_large = self._pipline(exploded_clusters, 4, q_dict, templater, language_desc, user_name)
-        else:
-            logging.info("Large cluster number is 0")
-            data_large = []
+        # records are streamed to a JSONL file while they are generated
+        jsonl_path = os.path.splitext(output_path)[0] + ".jsonl"
+        with JsonlSink(jsonl_path) as sink:
+            if len(exploded_clusters) > 0:
+                logging.info("Execute large cluster generation")
+                self._pipline(exploded_clusters, 4, q_dict, templater, language_desc, user_name, sink)
+            else:
+                logging.info("Large cluster number is 0")
 
-        if len(mini_clusters) > 0:
-            logging.info("Execute small cluster generation")
-            data_mini = self._pipline(mini_clusters, 3, q_dict, templater, language_desc, user_name)
-        else:
-            logging.info("Small cluster number is 0")
-            data_mini = []
-
-        if len(filtered_tiny_clusters) > 0:
-            logging.info("Execute single entity cluster generation")
-            q_dict.pop("unanswerable")
-            q_dict.pop("global")
-            data_tiny = self._pipline(filtered_tiny_clusters, 2, q_dict, templater, language_desc, user_name)
-        else:
-            logging.info("Single entity cluster number is 0")
-            data_tiny = []
+            if len(mini_clusters) > 0:
+                logging.info("Execute small cluster generation")
+                self._pipline(mini_clusters, 3, q_dict, templater, language_desc, user_name, sink)
+            else:
+                logging.info("Small cluster number is 0")
 
-        combined_list = data_large + data_mini + data_tiny
-        # calculate total entries
-        total_entries = len(combined_list)
-        logging.info(f"Total entries: {total_entries}")
-        # store data
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(combined_list, f, ensure_ascii=False, indent=4)
+            if len(filtered_tiny_clusters) > 0:
+                logging.info("Execute single entity cluster generation")
+                q_dict.pop("unanswerable")
+                q_dict.pop("global")
+                self._pipline(filtered_tiny_clusters, 2, q_dict, templater, language_desc, user_name, sink)
+            else:
+                logging.info("Single entity cluster number is 0")
 
+        # store data
+        total_entries = jsonl_to_json(jsonl_path, output_path)
+        logging.info(f"Total entries: {total_entries}")
         logging.info(f"Data has been stored to {output_path}")
 
 
     def _pipline(self, clusters: list, aug_para: int, q_dict: dict, 
-                templater, language_desc: str, user_name: str) -> list:
+                templater, language_desc: str, user_name: str, sink: JsonlSink) -> int:
         """Execute the pipeline for data generation.
         
         Args:
@@ -318,9 +314,10 @@ class DiversityDataGenerator:
             templater: Template handler object.
             language_desc: Language description string.
             user_name: Name of the user.
+            sink: Sink the generated QA records are written to.
             
         Returns:
-            List of generated QA data.
+            Number of QA records written.
         """
         explode_clusters = []
         explode_questions_types = []
@@ -336,33 +333,16 @@ class DiversityDataGenerator:
         logging.info(f"Explode clusters: {len(explode_clusters)}")
         logging.info(f"Explode questions types: {len(explode_questions_types)}")
 
-        questions, answers, answer_types, flat_question_types, flat_clusters = self._generate(
-            explode_clusters, explode_questions_types, templater, q_dict, language_desc, user_name
+        return self._generate(
+            explode_clusters, explode_questions_types, templater, q_dict, language_desc, user_name, sink
         )
 
-        # store data
-        data = []
-        for cluster, question, answer, question_type, answer_type in zip(
-            flat_clusters, questions, answers, flat_question_types, answer_types
-        ):
-            if len(question) == 0 or len(answer) == 0:
-                continue
-            data.append(
-                {
-                    "user": question,
-                    "assistant": answer,
-                    "entity_name": cluster["entity_name"],
-                    "question_type": question_type,
-                    "answer_type": answer_type,
-                    "doc_id": cluster["doc_id"],
-                }
-            )
-        return data
-
 
     def _generate(self, explode_clusters: list, explode_questions_types: list, 
-                 templater, q_dict: dict, language_desc: str, user_name: str) -> tuple:
-        """Generate questions and answers using ThreadPoolExecutor.
+                 templater, q_dict: dict, language_desc: str, user_name: str, sink: JsonlSink) -> int:
+        """Generate questions and answers through the shared LLM scheduler.
+        
+        Each answered question is written to the sink as soon as its answer arrives.
         
         Args:
             explode_clusters: List of expanded data clusters.
@@ -371,60 +351,67 @@ class DiversityDataGenerator:
             q_dict: Dictionary of question types.
             language_desc: Language description string.
             user_name: Name of the user.
+            sink: Sink the generated QA records are written to.
             
         Returns:
-            Tuple of (questions, answers, answer_types, flat_question_types, flat_clusters).
+            Number of QA records written.
         """
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = [
-                executor.submit(self._Q_generate, cluster, question_type, templater, q_dict, language_desc, user_name)
-                for cluster, question_type in zip(
-                    explode_clusters, explode_questions_types
-                )
-            ]
-            questions = []
-            flat_clusters = []
-            flat_question_types = []
-            cnt = 0
-            for future, cluster, question_type in zip(
-                tqdm(futures, total=len(futures), desc="Q_generate"),
-                explode_clusters,
-                explode_questions_types,
-            ):
-                try:
-                    result = future.result()
-                    cnt += 1 if result else 0
-                    # Assuming result is a list of questions
-                    questions.extend(result)
-                    # Extend clusters and question types to match the number of questions
-                    flat_clusters.extend([cluster] * len(result))
-                    flat_question_types.extend([question_type] * len(result))
-                except Exception as e:
-                    logging.error(traceback.format_exc())
+        q_results = llm_scheduler.map(
+            lambda item: self._Q_generate(item[0], item[1], templater, q_dict, language_desc, user_name),
+            zip(explode_clusters, explode_questions_types),
+            return_exceptions=True,
+        )
+        questions = []
+        flat_clusters = []
+        flat_question_types = []
+        cnt = 0
+        for result, cluster, question_type in zip(
+            tqdm(q_results, total=len(q_results), desc="Q_generate"),
+            explode_clusters,
+            explode_questions_types,
+        ):
+            if isinstance(result, Exception):
+                logging.error("".join(traceback.format_exception(type(result), result, result.__traceback__)))
+                continue
+            cnt += 1 if result else 0
+            # Assuming result is a list of questions
+            questions.extend(result)
+            # Extend clusters and question types to match the number of questions
+            flat_clusters.extend([cluster] * len(result))
+            flat_question_types.extend([question_type] * len(result))
 
         # safety check
         logging.info(f"Count: {cnt}, len(explode_clusters): {len(explode_clusters)}")
 
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = [
-                executor.submit(self._A_generate, cluster, question, question_type, templater, language_desc, user_name)
-                for cluster, question, question_type in zip(
-                    flat_clusters, questions, flat_question_types
-                )
-            ]
+        def answer(item) -> bool:
+            cluster, question, question_type = item
+            res, answer_type = self._A_generate(cluster, question, question_type, templater, language_desc, user_name)
+            if len(question) == 0 or len(res) == 0:
+                return False
+            sink.write(
+                {
+                    "user": question,
+                    "assistant": res,
+                    "entity_name": cluster["entity_name"],
+                    "question_type": question_type,
+                    "answer_type": answer_type,
+                    "doc_id": cluster["doc_id"],
+                }
+            )
+            return True
 
-            answers = []
-            answer_types = []
+        a_results = llm_scheduler.map(
+            answer, zip(flat_clusters, questions, flat_question_types), return_exceptions=True
+        )
 
-            for future in tqdm(futures, total=len(futures), desc="A_generate"):
-                try:
-                    result, answer_type = future.result()
-                    answers.append(result)
-                    answer_types.append(answer_type)
-                except Exception as e:
-                    logging.error(traceback.format_exc())
+        written = 0
+        for result in tqdm(a_results, total=len(a_results), desc="A_generate"):
+            if isinstance(result, Exception):
+                logging.error("".join(traceback.format_exception(type(result), result, result.__traceback__)))
+                continue
+            written += 1 if result else 0
 
-        return questions, answers, answer_types, flat_question_types, flat_clusters
+        return written
 
 
     def _Q_generate(self, cluster: dict, question_type: str, templater, 
@@ -454,7 +441,9 @@ class DiversityDataGenerator:
             {"role": "user", "content": user_input + language_desc},
         ]
 
-        response = self.client.chat.completions.create(
+        response = llm_scheduler.chat_completion(
+            self.client,
+            priority=PRIORITY_DIVERSITY,
             model=self.model_name,
             messages=messages,
         )
@@ -499,7 +488,9 @@ class DiversityDataGenerator:
             {"role": "user", "content": user_input + language_desc},
         ]
 
-        response = self.client.chat.completions.create(
+        response = llm_scheduler.chat_completion(
+            self.client,
+            priority=PRIORITY_DIVERSITY,
             model=self.model_name,
             messages=messages,
         )
@@ -0,0 +1,177 @@
+"""
+Streaming JSONL output for the L2 data generators
+"""
+from typing import Any, Dict, Iterator
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class JsonlSink:
+    """Appends records to a JSONL file from one writer thread
+
+    Generator threads serialize records and put the lines on a bounded queue,
+    which blocks them when the writer falls behind; the writer thread owns a
+    single buffered file handle, flushes it every flush_interval seconds and
+    fsyncs it every fsync_interval seconds, so lines never interleave and a
+    crash loses at most the last interval of records.
+
+    If the file cannot be written (e.g. the disk is full) the writer keeps
+    draining the queue so producers never block on it, and write() and close()
+    raise instead of records silently going missing.
+    """
+
+    def __init__(self, path: str, mode: str = "w", queue_size: int = 1024,
+                 flush_interval: float = 1.0, fsync_interval: float = 10.0):
+        """
+        Args:
+            path: Path of the JSONL file
+            mode: "w" to truncate the file, "a" to append to it
+            queue_size: Records waiting to be written before write() blocks
+            flush_interval: Seconds between flushes of the file buffer
+            fsync_interval: Seconds between fsyncs of the file
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        self._file = open(path, mode, encoding="utf-8", buffering=1 << 20)
+        self._thread = threading.Thread(target=self._run, name="jsonl-sink", daemon=True)
+        self._thread.start()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise IOError(f"Failed to write {self.path}: {str(self._error)}") from self._error
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a record to be written as one line.
+
+        Args:
+            record: JSON-serializable record
+
+        Raises:
+            TypeError: If the record is not JSON-serializable
+            IOError: If the file could not be written
+        """
+        if self._closed:
+            raise ValueError(f"JsonlSink for {self.path} is closed")
+        self._raise_if_failed()
+        # serialized here so a bad record fails its producer, not the writer
+        self._queue.put(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _run(self) -> None:
+        flushed_at = synced_at = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                line = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                line = None
+            if line is _STOP:
+                break
+            if self._error is not None:
+                # keep draining so producers never block on a dead writer
+                continue
+            try:
+                if line is not None:
+                    self._file.write(line)
+                    self.count += 1
+                    dirty = True
+                now = time.monotonic()
+                if dirty and now - flushed_at >= self.flush_interval:
+                    self._file.flush()
+                    flushed_at = now
+                    dirty = False
+                    if now - synced_at >= self.fsync_interval:
+                        os.fsync(self._file.fileno())
+                        synced_at = now
+            except Exception as e:
+                self._error = e
+                logger.error(f"Failed to write records to {self.path}: {str(e)}")
+        try:
+            if self._error is None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        except Exception as e:
+            self._error = e
+            logger.error(f"Failed to write records to {self.path}: {str(e)}")
+        finally:
+            try:
+                self._file.close()
+            except Exception as e:
+                self._error = self._error or e
+
+    def close(self) -> None:
+        """
+        Write the queued records, then flush, fsync and close the file.
+
+        Raises:
+            IOError: If any record could not be written
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # do not hide the exception that is already propagating
+        try:
+            self.close()
+        except Exception as e:
+            logger.error(str(e))
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a JSONL file, skipping blank and malformed lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed line in {path}: {str(e)}")
+
+
+def jsonl_to_json(jsonl_path: str, json_path: str, remove: bool = True) -> int:
+    """
+    Stream the records of a JSONL file into a JSON array file, one record at a time.
+
+    Args:
+        jsonl_path: Path of the JSONL file
+        json_path: Path of the JSON file to write
+        remove: Whether to delete the JSONL file afterwards
+
+    Returns:
+        The number of records written
+    """
+    count = 0
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in iter_jsonl(jsonl_path):
+            f.write(",\n    " if count else "\n    ")
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write("\n]" if count else "]")
+    if remove:
+        os.remove(jsonl_path)
+    return count
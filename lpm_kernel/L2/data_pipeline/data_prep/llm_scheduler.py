@@ -0,0 +1,281 @@
+"""
+Shared scheduler for the chat completion requests of the L2 data generators
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+from lpm_kernel.configs.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Stage priorities, lower values are served first when requests queue up
+PRIORITY_PREFERENCE = 0   # DECODE_PREFERENCE_PATTERNS
+PRIORITY_SELFQA = 1       # REINFORCE_IDENTITY
+PRIORITY_CONTEXT = 1      # REINFORCE_IDENTITY, context data
+PRIORITY_DIVERSITY = 2    # AUGMENT_CONTENT_RETENTION
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit plus an optional token bucket on the request rate
+
+    Every completed request without trouble raises the limit by 1/limit, so the
+    limit grows by one per round of requests. A 429 halves it and pauses new
+    requests for the provider's Retry-After; a latency well above the baseline
+    of the same priority shrinks it by decrease_factor, at most once per round
+    trip. Baselines are kept per priority because stages differ a lot in output
+    length, and drift up toward the current latency so one fast burst does not
+    pin them. Waiting requests are admitted by priority, then in arrival order.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 rate: float = 0.0, burst: int = 1, latency_tolerance: float = 2.0,
+                 decrease_factor: float = 0.8, baseline_decay: float = 0.05):
+        """
+        Args:
+            initial: Starting concurrency limit
+            min_limit: Lowest concurrency limit
+            max_limit: Highest concurrency limit
+            rate: Maximum requests per second, 0 for no rate limit
+            burst: Token bucket capacity when rate is set
+            latency_tolerance: Smoothed latency over the baseline latency that counts as congestion,
+                0 to only lower the limit on rate limit errors
+            decrease_factor: Multiplier applied to the limit on congestion
+            baseline_decay: Share of the gap to the smoothed latency the baseline moves up per request
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.baseline_decay = baseline_decay
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        # priority -> [smoothed latency, baseline latency]
+        self._latencies = {}
+        self._decreased_at = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _wait_time(self, now: float) -> float:
+        """Seconds until the head waiter may start, 0 if it may start now, None if it waits for a release"""
+        if self._in_flight >= int(self.limit):
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate > 0 and self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        return 0.0
+
+    def acquire(self, priority: int = 0) -> None:
+        """
+        Block until a request of the given priority may be sent.
+
+        Args:
+            priority: Stage priority, lower values go first
+        """
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiters[0] == entry:
+                    wait = self._wait_time(now)
+                    if wait == 0:
+                        heapq.heappop(self._waiters)
+                        self._in_flight += 1
+                        if self.rate > 0:
+                            self._tokens -= 1
+                        # the next waiter may be admissible as well
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def release(self, latency: float, throttled: bool = False, retry_after: float = 0.0,
+                priority: int = 0) -> None:
+        """
+        Return a slot and adapt the limit to how the request went.
+
+        Args:
+            latency: Seconds the request took
+            throttled: Whether the provider answered with a rate limit error
+            retry_after: Seconds the provider asked to wait before the next request
+            priority: Stage priority the request was acquired with
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._paused_until = max(self._paused_until, now + retry_after)
+                self._decreased_at = now
+                logger.info(f"LLM rate limited, concurrency limit lowered to {int(self.limit)}")
+            elif latency > 0:
+                stats = self._latencies.get(priority)
+                if stats is None:
+                    stats = self._latencies[priority] = [latency, latency]
+                else:
+                    stats[0] = 0.8 * stats[0] + 0.2 * latency
+                    stats[1] = min(stats[0], stats[1] + self.baseline_decay * (stats[0] - stats[1]))
+                smoothed, baseline = stats
+                congested = self.latency_tolerance > 0 and smoothed > self.latency_tolerance * baseline
+                if congested and now - self._decreased_at > smoothed:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._decreased_at = now
+                    logger.info(
+                        f"LLM latency {smoothed:.1f}s over {baseline:.1f}s baseline (priority {priority}), "
+                        f"concurrency limit lowered to {int(self.limit)}"
+                    )
+                elif not congested:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class LLMScheduler:
+    """Sends the chat completions of every L2 data generator through one limiter
+
+    The limiter finds the concurrency the provider sustains instead of each
+    generator using its own fixed worker count; rate limits, timeouts and server
+    errors are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, max_retries: int = 5, retry_backoff: float = 2.0):
+        """
+        Args:
+            limiter: Shared concurrency and rate limiter
+            max_retries: Attempts per request before the error is raised
+            retry_backoff: Base delay in seconds, doubled on every retry
+        """
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    @staticmethod
+    def _retry_after(e: Exception) -> float:
+        response = getattr(e, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(retry_after) if retry_after else 0.0
+        except ValueError:
+            return 0.0
+
+    def chat_completion(self, client, priority: int = 0, **params) -> Any:
+        """
+        Call client.chat.completions.create within the shared limits.
+
+        Args:
+            client: OpenAI client of the calling generator
+            priority: Stage priority, lower values go first
+            params: Arguments of chat.completions.create
+
+        Returns:
+            The chat completion response
+        """
+        for attempt in range(self.max_retries):
+            self.limiter.acquire(priority)
+            start = time.monotonic()
+            try:
+                response = client.chat.completions.create(**params)
+            except (RateLimitError, APITimeoutError, APIConnectionError, APIStatusError) as e:
+                status = getattr(e, "status_code", None)
+                throttled = status == 429
+                retry_after = self._retry_after(e) if throttled else 0.0
+                # failed requests tell nothing about latency under load
+                self.limiter.release(0.0, throttled=throttled, retry_after=retry_after, priority=priority)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.max_retries - 1:
+                    raise
+                delay = max(self.retry_backoff * (2**attempt), retry_after)
+                # jitter so throttled workers do not retry in lockstep
+                delay += random.uniform(0, delay / 2)
+                logger.warning(
+                    f"Attempt {attempt + 1}/{self.max_retries} failed ({str(e)}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+            except Exception:
+                self.limiter.release(0.0, priority=priority)
+                raise
+            self.limiter.release(time.monotonic() - start, priority=priority)
+            return response
+
+    def map(self, func: Callable, items: Iterable, return_exceptions: bool = False) -> List[Any]:
+        """
+        Apply func to every item on the shared pool, results in item order.
+
+        Each call gets its own pool sized for the highest concurrency limit, so the
+        limiter, not a shared queue, decides which stage's requests go out first and
+        how many talk to the provider at once.
+
+        Args:
+            func: Function of one item, expected to call chat_completion
+            items: Items to process
+            return_exceptions: Put exceptions in the results instead of raising the first one
+
+        Returns:
+            A list of results in the order of items
+        """
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.limiter.max_limit, len(items)), thread_name_prefix="l2-llm"
+        ) as executor:
+            futures = [executor.submit(func, item) for item in items]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    results.append(e)
+        return results
+
+
+def _create_scheduler() -> LLMScheduler:
+    config = Config.from_env()
+    limiter = AdaptiveLimiter(
+        initial=int(config.get("L2_LLM_INITIAL_CONCURRENCY", "4")),
+        min_limit=int(config.get("L2_LLM_MIN_CONCURRENCY", "1")),
+        max_limit=int(config.get("L2_LLM_MAX_CONCURRENCY", "32")),
+        rate=float(config.get("L2_LLM_MAX_RPS", "0")),
+        burst=int(config.get("L2_LLM_BURST", "4")),
+        latency_tolerance=float(config.get("L2_LLM_LATENCY_TOLERANCE", "2.0")),
+        baseline_decay=float(config.get("L2_LLM_LATENCY_BASELINE_DECAY", "0.05")),
+    )
+    return LLMScheduler(
+        limiter,
+        max_retries=int(config.get("L2_LLM_MAX_RETRIES", "5")),
+        retry_backoff=float(config.get("L2_LLM_RETRY_BACKOFF", "2.0")),
+    )
+
+
+llm_scheduler = _create_scheduler()
@@ -1,16 +1,16 @@
 from itertools import islice
-import concurrent.futures
 import json
 import logging
 import os
 import random
 import re
 
-from tqdm import tqdm
 import openai
 
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.configs.config import Config
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink, jsonl_to_json
+from lpm_kernel.L2.data_pipeline.data_prep.llm_scheduler import llm_scheduler, PRIORITY_PREFERENCE
 from lpm_kernel.L2.data_pipeline.data_prep.preference.prompts import (
     CH_USR_TEMPLATES,
     EN_USR_TEMPLATES,
@@ -48,7 +48,6 @@ class PreferenceQAGenerator:
             )
         
         self.bio = bio
-        self.question_list = []
         self.preference_language = preference_language
         self.prompt_templates = self._get_prompt_templates(preference_language)
         self.sys_templates = self._get_sys_templates(preference_language)
@@ -65,17 +64,16 @@ class PreferenceQAGenerator:
             The generated response text or None if an error occurred.
         """
         try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(
-                    self.client.chat.completions.create,
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": sys},
-                        {"role": "user", "content": prompt},
-                    ],
-                )
-                response = future.result()
-                return response.choices[0].message.content
+            response = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_PREFERENCE,
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": sys},
+                    {"role": "user", "content": prompt},
+                ],
+            )
+            return response.choices[0].message.content
         except Exception as e:
             logging.error(f"Error generating response: {e}")
             return None
@@ -128,59 +126,73 @@ class PreferenceQAGenerator:
     def process_clusters(self, output_filename: str) -> None:
         """Process clusters and generate questions and answers.
         
+        Clusters are processed concurrently through the shared LLM scheduler, Q&A
+        pairs are streamed to a JSONL file as they are generated and turned into
+        the JSON output at the end.
+        
         Args:
             output_filename: Path to save the generated Q&A pairs.
         """
-        cluster_items = list(self.pre_msg.items())
-        count = 0
+        cluster_items = [
+            cluster for _, cluster in self.pre_msg.items()
+            if len(self._get_chunk_concat(cluster["contents"])) >= 20
+        ]
 
-        for _, cluster in tqdm(cluster_items):
-            chunk_concat = self._get_chunk_concat(cluster["contents"])
+        jsonl_path = os.path.splitext(output_filename)[0] + ".jsonl"
+        with JsonlSink(jsonl_path) as sink:
+            for result in llm_scheduler.map(
+                lambda cluster: self._process_cluster(cluster, sink), cluster_items, return_exceptions=True
+            ):
+                if isinstance(result, Exception):
+                    logging.error(f"Error processing cluster: {result}")
+        logging.info(f"Processed {len(cluster_items)} clusters")
 
-            tags = " ".join(cluster["tags"])
+        count = jsonl_to_json(jsonl_path, output_filename)
+        logging.info(f"Saved {count} Q&A pairs to {output_filename}")
 
-            if len(chunk_concat) < 20:
-                continue
-            count += 1
-            
-            n_cluster = len(cluster["contents"])
-            if n_cluster > 1:
-                logging.info(f"Cluster has {str(n_cluster)} chunks")
 
-            prompt_question_template = self.prompt_templates["query"]
-            prompt_answer_template = self.prompt_templates["answer"]
-            sys_question = self.sys_templates["query"]
-            sys_answer = self.sys_templates["answer"]
+    def _process_cluster(self, cluster: dict, sink: JsonlSink) -> None:
+        """Generate the Q&A pairs of one cluster.
+        
+        Args:
+            cluster: Cluster with its chunk contents and tags.
+            sink: Sink the generated Q&A pairs are written to.
+        """
+        chunk_concat = self._get_chunk_concat(cluster["contents"])
 
-            try:
-                gen_question = self.generate_response(
-                    sys_question,
-                    prompt_question_template.format(
-                        bio=self.bio, chunks_concat=chunk_concat
-                    ),
-                )
-            except Exception as e:
-                logging.error(traceback.format_exc())
-                continue
-            try:
-                gen_answer = self.generate_response(
-                    sys_answer,
-                    prompt_answer_template.format(
-                        question=gen_question, bio=self.bio, chunks_concat=chunk_concat
-                    ),
-                )
-            except Exception as e:
-                logging.error(traceback.format_exc())
-                continue
-            
-            self.question_list.append({"user": gen_question, "assistant": gen_answer})
-            if n_cluster >= 20:
-                self._generate_multiple_questions(cluster["contents"], chunk_concat)
-            if count % 5 == 0:
-                logging.info(f"Processed {count} clusters")
+        n_cluster = len(cluster["contents"])
+        if n_cluster > 1:
+            logging.info(f"Cluster has {str(n_cluster)} chunks")
+
+        prompt_question_template = self.prompt_templates["query"]
+        prompt_answer_template = self.prompt_templates["answer"]
+        sys_question = self.sys_templates["query"]
+        sys_answer = self.sys_templates["answer"]
+
+        try:
+            gen_question = self.generate_response(
+                sys_question,
+                prompt_question_template.format(
+                    bio=self.bio, chunks_concat=chunk_concat
+                ),
+            )
+        except Exception as e:
+            logging.error(traceback.format_exc())
+            return
+        try:
+            gen_answer = self.generate_response(
+                sys_answer,
+                prompt_answer_template.format(
+                    question=gen_question, bio=self.bio, chunks_concat=chunk_concat
+                ),
+            )
+        except Exception as e:
+            logging.error(traceback.format_exc())
+            return
 
-        with open(output_filename, "w") as json_file:
-            json.dump(self.question_list, json_file, indent=4, ensure_ascii=False)
+        sink.write({"user": gen_question, "assistant": gen_answer})
+        if n_cluster >= 20:
+            self._generate_multiple_questions(cluster["contents"], chunk_concat, sink)
 
 
     def _get_chunk_concat(self, contents: list) -> str:
@@ -200,12 +212,13 @@ class PreferenceQAGenerator:
         return chunk_concat
 
 
-    def _generate_multiple_questions(self, contents: list, chunk_concat: str) -> None:
+    def _generate_multiple_questions(self, contents: list, chunk_concat: str, sink: JsonlSink) -> None:
         """Generate multiple questions and answers for larger clusters.
         
         Args:
             contents: List of content chunks.
             chunk_concat: Concatenated text chunks.
+            sink: Sink the generated Q&A pairs are written to.
         """
         num_chunk_refered = 30
         n_repeat = max(1, int(len(contents) * 1 / num_chunk_refered))
@@ -245,5 +258,4 @@ class PreferenceQAGenerator:
             except Exception as e:
                 logging.error(traceback.format_exc())
                 continue
-            self.question_list.append({"user": gen_question, "assistant": gen_answer})
-        return
+            sink.write({"user": gen_question, "assistant": gen_answer})
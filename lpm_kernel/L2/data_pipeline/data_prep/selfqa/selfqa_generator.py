@@ -1,4 +1,4 @@
-import concurrent.futures
+from typing import Optional
 import logging
 import traceback
 
@@ -11,6 +11,8 @@ from lpm_kernel.L2.data_pipeline.data_prep.selfqa.selfqa_prompt import (
 )
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.configs.config import Config
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink
+from lpm_kernel.L2.data_pipeline.data_prep.llm_scheduler import llm_scheduler, PRIORITY_SELFQA
 
 
 def is_english(text: str) -> bool:
@@ -128,11 +130,16 @@ class SelfQA:
             return question_list_cn + user_bind_question_cn
 
 
-    def generate_qa(self) -> list:
+    def generate_qa(self, sink: Optional[JsonlSink] = None) -> list:
         """Generate question and answer pairs.
         
+        Args:
+            sink: Optional sink the pairs are streamed to as they are answered
+                instead of being collected in memory.
+        
         Returns:
-            A list of dictionaries containing question and answer pairs.
+            A list of dictionaries containing question and answer pairs, empty
+            when a sink is given.
         """
         q_list = self._get_question_list()
 
@@ -170,18 +177,15 @@ class SelfQA:
             if a is None:
                 return None
             
+            if sink is not None:
+                sink.write({"user": q, "assistant": a})
+                return None
             return {"user": q, "assistant": a}
 
-        # Use ThreadPoolExecutor with max_workers=2
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit all questions to the executor
-            future_to_question = {executor.submit(process_question, q): q for q in q_list}
-            
-            # Process results as they complete
-            for future in tqdm(concurrent.futures.as_completed(future_to_question), total=len(q_list)):
-                result = future.result()
-                if result is not None:
-                    q_a_list.append(result)
+        # The shared LLM scheduler decides how many questions are answered at once
+        for result in tqdm(llm_scheduler.map(process_question, q_list), total=len(q_list)):
+            if result is not None:
+                q_a_list.append(result)
 
         return q_a_list
 
@@ -196,7 +200,9 @@ class SelfQA:
             The response content from OpenAI, or None if an error occurs.
         """
         try:
-            res = self.client.chat.completions.create(
+            res = llm_scheduler.chat_completion(
+                self.client,
+                priority=PRIORITY_SELFQA,
                 messages=messages,
                 model=self.model_name,
             )
@@ -13,10 +13,10 @@ from lpm_kernel.L1.bio import Note
 from lpm_kernel.L2.data import L2DataProcessor
 import yaml
 import logging
+from lpm_kernel.L2.data_pipeline.data_prep.jsonl_sink import JsonlSink, jsonl_to_json
 from lpm_kernel.L2.data_pipeline.data_prep.preference.preference_QA_generate import PreferenceQAGenerator
 from lpm_kernel.L2.data_pipeline.data_prep.diversity.diversity_data_generator import DiversityDataGenerator
 from lpm_kernel.L2.data_pipeline.data_prep.selfqa.selfqa_generator import SelfQA
-import json
 
 class L2Generator:
     """L2 level generator for handling data and model operations.
@@ -93,6 +93,21 @@ class L2Generator:
             user_intro,
         )
 
+    def merge_subjective_data(self, data_output_base_dir: str):
+        """Merge the preference, diversity and self-Q&A data into merged.json.
+        
+        Args:
+            data_output_base_dir: Base directory holding the generated data.
+        """
+        self.data_processor.merge_subjective_data(
+            data_output_base_dir,
+            [
+                os.path.join(data_output_base_dir, "preference.json"),
+                os.path.join(data_output_base_dir, "diversity.json"),
+                os.path.join(data_output_base_dir, "selfqa.json"),
+            ],
+        )
+
     def gen_preference_data(
         self,
         note_list: List[Note],
@@ -151,9 +166,10 @@ class L2Generator:
             user_global_bio= global_bio,
             preferred_language=self.prefered_lang,
         )
-        q_a_list = selfqa.generate_qa()
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(q_a_list, f, ensure_ascii=False, indent=4)
+        jsonl_path = os.path.splitext(output_path)[0] + ".jsonl"
+        with JsonlSink(jsonl_path) as sink:
+            selfqa.generate_qa(sink=sink)
+        jsonl_to_json(jsonl_path, output_path)
 
     def clean_graphrag_keys(self):
         GRAPH_CONFIG = os.path.join(
@@ -161,11 +161,12 @@ def process_all_chunks():
                     failed += 1
                     continue
 
-                # Split into chunks and save
+                # Split into chunks and save them in one transaction,
+                # replacing chunks left over from a previous run
                 chunks = chunker.split(doc.raw_content)
-                for chunk in chunks:
-                    chunk.document_id = doc.id
-                    chunk_service.save_chunk(chunk)
+                _, replaced_ids = chunk_service.save_chunks_bulk(doc.id, chunks)
+                if replaced_ids:
+                    document_service.embedding_service.delete_chunk_embeddings(replaced_ids)
 
                 processed += 1
                 logger.info(
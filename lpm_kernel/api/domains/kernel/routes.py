@@ -20,6 +20,7 @@ from lpm_kernel.kernel.l1.l1_manager import (
     extract_notes_from_documents,
     document_service,
 )
+from lpm_kernel.kernel.l1.shade_index import shade_embedding_index
 from lpm_kernel.kernel.note_service import NoteService
 from lpm_kernel.models.l1 import (
     L1Version,
@@ -128,6 +129,31 @@ def __store_chunk_topics(session, new_version: int, chunk_topics_dict: dict) ->
             session.add(topic_data)
 
 
+def __build_shade_index(new_version: int, bio_data: Bio) -> None:
+    """Embed the shades of a new version so L1 retrieval does not have to"""
+    shades_list = getattr(bio_data, "shades_list", None) or []
+    try:
+        shade_embedding_index.build(
+            new_version,
+            [
+                {
+                    "name": shade.name,
+                    "aspect": shade.aspect,
+                    "icon": shade.icon,
+                    "desc_third_view": shade.desc_third_view,
+                    "content_third_view": shade.content_third_view,
+                    "desc_second_view": shade.desc_second_view,
+                    "content_second_view": shade.content_second_view,
+                }
+                for shade in shades_list
+            ],
+        )
+    except Exception as e:
+        # the index is rebuilt lazily on the next retrieval
+        shade_embedding_index.invalidate()
+        logger.warning(f"Failed to build shade index for version {new_version}: {str(e)}")
+
+
 def store_l1_data(session, l1_data: L1GenerationResult) -> int:
     """Store L1 data based on L0 data"""
     try:
@@ -160,6 +186,9 @@ def store_l1_data(session, l1_data: L1GenerationResult) -> int:
         session.commit()
         logger.info(f"Successfully stored L1 data version {new_version_number}")
 
+        # 8. Precompute shade embeddings for the new version
+        __build_shade_index(new_version_number, l1_data.bio)
+
         return new_version_number
 
     except Exception as e:
@@ -1,8 +1,8 @@
 """
 ServerStatus related data transfer objects
 """
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, List
 
 
 @dataclass
@@ -22,6 +22,7 @@ class ServerStatus:
 
     is_running: bool  # if service is running
     process_info: Optional[ProcessInfo] = None  # process info
+    is_ready: bool = False  # if the health endpoint reports the model loaded
 
     @classmethod
     def not_running(cls) -> "ServerStatus":
@@ -29,6 +30,88 @@ class ServerStatus:
         return cls(is_running=False)
 
     @classmethod
-    def running(cls, process_info: ProcessInfo) -> "ServerStatus":
+    def running(cls, process_info: ProcessInfo, is_ready: bool = False) -> "ServerStatus":
         """create a ServerStatus object representing a running server"""
-        return cls(is_running=True, process_info=process_info)
+        return cls(is_running=True, process_info=process_info, is_ready=is_ready)
+
+
+@dataclass
+class LlamaLaunchProfile:
+    """llama-server launch options, None leaves the llama-server default"""
+
+    host: str = "127.0.0.1"
+    port: int = 8080
+    threads: Optional[int] = None  # --threads
+    ctx_size: Optional[int] = None  # --ctx-size
+    batch_size: Optional[int] = None  # --batch-size
+    parallel: Optional[int] = None  # --parallel, number of slots
+    cont_batching: bool = True  # --cont-batching
+    mlock: bool = False  # --mlock
+    no_mmap: bool = False  # --no-mmap
+    cache_type_k: Optional[str] = None  # --cache-type-k, e.g. f16, q8_0
+    cache_type_v: Optional[str] = None  # --cache-type-v
+
+    @classmethod
+    def from_config(cls, config) -> "LlamaLaunchProfile":
+        """create a profile from LLAMA_* configuration values"""
+
+        def opt_int(key: str) -> Optional[int]:
+            value = config.get(key)
+            return int(value) if value not in (None, "") else None
+
+        def flag(key: str, default: bool) -> bool:
+            value = config.get(key)
+            if value in (None, ""):
+                return default
+            return str(value).lower() == "true"
+
+        return cls(
+            host=config.get("LLAMA_HOST") or cls.host,
+            port=opt_int("LLAMA_PORT") or cls.port,
+            threads=opt_int("LLAMA_THREADS"),
+            ctx_size=opt_int("LLAMA_CTX_SIZE"),
+            batch_size=opt_int("LLAMA_BATCH_SIZE"),
+            parallel=opt_int("LLAMA_PARALLEL"),
+            cont_batching=flag("LLAMA_CONT_BATCHING", True),
+            mlock=flag("LLAMA_MLOCK", False),
+            no_mmap=flag("LLAMA_NO_MMAP", False),
+            cache_type_k=config.get("LLAMA_CACHE_TYPE_K") or None,
+            cache_type_v=config.get("LLAMA_CACHE_TYPE_V") or None,
+        )
+
+    def with_overrides(self, overrides: Optional[Dict[str, Any]]) -> "LlamaLaunchProfile":
+        """return a copy with the known keys of overrides applied"""
+        if not overrides:
+            return self
+        names = {f.name for f in fields(self)}
+        values = {}
+        for key, value in overrides.items():
+            if key not in names or value is None:
+                continue
+            if key in ("port", "threads", "ctx_size", "batch_size", "parallel"):
+                value = int(value)
+            elif key in ("cont_batching", "mlock", "no_mmap") and not isinstance(value, bool):
+                value = str(value).lower() == "true"
+            values[key] = value
+        return replace(self, **values)
+
+    def to_args(self) -> List[str]:
+        """build llama-server command line arguments"""
+        args = ["--host", self.host, "--port", str(self.port)]
+        for flag_name, value in (
+            ("--threads", self.threads),
+            ("--ctx-size", self.ctx_size),
+            ("--batch-size", self.batch_size),
+            ("--parallel", self.parallel),
+            ("--cache-type-k", self.cache_type_k),
+            ("--cache-type-v", self.cache_type_v),
+        ):
+            if value is not None:
+                args.extend([flag_name, str(value)])
+        if self.cont_batching:
+            args.append("--cont-batching")
+        if self.mlock:
+            args.append("--mlock")
+        if self.no_mmap:
+            args.append("--no-mmap")
+        return args
@@ -15,6 +15,7 @@ from lpm_kernel.api.common.responses import APIResponse
 from lpm_kernel.api.domains.kernel2.dto.chat_dto import (
     ChatRequest,
 )
+from lpm_kernel.api.domains.kernel2.dto.server_dto import LlamaLaunchProfile
 from lpm_kernel.api.domains.kernel2.services.chat_service import chat_service
 from lpm_kernel.api.domains.kernel2.services.prompt_builder import (
     BasePromptStrategy,
@@ -533,6 +534,20 @@ def convert_model():
         return jsonify(APIResponse.error(message=error_msg, code=500))
 
 
+# Request parameters accepted by /llama/start to override the launch profile
+LLAMA_PROFILE_KEYS = (
+    "threads",
+    "ctx_size",
+    "batch_size",
+    "parallel",
+    "cont_batching",
+    "mlock",
+    "no_mmap",
+    "cache_type_k",
+    "cache_type_v",
+)
+
+
 @kernel2_bp.route("/llama/start", methods=["POST"])
 def start_llama_server():
     """Start llama-server service"""
@@ -557,7 +572,7 @@ def start_llama_server():
             ))
 
         # Check if service is already running
-        status = local_llm_service.get_server_status()
+        status = local_llm_service.get_server_status(refresh=True)
         if status.is_running:
             return jsonify(
                 APIResponse.error(
@@ -566,17 +581,17 @@ def start_llama_server():
                 )
             )
 
-        # Build parameters
-        args = [server_path, "-m", gguf_path, "--port", "8080"]
+        # Launch profile: LLAMA_* configuration, overridden by request parameters
+        try:
+            profile = LlamaLaunchProfile.from_config(Config.from_env()).with_overrides(
+                {key: data.get(key) for key in LLAMA_PROFILE_KEYS}
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify(APIResponse.error(message=f"Invalid launch parameter: {str(e)}", code=400))
 
         # Use thread to start service asynchronously
         def start_server():
-            script_executor.execute(
-                script_path=server_path,
-                script_type="llama_server",
-                args=args[1:],  # Remove first parameter (executable file path)
-                shell=False,
-            )
+            local_llm_service.start_server(gguf_path, server_path=server_path, profile=profile)
 
         # Start new thread to run service
         from threading import Thread
@@ -591,6 +606,7 @@ def start_llama_server():
                 data={
                     "model_name": model_name,
                     "gguf_path": gguf_path,
+                    "profile": asdict(profile),
                     "status": "starting"
                 },
                 message="llama-server service is starting"
@@ -22,13 +22,14 @@ from lpm_kernel.api.domains.kernel2.services.advanced_prompt_strategies import (
     SolutionFormatterStrategy,
 )
 from lpm_kernel.api.domains.kernel2.services.prompt_builder import BasePromptStrategy
+from lpm_kernel.api.domains.kernel2.services.retrieval_context import RetrievalContext
 
 logger = logging.getLogger(__name__)
 
 class AdvancedChatService:
     """Service for handling advanced chat mode"""
 
-    def enhance_requirement(self, request: AdvancedChatRequest) -> str:
+    def enhance_requirement(self, request: AdvancedChatRequest, context: Optional[RetrievalContext] = None) -> str:
         """Enhance the requirement with knowledge context"""
         logger.info("Starting requirement enhancement phase...")
         
@@ -48,14 +49,15 @@ class AdvancedChatService:
             request=chat_request,
             strategy_chain=[BasePromptStrategy, RequirementEnhancementStrategy],
             stream=False,
-            json_response=False
+            json_response=False,
+            context=context
         )
         
         enhanced_requirement = response.choices[0].message.content
         logger.info(f"Requirement enhancement completed. Result: {enhanced_requirement[:100]}...")
         return enhanced_requirement
 
-    def generate_solution(self, requirement: str, temperature: float) -> str:
+    def generate_solution(self, requirement: str, temperature: float, context: Optional[RetrievalContext] = None) -> str:
         """Generate solution based on enhanced requirement"""
         logger.info("Starting solution generation phase with expert model...")
         logger.info(f"Input requirement: {requirement[:100]}...")
@@ -72,14 +74,15 @@ class AdvancedChatService:
             strategy_chain=[BasePromptStrategy, ExpertSolutionStrategy],
             stream=False,
             json_response=False,
-            client=expert_llm_service.client  # Use expert model
+            client=expert_llm_service.client,  # Use expert model
+            context=context
         )
         
         solution = response.choices[0].message.content
         logger.info(f"Solution generation completed. Result: {solution[:100]}...")
         return solution
 
-    def validate_solution(self, requirement: str, solution: str) -> ValidationResult:
+    def validate_solution(self, requirement: str, solution: str, context: Optional[RetrievalContext] = None) -> ValidationResult:
         """Validate if solution meets requirements"""
         logger.info("Starting solution validation phase...")
         logger.info(f"Validating solution of length {len(solution)} characters...")
@@ -101,7 +104,8 @@ class AdvancedChatService:
             request=chat_request,
             strategy_chain=[BasePromptStrategy, SolutionValidatorStrategy],
             stream=False,
-            json_response=False
+            json_response=False,
+            context=context
         )
         
         validation_text = response.choices[0].message.content
@@ -115,7 +119,7 @@ class AdvancedChatService:
             logger.error(f"Raw validation text: {validation_text}")
             return ValidationResult(is_valid=False, feedback="Failed to validate solution")
 
-    def format_solution(self, solution: str) -> str:
+    def format_solution(self, solution: str, context: Optional[RetrievalContext] = None) -> str:
         """Format the final solution"""
         logger.info("Starting solution formatting phase...")
         logger.info(f"Formatting solution of length {len(solution)} characters...")
@@ -131,7 +135,8 @@ class AdvancedChatService:
             request=chat_request,
             strategy_chain=[BasePromptStrategy, SolutionFormatterStrategy],
             stream=False,
-            json_response=False
+            json_response=False,
+            context=context
         )
         
         formatted_solution = response.choices[0].message.content
@@ -139,7 +144,7 @@ class AdvancedChatService:
         logger.info(f"First 100 characters of formatted solution: {formatted_solution[:100]}...")
         return formatted_solution
 
-    def format_final_response(self, solution: str, stream: bool = True) -> Union[Iterator[Dict[str, Any]], Dict[str, Any]]:
+    def format_final_response(self, solution: str, stream: bool = True, context: Optional[RetrievalContext] = None) -> Union[Iterator[Dict[str, Any]], Dict[str, Any]]:
         """Format and stream the final response using base model"""
         logger.info("Formatting final response with base model...")
         
@@ -165,20 +170,23 @@ class AdvancedChatService:
         return chat_service.chat(
             request=chat_request,
             stream=stream,
-            json_response=False
+            json_response=False,
+            context=context
         )
 
     def process_advanced_chat(self, request: AdvancedChatRequest) -> AdvancedChatResponse:
         """Process advanced chat request through all phases"""
         logger.info(f"Starting advanced chat processing with max_iterations={request.max_iterations}...")
+        # shared by all phases, so each distinct query is embedded and retrieved once
+        context = RetrievalContext()
         
         # 1. Enhance requirement
         logger.info("Phase 1: Requirement Enhancement")
-        enhanced_requirement = self.enhance_requirement(request)
+        enhanced_requirement = self.enhance_requirement(request, context)
         
         # 2. Generate initial solution
         logger.info("Phase 2: Initial Solution Generation")
-        current_solution = self.generate_solution(enhanced_requirement, request.temperature)
+        current_solution = self.generate_solution(enhanced_requirement, request.temperature, context)
         
         # 3. Validation and refinement loop
         logger.info("Phase 3: Validation and Refinement Loop")
@@ -189,27 +197,28 @@ class AdvancedChatService:
             logger.info(f"Starting iteration {iteration + 1}/{request.max_iterations}")
             
             # Validate current solution
-            validation_result = self.validate_solution(enhanced_requirement, current_solution)
+            validation_result = self.validate_solution(enhanced_requirement, current_solution, context)
             validation_history.append(validation_result)
             
             if validation_result.is_valid:
                 logger.info("Solution validated successfully")
                 # Format solution if valid
                 logger.info("Phase 4: Final Formatting")
-                final_format = self.format_solution(current_solution)
+                final_format = self.format_solution(current_solution, context)
                 break
             elif iteration < request.max_iterations - 1:
                 logger.info(f"Solution needs improvement. Feedback: {validation_result.feedback}")
                 # Generate improved solution based on feedback
                 current_solution = self.generate_solution(
                     f"{enhanced_requirement}\n\nPrevious attempt feedback: {validation_result.feedback}",
-                    request.temperature
+                    request.temperature,
+                    context
                 )
         
         # use base model to construct the final response
-        final_response = self.format_final_response(final_format or current_solution, stream=True)
+        final_response = self.format_final_response(final_format or current_solution, stream=True, context=context)
         
-        logger.info("Advanced chat processing completed")
+        logger.info(f"Advanced chat processing completed, query embeddings computed: {context.embedding_calls}")
         return AdvancedChatResponse(
             enhanced_requirement=enhanced_requirement,
             solution=current_solution,
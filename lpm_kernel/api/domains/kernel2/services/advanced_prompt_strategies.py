@@ -2,7 +2,7 @@
 Advanced prompt strategies for multi-phase chat processing
 """
 import logging
-from typing import Optional
+from typing import Any, Optional
 
 from lpm_kernel.api.domains.kernel2.dto.chat_dto import ChatRequest
 from lpm_kernel.api.domains.kernel2.services.prompt_builder import SystemPromptStrategy
@@ -18,7 +18,7 @@ class RequirementEnhancementStrategy(SystemPromptStrategy):
     def __init__(self, base_strategy: SystemPromptStrategy):
         self.base_strategy = base_strategy
 
-    def build_prompt(self, request: ChatRequest) -> str:
+    def build_prompt(self, request: ChatRequest, context: Optional[Any] = None) -> str:
         prompt = """
         You are a requirement analyst. Your task is to enhance and complete the given rough requirement.
         Consider the following:
@@ -32,19 +32,19 @@ class RequirementEnhancementStrategy(SystemPromptStrategy):
         knowledge_sections = []
         
         if request.enable_l0_retrieval:
-            l0_knowledge = default_retriever.retrieve(request.message)
+            l0_knowledge = default_retriever.retrieve(request.message, context)
             if l0_knowledge:
                 knowledge_sections.append(f"Reference knowledge:\n{l0_knowledge}")
                 
         if request.enable_l1_retrieval:
-            l1_knowledge = default_l1_retriever.retrieve(request.message)
+            l1_knowledge = default_l1_retriever.retrieve(request.message, context)
             if l1_knowledge:
                 knowledge_sections.append(f"Reference shades:\n{l1_knowledge}")
                 
         if knowledge_sections:
             prompt += "\n\nKnowledge context:\n" + "\n\n".join(knowledge_sections)
             
-        base_prompt = self.base_strategy.build_prompt(request)
+        base_prompt = self.base_strategy.build_prompt(request, context)
         if base_prompt:
             prompt = f"{base_prompt}\n\n{prompt}"
             
@@ -57,14 +57,14 @@ class ExpertSolutionStrategy(SystemPromptStrategy):
     def __init__(self, base_strategy: SystemPromptStrategy):
         self.base_strategy = base_strategy
 
-    def build_prompt(self, request: ChatRequest) -> str:
+    def build_prompt(self, request: ChatRequest, context: Optional[Any] = None) -> str:
         prompt = """
         You are an expert system designed to generate solutions based on specific requirements.
         Generate a detailed solution that meets all aspects of the requirement.
         Be specific and include implementation details where necessary.
         """
         
-        base_prompt = self.base_strategy.build_prompt(request)
+        base_prompt = self.base_strategy.build_prompt(request, context)
         if base_prompt:
             prompt = f"{base_prompt}\n\n{prompt}"
             
@@ -77,7 +77,7 @@ class SolutionValidatorStrategy(SystemPromptStrategy):
     def __init__(self, base_strategy: SystemPromptStrategy):
         self.base_strategy = base_strategy
 
-    def build_prompt(self, request: ChatRequest) -> str:
+    def build_prompt(self, request: ChatRequest, context: Optional[Any] = None) -> str:
         prompt = """
         You are a solution validator. Your task is to validate if the given solution meets all requirements.
         You must return a JSON response in the following format:
@@ -87,7 +87,7 @@ class SolutionValidatorStrategy(SystemPromptStrategy):
         }
         """
         
-        base_prompt = self.base_strategy.build_prompt(request)
+        base_prompt = self.base_strategy.build_prompt(request, context)
         if base_prompt:
             prompt = f"{base_prompt}\n\n{prompt}"
             
@@ -100,13 +100,13 @@ class SolutionFormatterStrategy(SystemPromptStrategy):
     def __init__(self, base_strategy: SystemPromptStrategy):
         self.base_strategy = base_strategy
 
-    def build_prompt(self, request: ChatRequest) -> str:
+    def build_prompt(self, request: ChatRequest, context: Optional[Any] = None) -> str:
         prompt = """
         You are a solution formatter. Your task is to format the given solution to be clear and well-structured.
         Improve readability while maintaining all technical details.
         """
         
-        base_prompt = self.base_strategy.build_prompt(request)
+        base_prompt = self.base_strategy.build_prompt(request, context)
         if base_prompt:
             prompt = f"{base_prompt}\n\n{prompt}"
             
@@ -1,8 +1,9 @@
 """
 Chat service for handling different types of chat interactions
 """
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any, Union, Iterator, Type
+from typing import Optional, List, Dict, Any, Union, Iterator, AsyncIterator, Type
 import uuid
 from typing import Tuple
 from datetime import datetime
@@ -271,30 +272,28 @@ class ChatService:
             logger.error(f"Error collecting stream response: {str(e)}", exc_info=True)
             return None
 
-    def chat(
+    def _build_api_params(
             self,
             request: ChatRequest,
             strategy_chain: Optional[List[Type[SystemPromptStrategy]]] = None,
             stream: bool = True,
             json_response: bool = False,
-            client: Optional[Any] = None,
             model_params: Optional[Dict[str, Any]] = None,
             context: Optional[Any] = None,
-        ) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        ) -> Dict[str, Any]:
         """
-        Main chat method supporting both streaming and non-streaming responses
+        Build messages and chat completion parameters for a request
         
         Args:
             request: Chat request containing message and other parameters
             strategy_chain: Optional list of strategy classes to use
-            stream: Whether to return a streaming response
+            stream: Whether to request a streaming response
             json_response: Whether to request JSON formatted response from LLM
-            client: Optional OpenAI client to use. If None, uses local_llm_service.client
             model_params: Optional model specific parameters to override defaults
             context: Optional context to pass to strategies
             
         Returns:
-            Either an iterator for streaming responses or a single response dictionary
+            Keyword arguments for chat.completions.create
         """
         logger.info(f"Chat request: {request}")
         # Build messages
@@ -307,12 +306,6 @@ class ChatService:
         for msg in messages:
             logger.info(f"Role: {msg['role']}, Content: {msg['content']}")
 
-        # Use provided client or default local_llm_service.client
-        current_client = client if client is not None else local_llm_service.client
-        
-        self.user_llm_config_service = UserLLMConfigService()
-        self.user_llm_config = self.user_llm_config_service.get_available_llm()
-        
         # Prepare API call parameters
         api_params = {
             "messages": messages,
@@ -338,6 +331,42 @@ class ChatService:
         # Update custom model parameters (if provided)
         if model_params:
             api_params.update(model_params)
+        return api_params
+
+    def chat(
+            self,
+            request: ChatRequest,
+            strategy_chain: Optional[List[Type[SystemPromptStrategy]]] = None,
+            stream: bool = True,
+            json_response: bool = False,
+            client: Optional[Any] = None,
+            model_params: Optional[Dict[str, Any]] = None,
+            context: Optional[Any] = None,
+        ) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Main chat method supporting both streaming and non-streaming responses
+        
+        Args:
+            request: Chat request containing message and other parameters
+            strategy_chain: Optional list of strategy classes to use
+            stream: Whether to return a streaming response
+            json_response: Whether to request JSON formatted response from LLM
+            client: Optional OpenAI client to use. If None, uses local_llm_service.client
+            model_params: Optional model specific parameters to override defaults
+            context: Optional context to pass to strategies
+            
+        Returns:
+            Either an iterator for streaming responses or a single response dictionary
+        """
+        api_params = self._build_api_params(
+            request, strategy_chain, stream, json_response, model_params, context
+        )
+
+        # Use provided client or default local_llm_service.client
+        current_client = client if client is not None else local_llm_service.client
+        
+        self.user_llm_config_service = UserLLMConfigService()
+        self.user_llm_config = self.user_llm_config_service.get_available_llm()
 
         logger.info(f"Current client base URL: {current_client.base_url}")
         # logger.info(f"Using model parameters: {api_params}")
@@ -353,6 +382,38 @@ class ChatService:
             logger.error(f"Chat failed: {str(e)}", exc_info=True)
             raise
 
+    async def achat(
+            self,
+            request: ChatRequest,
+            strategy_chain: Optional[List[Type[SystemPromptStrategy]]] = None,
+            model_params: Optional[Dict[str, Any]] = None,
+            context: Optional[Any] = None,
+        ) -> AsyncIterator[Any]:
+        """
+        Streaming chat for the async serving mode
+        
+        Prompt building (retrieval, database reads) runs in a worker thread, the
+        generation is streamed with the async client so no thread is held while
+        tokens arrive.
+        
+        Args:
+            request: Chat request containing message and other parameters
+            strategy_chain: Optional list of strategy classes to use
+            model_params: Optional model specific parameters to override defaults
+            context: Optional context to pass to strategies
+            
+        Returns:
+            Async iterator of OpenAI chat completion chunks
+        """
+        api_params = await asyncio.to_thread(
+            self._build_api_params, request, strategy_chain, True, False, model_params, context
+        )
+        try:
+            return await local_llm_service.async_client.chat.completions.create(**api_params)
+        except Exception as e:
+            logger.error(f"Chat failed: {str(e)}", exc_info=True)
+            raise
+
 
 # Global chat service instance
 chat_service = ChatService()
@@ -1,16 +1,80 @@
 """
 service about knowledge retrive
 """
+import json
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Tuple, Dict, Any, Optional
+from lpm_kernel.api.domains.kernel2.services.reranker import MMRReranker, get_reranker
+from lpm_kernel.api.domains.kernel2.services.retrieval_context import RetrievalContext, TTLCache
+from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data import corpus_version
+from lpm_kernel.file_data.embedding_cache import text_hash
 from lpm_kernel.file_data.embedding_service import EmbeddingService, ChunkDTO
-from lpm_kernel.kernel.l1.l1_manager import get_latest_global_bio
+from lpm_kernel.file_data.lexical_index import chunk_lexical_index, reciprocal_rank_fusion
+from lpm_kernel.kernel.l1.shade_index import shade_embedding_index
 
 logger = logging.getLogger(__name__)
 
 
+
+class _BoundedExecutor:
+    """Thread pool that refuses work once max_workers + max_pending tasks are queued
+
+    Callers that give up on a task cancel it, so tasks nobody waits for anymore
+    do not pile up in front of new ones.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, thread_name_prefix: str):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def submit(self, fn, *args) -> Optional[Future]:
+        """Submit fn(*args), None when the executor is saturated"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+_config = Config.from_env()
+# vector searches and reranks of L0 retrieval, so they can be abandoned on timeout
+_vector_executor = _BoundedExecutor(
+    max_workers=4,
+    max_pending=int(_config.get("L0_VECTOR_MAX_PENDING", "8")),
+    thread_name_prefix="l0-vector",
+)
+_rerank_executor = _BoundedExecutor(
+    max_workers=2,
+    max_pending=int(_config.get("RERANK_MAX_PENDING", "2")),
+    thread_name_prefix="l0-rerank",
+)
+# (query hash, corpus version, reranker, mode, max_chunks) -> reranked chunks
+rerank_cache = TTLCache(
+    max_size=int(_config.get("RERANK_CACHE_SIZE", "1024")),
+    ttl=float(_config.get("RERANK_CACHE_TTL", "3600")),
+)
+
+
 class L0KnowledgeRetriever:
-    """L0 knowledge retriever"""
+    """L0 knowledge retriever
+
+    L0_RETRIEVAL_MODE selects how chunks are found:
+        vector: embedding similarity above similarity_threshold
+        lexical: BM25 over chunk content, no embedding call
+        hybrid: both, fused by reciprocal rank; falls back to the lexical hits when
+            the vector search fails or misses L0_VECTOR_TIMEOUT_MS
+
+    With L0_RERANKER set, L0_CANDIDATES candidates are fetched and reranked down
+    to max_chunks within the role's latency budget. Reranked results are cached
+    per (query, corpus version).
+    """
 
     def __init__(
         self,
@@ -30,38 +94,174 @@ class L0KnowledgeRetriever:
         self.similarity_threshold = similarity_threshold
         self.max_chunks = max_chunks
 
-    def retrieve(self, query: str) -> str:
+        config = Config.from_env()
+        self.mode = config.get("L0_RETRIEVAL_MODE", "hybrid").lower()
+        self.lexical_min_score = float(config.get("L0_LEXICAL_MIN_SCORE", "3.0"))
+        self.vector_timeout = int(config.get("L0_VECTOR_TIMEOUT_MS", "1500")) / 1000
+        self.rrf_k = int(config.get("L0_RRF_K", "60"))
+        # candidates per source that take part in the fusion and the rerank
+        self.candidates = max(int(config.get("L0_CANDIDATES", "20")), max_chunks)
+        self.reranker = get_reranker(config.get("L0_RERANKER", "none"))
+        self.rerank_budget = int(config.get("RERANK_BUDGET_MS", "200")) / 1000
+        # role uuid -> rerank budget in ms, e.g. {"role_ab12cd": 500}
+        self.role_rerank_budgets = {
+            role_id: int(budget) / 1000
+            for role_id, budget in json.loads(config.get("RERANK_ROLE_BUDGETS_MS", "{}") or "{}").items()
+        }
+
+    def _vector_search(
+        self, query: str, retrieval_context: RetrievalContext, limit: int
+    ) -> List[Tuple[ChunkDTO, float]]:
+        def search():
+            query_embedding = retrieval_context.get_query_embedding(
+                query, self.embedding_service.embedding_cache.get_embedding
+            )
+            return self.embedding_service.search_similar_chunks(
+                query=query, limit=limit, query_embedding=query_embedding
+            )
+
+        return retrieval_context.get_results("l0", query, (limit,), search)
+
+    def _candidates(
+        self, query: str, retrieval_context: RetrievalContext
+    ) -> Tuple[List[ChunkDTO], bool]:
+        """Ranked candidates and whether every enabled source answered"""
+        lexical_hits = []
+        if self.mode in ("lexical", "hybrid"):
+            lexical_hits = [
+                (chunk, score)
+                for chunk, score in chunk_lexical_index.search(query, limit=self.candidates)
+                if score >= self.lexical_min_score
+            ]
+            if self.mode == "lexical":
+                return [chunk for chunk, _ in lexical_hits], chunk_lexical_index.ready
+
+        complete = True
+        if self.mode == "vector":
+            limit = self.candidates if self.reranker is not None else self.max_chunks
+            vector_hits = self._vector_search(query, retrieval_context, limit)
+        else:
+            # a slow or failing embedding service must not hold back the lexical hits
+            future = _vector_executor.submit(
+                self._vector_search, query, retrieval_context, self.candidates
+            )
+            try:
+                if future is None:
+                    raise RuntimeError("too many pending vector searches")
+                vector_hits = future.result(timeout=self.vector_timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("L0 vector search timed out, using lexical hits only")
+                vector_hits, complete = [], False
+            except Exception as e:
+                logger.warning(f"L0 vector search failed, using lexical hits only: {str(e)}")
+                vector_hits, complete = [], False
+
+        # filter out low similarity chunks
+        vector_hits = [
+            (chunk, similarity)
+            for chunk, similarity in vector_hits
+            if similarity >= self.similarity_threshold
+        ]
+        if self.mode == "vector":
+            return [chunk for chunk, _ in vector_hits], complete
+
+        fused = reciprocal_rank_fusion(
+            [
+                [chunk.id for chunk, _ in vector_hits],
+                [chunk.id for chunk, _ in lexical_hits],
+            ],
+            k=self.rrf_k,
+        )
+        chunks = {chunk.id: chunk for chunk, _ in lexical_hits + vector_hits}
+        ranked = sorted(fused, key=fused.get, reverse=True)
+        return [chunks[chunk_id] for chunk_id in ranked], complete and chunk_lexical_index.ready
+
+    def _rerank(
+        self, query: str, candidates: List[ChunkDTO], retrieval_context: RetrievalContext
+    ) -> Tuple[List[ChunkDTO], bool]:
+        """Rerank within the role's budget, keeping retrieval order if it runs out"""
+        budget = self.role_rerank_budgets.get(retrieval_context.role_id, self.rerank_budget)
+        if budget <= 0 or not candidates:
+            return candidates[: self.max_chunks], False
+
+        def run():
+            query_embedding = None
+            if isinstance(self.reranker, MMRReranker):
+                query_embedding = retrieval_context.get_query_embedding(
+                    query, self.embedding_service.embedding_cache.get_embedding
+                )
+            return self.reranker.rerank(query, candidates, self.max_chunks, query_embedding)
+
+        future = _rerank_executor.submit(run)
+        if future is None:
+            logger.warning("L0 reranker is saturated, using retrieval order")
+            return candidates[: self.max_chunks], False
+        try:
+            return future.result(timeout=budget), True
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"L0 rerank exceeded {budget * 1000:.0f}ms, using retrieval order")
+        except Exception as e:
+            logger.warning(f"L0 rerank failed, using retrieval order: {str(e)}")
+        return candidates[: self.max_chunks], False
+
+    def retrieve_chunks(
+        self, query: str, retrieval_context: Optional[RetrievalContext] = None
+    ) -> List[ChunkDTO]:
+        """
+        retrieve the most relevant L0 chunks
+
+        Args:
+            query: query content
+            retrieval_context: request-scoped context sharing the query embedding and results
+
+        Returns:
+            List[ChunkDTO]: at most max_chunks chunks, most relevant first
+        """
+        if not isinstance(retrieval_context, RetrievalContext):
+            retrieval_context = RetrievalContext()
+
+        if self.reranker is None:
+            candidates, _ = self._candidates(query, retrieval_context)
+            return candidates[: self.max_chunks]
+
+        cache_key = (
+            text_hash(query),
+            corpus_version.current(),
+            self.reranker.name,
+            self.mode,
+            self.max_chunks,
+        )
+        cached = rerank_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        candidates, complete = self._candidates(query, retrieval_context)
+        chunks, reranked = self._rerank(query, candidates, retrieval_context)
+        # degraded answers (a source or the reranker missed its budget) are not cached
+        if complete and reranked:
+            rerank_cache.put(cache_key, chunks)
+        return chunks
+
+    def retrieve(self, query: str, retrieval_context: Optional[RetrievalContext] = None) -> str:
         """
         retrieve L0 knowledge
 
         Args:
             query: query content
+            retrieval_context: request-scoped context sharing the query embedding and results
 
         Returns:
             str: structured knowledge content, or empty string if no relevant knowledge found
         """
         try:
-            # search related chunks
-            similar_chunks: List[
-                Tuple[ChunkDTO, float]
-            ] = self.embedding_service.search_similar_chunks(
-                query=query, limit=self.max_chunks
-            )
-
-            # filter out low similarity chunks
-            if not similar_chunks:
-                return ""
-
-            knowledge_parts = []
-            for chunk, similarity in similar_chunks:
-                if similarity >= self.similarity_threshold:
-                    knowledge_parts.append(chunk.content)
-
-            if not knowledge_parts:
+            chunks = self.retrieve_chunks(query, retrieval_context)
+            if not chunks:
                 return ""
 
             # merge multiple knowledge parts into one
-            return "\n\n".join(knowledge_parts)
+            return "\n\n".join(chunk.content for chunk in chunks)
 
         except Exception as e:
             logger.error(f"L0 knowledge retrieval failed: {str(e)}")
@@ -89,55 +289,44 @@ class L1KnowledgeRetriever:
         self.similarity_threshold = similarity_threshold
         self.max_shades = max_shades
 
-    def retrieve(self, query: str) -> str:
+    def retrieve(self, query: str, retrieval_context: Optional[RetrievalContext] = None) -> str:
         """
         search related L1 shades
 
         Args:
             query: query content
+            retrieval_context: request-scoped context sharing the query embedding and results
 
         Returns:
             str: structured knowledge content, or empty string if no relevant knowledge found
         """
         try:
-            # get global bio shades
-            global_bio = get_latest_global_bio()
-            if not global_bio or not global_bio.shades:
-                logger.info("Global Bio not found or Shades is empty")
+            # make sure the shade index matches the latest L1 version
+            if not shade_embedding_index.ensure_latest():
+                logger.info("No L1 version found")
                 return ""
 
-            # get query embedding
-            query_embedding = self.embedding_service.get_embedding(query)
-            if not query_embedding:
-                logger.error("Failed to get embedding for query text")
-                return ""
+            if not isinstance(retrieval_context, RetrievalContext):
+                retrieval_context = RetrievalContext()
 
-            # get all shades' embeddings
-            shade_embeddings = []
-            for shade in global_bio.shades:
-                shade_text = (
-                    f"{shade.get('title', '')} - {shade.get('description', '')}"
+            def search():
+                # same embedding function as L0, so both share one query embedding
+                query_embedding = retrieval_context.get_query_embedding(
+                    query, self.embedding_service.embedding_cache.get_embedding
                 )
-                embedding = self.embedding_service.get_embedding(shade_text)
-                if embedding:
-                    shade_embeddings.append((shade, embedding))
-
-            if not shade_embeddings:
-                logger.info("No available Shades embeddings found")
-                return ""
-
-            # calculate similarity and sort
-            similar_shades = []
-            for shade, embedding in shade_embeddings:
-                similarity = self.embedding_service.calculate_similarity(
-                    query_embedding, embedding
+                # score all shades at once and keep the most similar ones
+                return shade_embedding_index.search(
+                    query_embedding,
+                    similarity_threshold=self.similarity_threshold,
+                    limit=self.max_shades,
                 )
-                if similarity >= self.similarity_threshold:
-                    similar_shades.append((shade, similarity))
 
-            # sort according to similarity and limit the number of returned shades
-            similar_shades.sort(key=lambda x: x[1], reverse=True)
-            similar_shades = similar_shades[: self.max_shades]
+            similar_shades = retrieval_context.get_results(
+                "l1",
+                query,
+                (shade_embedding_index.version, self.similarity_threshold, self.max_shades),
+                search,
+            )
 
             if not similar_shades:
                 return ""
@@ -145,8 +334,8 @@ class L1KnowledgeRetriever:
             # structured output
             shade_parts = []
             for shade, similarity in similar_shades:
-                shade_text = f"Shade: {shade.get('title', '')}\n"
-                shade_text += f"Description: {shade.get('description', '')}\n"
+                shade_text = f"Shade: {shade.get('name', '')}\n"
+                shade_text += f"Description: {shade.get('desc_third_view', '')}\n"
                 shade_text += f"Similarity: {similarity:.2f}"
                 shade_parts.append(shade_text)
 
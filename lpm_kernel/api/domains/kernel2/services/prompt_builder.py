@@ -1,20 +1,43 @@
 """
 System prompt builder and related strategies
 """
-from typing import Optional, Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Any, Callable, Dict, Tuple
 import logging
+import time
 
 from lpm_kernel.api.domains.kernel2.dto.chat_dto import ChatRequest
 from lpm_kernel.api.domains.kernel2.services.role_service import role_service
+from lpm_kernel.api.domains.kernel2.services.retrieval_context import RetrievalContext
 from lpm_kernel.api.domains.kernel2.services.knowledge_service import (
     default_retriever,
     default_l1_retriever,
 )
 from lpm_kernel.L2.training_prompt import CONTEXT_PROMPT, MEMORY_PROMPT, JUDGE_PROMPT
+from lpm_kernel.configs.config import Config
 
 
 logger = logging.getLogger(__name__)
 
+_config = Config.from_env()
+# shared pool for knowledge retrieval fan-out, a source that misses its budget
+# keeps its worker until it returns but no longer delays the prompt
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=int(_config.get("RETRIEVAL_MAX_WORKERS", "8")),
+    thread_name_prefix="retrieval",
+)
+RETRIEVAL_BUDGETS = {
+    "l0": float(_config.get("RETRIEVAL_L0_BUDGET_MS", "2000")) / 1000,
+    "l1": float(_config.get("RETRIEVAL_L1_BUDGET_MS", "2000")) / 1000,
+}
+
+
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    """Run func and return its result with the elapsed milliseconds"""
+    start = time.monotonic()
+    result = func(*args)
+    return result, (time.monotonic() - start) * 1000
+
 
 class SystemPromptStrategy:
     """Base class for system prompt building strategies"""
@@ -85,41 +108,71 @@ class KnowledgeEnhancedStrategy(SystemPromptStrategy):
         return ''
 
     def build_prompt(self, request: ChatRequest, context: Optional[Any] = None) -> str:
-        """Build knowledge-enhanced system prompt"""
-        base_prompt = self.base_strategy.build_prompt(request, context)
-        
-        logger.info(f"KnowledgeEnhancedStrategy request: {request}")
-        logger.info(f"KnowledgeEnhancedStrategy (from base): {base_prompt}")
-        
-        # Add knowledge retrieval results if enabled
-        knowledge_sections = []
+        """
+        Build knowledge-enhanced system prompt
         
+        L0 and L1 retrieval run concurrently with each other and with the base prompt. Each retrieval source
+        has a latency budget (RETRIEVAL_L0_BUDGET_MS / RETRIEVAL_L1_BUDGET_MS) counted
+        from the start of the build; a source that misses it is left out of the prompt.
+        Per-source timings are logged and kept in self.retrieval_timings. Both sources share
+        one query embedding through the RetrievalContext passed as context, or a fresh one.
+        """
+        start = time.monotonic()
         user_message = self.get_user_message(request)
-        
+        retrieval_context = (
+            context if isinstance(context, RetrievalContext) else RetrievalContext(role_id=request.role_id)
+        )
+        self.retrieval_timings: Dict[str, str] = {}
+
         # if role exists, role config has priority
+        sources = []  # (name, retriever, title)
         if request.role_id:
-            role = role_service.get_role_by_uuid(request.role_id)
+            role, elapsed = _timed(role_service.get_role_by_uuid, request.role_id)
+            self.retrieval_timings["role"] = f"{elapsed:.0f}ms"
             if role:
                 if role.enable_l0_retrieval:
-                    l0_knowledge = default_retriever.retrieve(user_message)
-                    if l0_knowledge:
-                        knowledge_sections.append(f"Role knowledge:\n{l0_knowledge}")
+                    sources.append(("l0", default_retriever, "Role knowledge"))
                 if role.enable_l1_retrieval:
-                    l1_knowledge = default_l1_retriever.retrieve(user_message)
-                    if l1_knowledge:
-                        knowledge_sections.append(f"Reference shades:\n{l1_knowledge}")
+                    sources.append(("l1", default_l1_retriever, "Reference shades"))
         else:
-            # Retrieve L0 knowledge if enabled
             if request.enable_l0_retrieval:
-                l0_knowledge = default_retriever.retrieve(user_message)
-                if l0_knowledge:
-                    knowledge_sections.append(f"Reference knowledge:\n{l0_knowledge}")
-            
-            # Retrieve L1 knowledge if enabled
+                sources.append(("l0", default_retriever, "Reference knowledge"))
             if request.enable_l1_retrieval:
-                l1_knowledge = default_l1_retriever.retrieve(user_message)
-                if l1_knowledge:
-                    knowledge_sections.append(f"Reference shades:\n{l1_knowledge}")
+                sources.append(("l1", default_l1_retriever, "Reference shades"))
+
+        futures = [
+            (name, title, _retrieval_executor.submit(
+                _timed, retriever.retrieve, user_message, retrieval_context
+            ))
+            for name, retriever, title in sources
+        ]
+
+        # base prompt is built on this thread while retrieval runs
+        base_prompt, elapsed = _timed(self.base_strategy.build_prompt, request, context)
+        self.retrieval_timings["base"] = f"{elapsed:.0f}ms"
+
+        # Add knowledge retrieval results if enabled
+        knowledge_sections = []
+        for name, title, future in futures:
+            remaining = RETRIEVAL_BUDGETS[name] - (time.monotonic() - start)
+            try:
+                knowledge, elapsed = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                self.retrieval_timings[name] = f"dropped (>{RETRIEVAL_BUDGETS[name] * 1000:.0f}ms)"
+                continue
+            except Exception as e:
+                logger.error(f"{name.upper()} knowledge retrieval failed: {str(e)}")
+                self.retrieval_timings[name] = "failed"
+                continue
+            self.retrieval_timings[name] = f"{elapsed:.0f}ms"
+            if knowledge:
+                knowledge_sections.append(f"{title}:\n{knowledge}")
+
+        self.retrieval_timings["total"] = f"{(time.monotonic() - start) * 1000:.0f}ms"
+        logger.info(f"KnowledgeEnhancedStrategy timings: {self.retrieval_timings}")
+
+        logger.info(f"KnowledgeEnhancedStrategy request: {request}")
+        logger.info(f"KnowledgeEnhancedStrategy (from base): {base_prompt}")
             
         if knowledge_sections:
             if len(base_prompt) == 0:
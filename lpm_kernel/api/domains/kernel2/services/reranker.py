@@ -0,0 +1,183 @@
+"""
+Rerankers for L0 retrieval candidates
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data.dto.chunk_dto import ChunkDTO
+from lpm_kernel.file_data.embedding_cache import EmbeddingCache
+from lpm_kernel.file_data.lexical_index import chunk_lexical_index, reciprocal_rank_fusion, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class BaseReranker(ABC):
+    """Reorders retrieval candidates, most relevant first"""
+
+    name = "base"
+
+    @abstractmethod
+    def rerank(
+        self, query: str, chunks: List[ChunkDTO], limit: int, query_embedding=None
+    ) -> List[ChunkDTO]:
+        """
+        Pick the best chunks among the candidates
+
+        Args:
+            query: query text
+            chunks: candidates in retrieval order
+            limit: number of chunks to keep
+            query_embedding: embedding of the query, if already computed
+
+        Returns:
+            List[ChunkDTO]: at most limit chunks, best first
+        """
+
+
+class LexicalOverlapReranker(BaseReranker):
+    """Ranks by IDF-weighted query term overlap, fused with the retrieval order
+
+    Terms are weighted by their BM25 IDF in the chunk lexical index, so sharing
+    only common words ("the", "what", "is") counts for little, and the overlap
+    rank is fused with the retrieval rank so a strong vector hit without shared
+    terms is not pushed out by overlap alone.
+    """
+
+    name = "lexical"
+
+    def __init__(self, rrf_k: int = 60):
+        self.rrf_k = rrf_k
+
+    def rerank(self, query, chunks, limit, query_embedding=None):
+        weights = chunk_lexical_index.idf(tokenize(query))
+        total = sum(weights.values())
+        if not total:
+            return chunks[:limit]
+        scores = []
+        for chunk in chunks:
+            terms = set(tokenize(chunk.content or ""))
+            scores.append(sum(weight for term, weight in weights.items() if term in terms) / total)
+        overlap_order = sorted(range(len(chunks)), key=lambda i: -scores[i])
+        fused = reciprocal_rank_fusion([list(range(len(chunks))), overlap_order], k=self.rrf_k)
+        order = sorted(range(len(chunks)), key=lambda i: -fused[i])
+        return [chunks[i] for i in order[:limit]]
+
+
+class MMRReranker(BaseReranker):
+    """Maximal marginal relevance: relevant to the query, but not redundant with each other
+
+    Chunk vectors come from the embedding cache, where they were stored when the
+    chunks were embedded, so reranking does not call the embedding service.
+    """
+
+    name = "mmr"
+
+    def __init__(self, embedding_cache: EmbeddingCache, diversity: float = 0.3):
+        self.embedding_cache = embedding_cache
+        self.diversity = diversity
+
+    def rerank(self, query, chunks, limit, query_embedding=None):
+        if len(chunks) <= 1:
+            return chunks[:limit]
+        if query_embedding is None:
+            query_embedding = self.embedding_cache.get_embedding([query])[0]
+        vectors = np.asarray(
+            self.embedding_cache.get_embedding([chunk.content for chunk in chunks]), dtype=np.float32
+        )
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+
+        relevance = vectors @ query_vector
+        similarity = vectors @ vectors.T
+        selected: List[int] = []
+        remaining = list(range(len(chunks)))
+        while remaining and len(selected) < limit:
+            if selected:
+                redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining))
+            scores = (1 - self.diversity) * relevance[remaining] - self.diversity * redundancy
+            best = remaining[int(np.argmax(scores))]
+            selected.append(best)
+            remaining.remove(best)
+        return [chunks[i] for i in selected]
+
+
+class CrossEncoderReranker(BaseReranker):
+    """Scores (query, chunk) pairs with a local cross-encoder on CPU
+
+    Needs the optional sentence-transformers package, the model is loaded on
+    first use.
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device="cpu")
+                logger.info(f"Loaded cross-encoder {self.model_name}")
+            return self._model
+
+    def rerank(self, query, chunks, limit, query_embedding=None):
+        if not chunks:
+            return []
+        scores = self._get_model().predict([(query, chunk.content) for chunk in chunks])
+        order = np.argsort(-np.asarray(scores), kind="stable")
+        return [chunks[i] for i in order[:limit]]
+
+
+_rerankers: Dict[str, BaseReranker] = {}
+_rerankers_lock = threading.Lock()
+
+
+def get_reranker(name: str) -> Optional[BaseReranker]:
+    """
+    Get the shared reranker instance for a name
+
+    Args:
+        name: "lexical", "mmr", "cross_encoder", or "none"
+
+    Returns:
+        Optional[BaseReranker]: the reranker, None for "none" or unknown names
+    """
+    name = (name or "none").lower()
+    with _rerankers_lock:
+        if name not in _rerankers:
+            config = Config.from_env()
+            if name == "lexical":
+                _rerankers[name] = LexicalOverlapReranker(rrf_k=int(config.get("L0_RRF_K", "60")))
+            elif name == "mmr":
+                _rerankers[name] = MMRReranker(
+                    EmbeddingCache(), diversity=float(config.get("RERANK_MMR_DIVERSITY", "0.3"))
+                )
+            elif name == "cross_encoder":
+                try:
+                    import sentence_transformers  # noqa: F401
+
+                    _rerankers[name] = CrossEncoderReranker(
+                        config.get("RERANK_CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+                    )
+                except ImportError:
+                    logger.warning(
+                        "sentence-transformers is not installed, using the lexical reranker instead"
+                    )
+                    _rerankers[name] = LexicalOverlapReranker(rrf_k=int(config.get("L0_RRF_K", "60")))
+            else:
+                if name != "none":
+                    logger.warning(f"Unknown reranker '{name}', reranking disabled")
+                return None
+        return _rerankers[name]
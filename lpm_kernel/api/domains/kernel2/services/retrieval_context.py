@@ -0,0 +1,139 @@
+"""
+Request-scoped retrieval context and short-lived retrieval cache
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data.embedding_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_config = Config.from_env()
+# query text -> embedding and retrieval key -> top-k results, shared by all requests
+retrieval_cache = TTLCache(
+    max_size=int(_config.get("RETRIEVAL_CACHE_SIZE", "256")),
+    ttl=float(_config.get("RETRIEVAL_CACHE_TTL", "60")),
+)
+
+
+class RetrievalContext:
+    """Retrieval state shared by the retrievers and phases of one chat request
+
+    The query embedding is computed once per distinct query text, even when L0 and
+    L1 retrieval ask for it concurrently, and retrieval results are reused by later
+    phases. Both fall back to the process wide TTL cache.
+    """
+
+    def __init__(self, role_id: Optional[str] = None):
+        """
+        Args:
+            role_id: uuid of the role the request is answered as, if any
+        """
+        self.role_id = role_id
+        self._lock = threading.Lock()
+        self._pending: dict = {}
+        self.embedding_calls = 0
+
+    def _get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Compute a value once per key, concurrent callers wait for the first one"""
+        value = retrieval_cache.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            value = retrieval_cache.get(key)
+            if value is not None:
+                return value
+            # the owner failed or the entry expired, compute on our own
+            return compute()
+
+        try:
+            value = compute()
+            if value is not None:
+                retrieval_cache.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+    def get_query_embedding(self, query: str, embed: Callable[[list], Any]):
+        """
+        Get the embedding of a query, embedding it at most once
+
+        Args:
+            query: query text
+            embed: function embedding a list of texts, used on a miss
+
+        Returns:
+            embedding vector of the query
+        """
+
+        def compute():
+            self.embedding_calls += 1
+            embeddings = embed([query])
+            if embeddings is None or len(embeddings) == 0:
+                raise Exception("Failed to generate embedding for query")
+            return embeddings[0]
+
+        return self._get_or_compute(("embedding", text_hash(query)), compute)
+
+    def get_results(self, source: str, query: str, params: tuple, compute: Callable[[], Any]):
+        """
+        Get retrieval results for a query, reusing them across phases
+
+        Args:
+            source: retrieval source name, e.g. "l0" or "l1"
+            query: query text
+            params: parameters that change the result (limit, threshold, version)
+            compute: function producing the results on a miss
+
+        Returns:
+            retrieval results
+        """
+        return self._get_or_compute((source, text_hash(query)) + tuple(params), compute)
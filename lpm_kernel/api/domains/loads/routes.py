@@ -120,7 +120,7 @@ def delete_load(load_name):
         # First, check and stop the llama-server if it's running
         try:
             # Check if server is running
-            status = local_llm_service.get_server_status()
+            status = local_llm_service.get_server_status(refresh=True)
             if status.is_running:
                 logger.info("llama-server is running, attempting to stop it")
                 stop_status = local_llm_service.stop_server()
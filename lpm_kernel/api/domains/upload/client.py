@@ -302,7 +302,15 @@ class RegistryClient:
             
             # Set send timeout
             async with asyncio.timeout(self.heartbeat_config.timeout):
-                await websocket.send(heartbeat_message)
+                if hasattr(websocket, 'outbox'):
+                    # go through the writer task so heartbeats never interleave with relay responses
+                    if websocket.writer_task.done():
+                        return False
+                    sent = asyncio.get_running_loop().create_future()
+                    await websocket.outbox.put((heartbeat_message, sent))
+                    await sent
+                else:
+                    await websocket.send(heartbeat_message)
                 # logger.info("Heartbeat message sent successfully")
                 return True
                 
@@ -314,7 +322,28 @@ class RegistryClient:
             return False
 
     async def handle_messages(self, websocket):
-        """Handle received WebSocket messages"""
+        """Handle received WebSocket messages
+
+        Each chat request is relayed by its own task so one slow generation does not
+        block other visitors. At most RELAY_MAX_CONCURRENT_CHATS requests stream at
+        once, up to RELAY_MAX_PENDING_CHATS more wait for a slot and further ones are
+        rejected. All outbound messages go through a single writer task.
+        """
+        config = Config.from_env()
+        max_concurrent = int(config.get("RELAY_MAX_CONCURRENT_CHATS", "4"))
+        max_pending = int(config.get("RELAY_MAX_PENDING_CHATS", "32"))
+
+        websocket.outbox = asyncio.Queue(maxsize=int(config.get("RELAY_SEND_QUEUE_SIZE", "256")))
+        websocket.chat_slots = asyncio.Semaphore(max_concurrent)
+        websocket.chat_tasks = {}
+        websocket.writer_task = asyncio.create_task(
+            self._send_loop(websocket), name=f"writer_{websocket.connection_key}"
+        )
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max_concurrent),
+            timeout=aiohttp.ClientTimeout(total=None),  # Disable timeout
+        )
+
         try:
             while True:
                 try:
@@ -327,89 +356,35 @@ class RegistryClient:
                     if message_type == "heartbeat_ack":
                         continue
                     elif message_type == "chat":
-                        # Handle chat request
-                        try:
-                            request_data = data.get("request", {})
-                            logger.info(f"[Request details: {json.dumps(request_data, ensure_ascii=False)}")
-                            
-                            # Call chat interface
-                            async with aiohttp.ClientSession() as session:
-                                logger.info(f"Preparing to send request to chat interface")
-                                config = Config.from_env()
-                                kernel2_url = f"{config.KERNEL2_SERVICE_URL}/api/kernel2/chat"
-                                async with session.post(
-                                    kernel2_url,
-                                    json=request_data,
-                                    headers={
-                                        "Content-Type": "application/json",
-                                        "Accept": "text/event-stream",  # Specify to accept SSE response
-                                        "Cache-Control": "no-cache",
-                                        "Connection": "keep-alive"
-                                    },
-                                    timeout=aiohttp.ClientTimeout(total=None),  # Disable timeout
-                                    chunked=True  # Enable chunked transfer
-                                ) as response:
-                                    # Check response status
-                                    logger.info(f"Response status code: {response.status}")
-                                    if response.status != 200:
-                                        error_text = await response.text()
-                                        logger.error(f"[request_id: {data.get('request_id')}] Failed to call chat interface: {error_text}")
-                                        await websocket.send(json.dumps({
-                                            "type": "chat_response",
-                                            "request_id": data.get("request_id"),
-                                            "error": f"Failed to call chat interface: {error_text}"
-                                        }))
-                                        continue
-
-                                    logger.debug(f"Starting to read streaming response")
-                                    message_count = 0
-                                    
-                                    # Direct forwarding of streaming response
-                                    async for line in response.content:
-                                        if line:
-                                            try:
-                                                # Convert bytes to string
-                                                decoded_line = line.decode('utf-8')
-
-                                                logger.debug(f"[request_id: {data.get('request_id')}] Received raw data: {decoded_line.strip()}")
-                                                
-                                                # Check if it's SSE format data
-                                                if decoded_line.startswith("data: "):
-                                                    message_count += 1
-                                                    data_content = decoded_line[6:].strip()
-                                                    # logger.info(f"[request_id: {data.get('request_id')}] Processing message {message_count}")
-                                                    
-                                                    # Check if it's a completion marker
-                                                    if data_content == "[DONE]":
-
-                                                        logger.info(f"[request_id: {data.get('request_id')}] Received completion marker, processed {message_count} messages in total")
-                                                        await websocket.send(json.dumps({
-                                                            "type": "chat_response",
-                                                            "request_id": data.get("request_id"),
-                                                            "done": True
-                                                        }))
-                                                        continue
-                                                    
-                                                    # Directly forward original SSE data
-                                                    await websocket.send(json.dumps({
-                                                        "type": "chat_response",
-                                                        "request_id": data.get("request_id"),
-                                                        "raw_sse": data_content,  # Contains original SSE data
-                                                        "done": False
-                                                    }))
-                                                    logger.debug(f"[requestId: {data.get('request_id')}] Forwarded SSE message #{message_count}")
-                                            except UnicodeDecodeError as e:
-                                                logger.error(f"[requestId: {data.get('request_id')}] Failed to decode response data: {str(e)}")
-                                            except Exception as e:
-                                                logger.error(f"[requestId: {data.get('request_id')}] Error processing response data: {str(e)}, type: {type(e).__name__}")
-
-                        except Exception as e:
-                            logger.error(f"Failed to process chat request: {str(e)}")
-                            await websocket.send(json.dumps({
+                        request_id = data.get("request_id")
+                        if len(websocket.chat_tasks) >= max_concurrent + max_pending:
+                            logger.warning(f"[request_id: {request_id}] Too many chat requests in flight, rejecting")
+                            await self._send(websocket, {
                                 "type": "chat_response",
-                                "request_id": data.get("request_id"),
-                                "error": f"Error processing chat request: {str(e)}"
-                            }))
+                                "request_id": request_id,
+                                "error": "Instance is busy, please try again later"
+                            })
+                            continue
+
+                        task = asyncio.create_task(
+                            self._relay_chat(websocket, session, data),
+                            name=f"chat_{request_id}"
+                        )
+                        websocket.chat_tasks[request_id] = task
+
+                        def forget_task(task, request_id=request_id):
+                            # a reused request_id may already belong to a newer task
+                            if websocket.chat_tasks.get(request_id) is task:
+                                del websocket.chat_tasks[request_id]
+
+                        task.add_done_callback(forget_task)
+                    elif message_type == "chat_cancel":
+                        # Remote side aborted the request
+                        request_id = data.get("request_id")
+                        task = websocket.chat_tasks.get(request_id)
+                        if task:
+                            logger.info(f"[request_id: {request_id}] Chat request cancelled by remote")
+                            task.cancel()
                     else:
                         logger.debug(f"Received unknown message type: {message}")
                 except websockets.exceptions.ConnectionClosed:
@@ -422,6 +397,134 @@ class RegistryClient:
         except Exception as e:
             logger.error(f"Message processing loop failed: {str(e)}")
             raise
+        finally:
+            tasks = list(websocket.chat_tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            websocket.writer_task.cancel()
+            await session.close()
+
+    async def _send(self, websocket, payload: Dict):
+        """Queue a message for the connection's writer task, waits when the queue is full"""
+        await websocket.outbox.put((json.dumps(payload), None))
+
+    async def _send_loop(self, websocket):
+        """Single writer: send queued messages one at a time
+
+        Queued items are (message, future); the future, if any, is resolved once
+        the message is sent, or failed with the send error.
+        """
+        try:
+            while True:
+                message, sent = await websocket.outbox.get()
+                try:
+                    await websocket.send(message)
+                    if sent is not None and not sent.done():
+                        sent.set_result(True)
+                except websockets.exceptions.ConnectionClosed as e:
+                    if sent is not None and not sent.done():
+                        sent.set_exception(e)
+                    logger.warning("WebSocket closed, stop sending queued messages")
+                    break
+                except Exception as e:
+                    if sent is not None and not sent.done():
+                        sent.set_exception(e)
+                    logger.error(f"Failed to send message: {str(e)}")
+        except asyncio.CancelledError:
+            pass
+
+    async def _relay_chat(self, websocket, session: aiohttp.ClientSession, data: Dict):
+        """Forward one chat request to the local chat interface and stream the answer back
+
+        Args:
+            websocket: WebSocket connection the request came from
+            session: Shared HTTP session for the chat interface
+            data: Chat message received from the registry
+        """
+        request_id = data.get("request_id")
+        try:
+            async with websocket.chat_slots:
+                request_data = data.get("request", {})
+                logger.info(f"[Request details: {json.dumps(request_data, ensure_ascii=False)}")
+
+                # Call chat interface
+                logger.info(f"Preparing to send request to chat interface")
+                config = Config.from_env()
+                kernel2_url = f"{config.KERNEL2_SERVICE_URL}/api/kernel2/chat"
+                async with session.post(
+                    kernel2_url,
+                    json=request_data,
+                    headers={
+                        "Content-Type": "application/json",
+                        "Accept": "text/event-stream",  # Specify to accept SSE response
+                        "Cache-Control": "no-cache",
+                        "Connection": "keep-alive"
+                    },
+                    chunked=True  # Enable chunked transfer
+                ) as response:
+                    # Check response status
+                    logger.info(f"Response status code: {response.status}")
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"[request_id: {request_id}] Failed to call chat interface: {error_text}")
+                        await self._send(websocket, {
+                            "type": "chat_response",
+                            "request_id": request_id,
+                            "error": f"Failed to call chat interface: {error_text}"
+                        })
+                        return
+
+                    logger.debug(f"Starting to read streaming response")
+                    message_count = 0
+
+                    # Direct forwarding of streaming response
+                    async for line in response.content:
+                        if not line:
+                            continue
+                        try:
+                            # Convert bytes to string
+                            decoded_line = line.decode('utf-8')
+                            logger.debug(f"[request_id: {request_id}] Received raw data: {decoded_line.strip()}")
+
+                            # Check if it's SSE format data
+                            if not decoded_line.startswith("data: "):
+                                continue
+                            message_count += 1
+                            data_content = decoded_line[6:].strip()
+
+                            # Check if it's a completion marker
+                            if data_content == "[DONE]":
+                                logger.info(f"[request_id: {request_id}] Received completion marker, processed {message_count} messages in total")
+                                await self._send(websocket, {
+                                    "type": "chat_response",
+                                    "request_id": request_id,
+                                    "done": True
+                                })
+                                continue
+
+                            # Directly forward original SSE data
+                            await self._send(websocket, {
+                                "type": "chat_response",
+                                "request_id": request_id,
+                                "raw_sse": data_content,  # Contains original SSE data
+                                "done": False
+                            })
+                            logger.debug(f"[requestId: {request_id}] Forwarded SSE message #{message_count}")
+                        except UnicodeDecodeError as e:
+                            logger.error(f"[requestId: {request_id}] Failed to decode response data: {str(e)}")
+
+        except asyncio.CancelledError:
+            # closing the response aborts generation on the chat interface
+            logger.info(f"[request_id: {request_id}] Chat relay cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to process chat request: {str(e)}")
+            await self._send(websocket, {
+                "type": "chat_response",
+                "request_id": request_id,
+                "error": f"Error processing chat request: {str(e)}"
+            })
 
     def list_uploads(self, page_no: int = 1, page_size: int = 10, status: Optional[List[str]] = None):
         """Get list of registered Upload instances with pagination and status filter
@@ -5,6 +5,7 @@ from typing import Dict, Any
 from lpm_kernel.api.dto.user_llm_config_dto import UpdateUserLLMConfigDTO
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.api.common.responses import APIResponse
+from lpm_kernel.common.llm import EmbeddingClient
 from lpm_kernel.common.logging import logger
 
 user_llm_config_bp = Blueprint("user_llm_config", __name__, url_prefix="/api/user-llm-configs")
@@ -101,6 +102,7 @@ def update_config():
         processed_data = process_openai_config(request_data)
         data = UpdateUserLLMConfigDTO(**processed_data)
         config = user_llm_config_service.update_config(1, data)  # Default configuration ID is 1
+        EmbeddingClient.get_instance().invalidate_llm_config()
         
         return jsonify(
             APIResponse.success(
@@ -122,6 +124,7 @@ def delete_key():
     try:
         # use default configuration ID (1)
         config = user_llm_config_service.delete_key()
+        EmbeddingClient.get_instance().invalidate_llm_config()
         if not config:
             return jsonify(
                 APIResponse.error("No LLM configuration found")
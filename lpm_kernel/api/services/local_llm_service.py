@@ -2,14 +2,20 @@ import os
 import json
 import logging
 import psutil
+import requests
+import threading
 import time
 import subprocess
-from typing import Iterator, Any, Optional, Generator, Dict
+from typing import AsyncIterator, Iterator, Any, Optional, Generator, Dict
 from datetime import datetime
 from flask import Response
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from lpm_kernel.api.domains.kernel2.dto.chat_dto import ChatRequest
-from lpm_kernel.api.domains.kernel2.dto.server_dto import ServerStatus, ProcessInfo
+from lpm_kernel.api.domains.kernel2.dto.server_dto import (
+    LlamaLaunchProfile,
+    ProcessInfo,
+    ServerStatus,
+)
 from lpm_kernel.configs.config import Config
 import uuid
 
@@ -20,7 +26,38 @@ class LocalLLMService:
     
     def __init__(self):
         self._client = None
+        self._async_client = None
         self._stopping_server = False
+
+        config = Config.from_env()
+        self._metrics_interval = float(config.get("LLAMA_METRICS_INTERVAL", "5"))
+        self._discovery_interval = float(config.get("LLAMA_DISCOVERY_INTERVAL", "10"))
+        self._health_timeout = float(config.get("LLAMA_HEALTH_TIMEOUT", "1"))
+        self._startup_timeout = float(config.get("LLAMA_STARTUP_TIMEOUT", "300"))
+        self._log_file = config.get("LLAMA_LOG_FILE") or os.path.join(
+            config.get("LOCAL_LOG_DIR", "logs"), "llama_server.log"
+        )
+        self._health_url = config.get("LLAMA_HEALTH_URL") or self._default_health_url(
+            config.get("LOCAL_LLM_SERVICE_URL")
+        )
+
+        # llama-server process tracked by this service and its cached status
+        self._status_lock = threading.Lock()
+        self._process: Optional[psutil.Process] = None
+        self._popen: Optional[subprocess.Popen] = None
+        self._status = ServerStatus.not_running()
+        self._last_discovery = 0.0
+        self._sampler: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _default_health_url(base_url: Optional[str]) -> Optional[str]:
+        """Derive llama-server's /health endpoint from the OpenAI compatible base URL"""
+        if not base_url:
+            return None
+        base_url = base_url.rstrip("/")
+        if base_url.endswith("/v1"):
+            base_url = base_url[: -len("/v1")]
+        return f"{base_url}/health"
         
     @property
     def client(self) -> OpenAI:
@@ -37,48 +74,90 @@ class LocalLLMService:
             )
         return self._client
 
-    def start_server(self, model_path: str) -> bool:
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Get the async OpenAI client for local LLM server, used by the async chat server"""
+        if self._async_client is None:
+            base_url = Config.from_env().get("LOCAL_LLM_SERVICE_URL")
+            if not base_url:
+                raise ValueError("LOCAL_LLM_SERVICE_URL environment variable is not set")
+
+            self._async_client = AsyncOpenAI(
+                base_url=base_url,
+                api_key="sk-no-key-required"
+            )
+        return self._async_client
+
+    def start_server(
+        self,
+        model_path: str,
+        server_path: str = "llama-server",
+        profile: Optional[LlamaLaunchProfile] = None,
+    ) -> bool:
         """
-        Start the llama-server service
+        Start the llama-server service and wait until it is ready
+        
+        Args:
+            model_path: Path of the GGUF model
+            server_path: llama-server executable
+            profile: Launch options, defaults to the LLAMA_* configuration
+        Returns:
+            bool: True once the health endpoint reports the model loaded
         """
         try:
             # Check if server is already running
-            status = self.get_server_status()
+            status = self.get_server_status(refresh=True)
             if status.is_running:
                 logger.info("LLama server is already running")
                 return True
 
-            # Start server
-            cmd = [
-                "llama-server",
-                "-m", model_path,
-                "--host", "0.0.0.0",
-                "--port", "8000"
-            ]
-            
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
+            profile = profile or LlamaLaunchProfile.from_config(Config.from_env())
+            cmd = [server_path, "-m", model_path] + profile.to_args()
+            logger.info(f"Starting llama-server: {' '.join(cmd)}")
+
+            # output goes straight to a log file, an unread PIPE would stall the server
+            os.makedirs(os.path.dirname(self._log_file) or ".", exist_ok=True)
+            with open(self._log_file, "a", encoding="utf-8") as log:
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=os.environ.copy(),
+                )
+            self.track_process(process.pid, popen=process)
+
+            health_url = f"http://{self._local_host(profile.host)}:{profile.port}/health"
+            deadline = time.monotonic() + self._startup_timeout
+            while time.monotonic() < deadline:
+                if process.poll() is not None:
+                    logger.error(
+                        f"llama-server exited with code {process.returncode}, see {self._log_file}"
+                    )
+                    self._untrack_process()
+                    return False
+                try:
+                    if requests.get(health_url, timeout=self._health_timeout).ok:
+                        logger.info(f"LLama server is ready, PID: {process.pid}")
+                        self.track_process(process.pid, popen=process)
+                        return True
+                except requests.RequestException:
+                    pass  # not listening yet
+                time.sleep(0.5)
+
+            logger.error(
+                f"llama-server not ready after {self._startup_timeout:.0f}s, see {self._log_file}"
             )
-            
-            # Wait for server to start
-            time.sleep(2)
-            
-            # Check if process started successfully
-            if process.poll() is None:
-                logger.info("LLama server started successfully")
-                return True
-            else:
-                stdout, stderr = process.communicate()
-                logger.error(f"Failed to start llama-server: {stderr}")
-                return False
+            return False
                 
         except Exception as e:
             logger.error(f"Error starting llama-server: {str(e)}")
             return False
 
+    @staticmethod
+    def _local_host(host: str) -> str:
+        """Address to reach a server bound to host from this machine"""
+        return "127.0.0.1" if host in ("0.0.0.0", "::", "") else host
+
     def stop_server(self) -> ServerStatus:
         """
         Stop the llama-server service.
@@ -132,9 +211,10 @@ class LocalLLMService:
                     logger.info(f"Terminated llama-server processes: {terminated_pids}")
                 else:
                     logger.info("No running llama-server process found")
+                self._untrack_process()
                 
                 # Check again if any llama-server processes are still running
-                return self.get_server_status()
+                return self.get_server_status(refresh=True)
             
             finally:
                 self._stopping_server = False
@@ -144,29 +224,141 @@ class LocalLLMService:
             self._stopping_server = False
             return ServerStatus.not_running()
 
-    def get_server_status(self) -> ServerStatus:
+    def track_process(self, pid: int, popen: Optional[subprocess.Popen] = None) -> None:
+        """
+        Track a llama-server process so its status can be served from cache
+        
+        Args:
+            pid: Process ID of llama-server
+            popen: Popen handle if the process was spawned by this service
+        """
+        try:
+            process = psutil.Process(pid)
+            process_info = ProcessInfo(
+                pid=pid,
+                cpu_percent=process.cpu_percent(),  # primes the sampler, always 0.0
+                memory_percent=process.memory_percent(),
+                create_time=process.create_time(),
+                cmdline=process.cmdline(),
+            )
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
+            logger.warning(f"Cannot track llama-server process {pid}: {str(e)}")
+            return
+
+        is_ready = self._probe_health()
+        with self._status_lock:
+            self._process = process
+            self._popen = popen
+            self._status = ServerStatus.running(process_info, is_ready)
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(
+                    target=self._sample_loop, name="llama-server-sampler", daemon=True
+                )
+                self._sampler.start()
+        logger.info(f"Tracking llama-server process, PID: {pid}")
+
+    def _untrack_process(self) -> None:
+        """Forget the tracked process, the next status read rediscovers it"""
+        with self._status_lock:
+            self._process = None
+            self._popen = None
+            self._status = ServerStatus.not_running()
+            self._last_discovery = 0.0
+
+    def _is_tracked_alive(self) -> bool:
+        process = self._process
+        if process is None:
+            return False
+        if self._popen is not None and self._popen.poll() is not None:
+            # reaped our own child, it is gone
+            return False
+        try:
+            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def _probe_health(self) -> bool:
+        """Ask llama-server's health endpoint whether the model is loaded"""
+        if not self._health_url:
+            return False
+        try:
+            return requests.get(self._health_url, timeout=self._health_timeout).ok
+        except requests.RequestException:
+            return False
+
+    def _sample_loop(self) -> None:
+        """Refresh metrics and readiness of the tracked process in the background"""
+        while True:
+            time.sleep(self._metrics_interval)
+            with self._status_lock:
+                process = self._process
+            if process is None:
+                return
+            if not self._is_tracked_alive():
+                logger.info(f"llama-server process {process.pid} has exited")
+                self._untrack_process()
+                return
+            try:
+                with process.oneshot():
+                    cpu_percent = process.cpu_percent()
+                    memory_percent = process.memory_percent()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            is_ready = self._probe_health()
+
+            with self._status_lock:
+                if self._process is not process or self._status.process_info is None:
+                    continue
+                info = self._status.process_info
+                self._status = ServerStatus.running(
+                    ProcessInfo(
+                        pid=info.pid,
+                        cpu_percent=cpu_percent,
+                        memory_percent=memory_percent,
+                        create_time=info.create_time,
+                        cmdline=info.cmdline,
+                    ),
+                    is_ready,
+                )
+
+    def _discover_process(self) -> Optional[int]:
+        """Scan the process table for a llama-server started outside this service"""
+        for proc in psutil.process_iter(["pid", "cmdline"]):
+            try:
+                cmdline = proc.info["cmdline"] or []
+                if any("llama-server" in cmd for cmd in cmdline):
+                    return proc.pid
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        return None
+
+    def get_server_status(self, refresh: bool = False) -> ServerStatus:
         """
         Get the current status of llama-server
+        
+        Served from the status kept by the background sampler. The process table is
+        only scanned when no process is tracked, at most once per
+        LLAMA_DISCOVERY_INTERVAL unless refresh is set.
+        
+        Args:
+            refresh: Force a process table scan when no process is tracked
         Returns: ServerStatus object
         """
         try:
-            for proc in psutil.process_iter(["pid", "name", "cmdline"]):
-                try:
-                    cmdline = proc.cmdline()
-                    if any("llama-server" in cmd for cmd in cmdline):
-                        with proc.oneshot():
-                            process_info = ProcessInfo(
-                                pid=proc.pid,
-                                cpu_percent=proc.cpu_percent(),
-                                memory_percent=proc.memory_percent(),
-                                create_time=proc.create_time(),
-                                cmdline=cmdline,
-                            )
-                            return ServerStatus.running(process_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                    
-            return ServerStatus.not_running()
+            if self._process is not None:
+                if self._is_tracked_alive():
+                    return self._status
+                self._untrack_process()
+
+            now = time.monotonic()
+            if not refresh and now - self._last_discovery < self._discovery_interval:
+                return self._status
+            self._last_discovery = now
+
+            pid = self._discover_process()
+            if pid is not None:
+                self.track_process(pid)
+            return self._status
             
         except Exception as e:
             logger.error(f"Error checking llama-server status: {str(e)}")
@@ -289,6 +481,34 @@ class LocalLLMService:
             }
         )
 
+    async def stream_events(self, response_iter: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+        """Async counterpart of handle_stream_response, yields the same SSE events"""
+        try:
+            async for chunk in response_iter:
+                if chunk is None:
+                    logger.warning("Received None chunk in stream, skipping")
+                    continue
+
+                if chunk == "[DONE]":
+                    logger.info("Received [DONE] marker")
+                    yield b"data: [DONE]\n\n"
+                    return
+
+                response_data = self._parse_response_chunk(chunk)
+                if response_data:
+                    yield f"data: {json.dumps(response_data)}\n\n".encode('utf-8')
+                else:
+                    logger.warning("Parsed response data is None, skipping chunk")
+
+        except Exception as e:
+            error_msg = json.dumps({'error': str(e)})
+            logger.error(f"Failed to process stream response: {str(e)}", exc_info=True)
+            yield f"data: {error_msg}\n\n".encode('utf-8')
+
+        # not in finally: a generator closed by a disconnected client must not yield
+        yield b"data: [DONE]\n\n"
+        logger.info("Stream response completed successfully")
+
 
 # Global instance
 local_llm_service = LocalLLMService()
@@ -0,0 +1,166 @@
+"""
+Async chat serving mode
+
+Serves the streaming chat endpoints (/api/talk/chat and /api/kernel2/chat) on an
+aiohttp event loop with the async OpenAI client, so concurrent SSE streams do not
+each hold a WSGI worker thread. The wire format is the same as the Flask routes.
+
+Run with:
+    python -m lpm_kernel.chat_server
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
+
+from aiohttp import web
+from pydantic import ValidationError
+
+from lpm_kernel.api.common.responses import APIResponse
+from lpm_kernel.api.domains.kernel2.dto.chat_dto import ChatRequest
+from lpm_kernel.api.domains.kernel2.services.chat_service import chat_service
+from lpm_kernel.api.domains.kernel2.services.prompt_builder import (
+    BasePromptStrategy,
+    RoleBasedStrategy,
+    KnowledgeEnhancedStrategy,
+)
+from lpm_kernel.api.domains.kernel2.services.role_service import role_service
+from lpm_kernel.api.services.local_llm_service import local_llm_service
+from lpm_kernel.common.repository.database_session import DatabaseSession
+from lpm_kernel.configs.config import Config
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+}
+
+
+async def _single_event(chunk: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    yield chunk
+
+
+async def _stream(
+    request: web.Request, events: AsyncIterator[bytes], upstream: Any = None
+) -> web.StreamResponse:
+    """Write SSE events to the client, aborting generation if the client goes away
+
+    Once the response is prepared its status is sent, so later failures are
+    reported as an SSE error event; a client disconnect is raised to the caller.
+    """
+    response = web.StreamResponse(status=200, headers=SSE_HEADERS)
+    await response.prepare(request)
+    try:
+        async for event in events:
+            await response.write(event)
+    except (ConnectionResetError, asyncio.CancelledError):
+        logger.info("Client disconnected, stream aborted")
+        raise
+    except Exception as e:
+        logger.error(f"Stream failed: {str(e)}", exc_info=True)
+        error_msg = json.dumps({"error": str(e)})
+        await response.write(f"data: {error_msg}\n\ndata: [DONE]\n\n".encode("utf-8"))
+    finally:
+        await events.aclose()
+        if upstream is not None:
+            # closes the connection to llama-server, which stops generation
+            await upstream.close()
+    await response.write_eof()
+    return response
+
+
+async def _error(request: web.Request, message: str) -> web.StreamResponse:
+    """Send an error the same way the Flask routes do"""
+    return await _stream(
+        request,
+        local_llm_service.stream_events(_single_event({"error": APIResponse.error(message)})),
+    )
+
+
+async def _parse_request(request: web.Request) -> ChatRequest:
+    return ChatRequest(**(await request.json()))
+
+
+async def _server_running() -> bool:
+    status = await asyncio.to_thread(local_llm_service.get_server_status)
+    return status.is_running
+
+
+async def talk_chat(request: web.Request) -> web.StreamResponse:
+    """Async version of routes_talk.chat"""
+    try:
+        body = await _parse_request(request)
+    except (ValidationError, json.JSONDecodeError, TypeError) as e:
+        return web.json_response(APIResponse.error(f"Invalid request: {str(e)}", code=400), status=400)
+
+    try:
+        if not await _server_running():
+            return await _error(request, "LLama server is not running")
+
+        response = await chat_service.achat(request=body)
+        return await _stream(request, local_llm_service.stream_events(response), response)
+
+    except ConnectionResetError:
+        # the client went away mid-stream, there is nobody to send an error to
+        raise
+    except Exception as e:
+        logger.error(f"API call failed: {str(e)}", exc_info=True)
+        return await _error(request, f"API call failed: {str(e)}")
+
+
+async def kernel2_chat(request: web.Request) -> web.StreamResponse:
+    """Async version of routes_l2.chat"""
+    try:
+        body = await _parse_request(request)
+    except (ValidationError, json.JSONDecodeError, TypeError) as e:
+        return web.json_response(APIResponse.error(f"Invalid request: {str(e)}", code=400), status=400)
+
+    try:
+        if not await _server_running():
+            return await _error(request, "LLama server is not running")
+
+        # if role_id is provided, use the role's retrieval settings
+        if body.role_id:
+            role = await asyncio.to_thread(role_service.get_role_by_uuid, body.role_id)
+            if role:
+                body.enable_l0_retrieval = role.enable_l0_retrieval
+                body.enable_l1_retrieval = role.enable_l1_retrieval
+            else:
+                logger.warning(f"Role with UUID {body.role_id} not found, using default retrieval settings")
+
+        response = await chat_service.achat(
+            request=body,
+            strategy_chain=[BasePromptStrategy, RoleBasedStrategy, KnowledgeEnhancedStrategy],
+        )
+        return await _stream(request, local_llm_service.stream_events(response), response)
+
+    except ConnectionResetError:
+        # the client went away mid-stream, there is nobody to send an error to
+        raise
+    except Exception as e:
+        logger.error(f"Request processing failed: {str(e)}", exc_info=True)
+        return await _error(request, f"Request processing failed: {str(e)}")
+
+
+def create_app() -> web.Application:
+    DatabaseSession.initialize()
+    app = web.Application()
+    app.router.add_post("/api/talk/chat", talk_chat)
+    app.router.add_post("/api/kernel2/chat", kernel2_chat)
+    return app
+
+
+def main():
+    config = Config.from_env()
+    host = config.get("CHAT_SERVER_HOST", "0.0.0.0")
+    port = int(config.get("CHAT_SERVER_PORT", "8003"))
+    logger.info(f"Starting async chat server on {host}:{port}")
+    web.run_app(create_app(), host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,227 @@
 from lpm_kernel.api.services.user_llm_config_service import UserLLMConfigService
 from lpm_kernel.configs.config import Config
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Union
 from lpm_kernel.common.logging import logger
+import queue
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 
 
+class EmbeddingRequestError(Exception):
+    """An embedding request failed, retryable tells whether the provider may accept it later"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class _PendingEmbedding:
+    """Texts of one caller waiting to be merged into a shared request"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class EmbeddingClient:
+    """Pooled embedding client shared by all LLMClient instances
+
+    - keeps one HTTP keep-alive session for the embedding endpoint
+    - splits large inputs into provider-sized batches sent in parallel
+    - retries failed batches with exponential backoff
+    - merges small concurrent requests into shared batches (micro-batching)
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, config: Config, user_llm_config_service: UserLLMConfigService):
+        self.user_llm_config_service = user_llm_config_service
+        self.batch_size = int(config.get("EMBEDDING_BATCH_SIZE", "64"))
+        self.max_workers = int(config.get("EMBEDDING_MAX_WORKERS", "4"))
+        self.max_retries = int(config.get("EMBEDDING_MAX_RETRIES", "3"))
+        self.retry_backoff = float(config.get("EMBEDDING_RETRY_BACKOFF", "0.5"))
+        self.request_timeout = float(config.get("EMBEDDING_REQUEST_TIMEOUT", "60"))
+        self.coalesce_window = float(config.get("EMBEDDING_COALESCE_WINDOW_MS", "5")) / 1000
+        self.config_ttl = float(config.get("EMBEDDING_CONFIG_TTL", "5"))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers, pool_maxsize=self.max_workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="embedding"
+        )
+
+        self._llm_config = None
+        self._llm_config_time = 0.0
+        self._llm_config_lock = threading.Lock()
+
+        self._queue: "queue.Queue[_PendingEmbedding]" = queue.Queue()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="embedding-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    @classmethod
+    def get_instance(cls) -> "EmbeddingClient":
+        """Get the process wide embedding client"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(Config.from_env(), UserLLMConfigService())
+        return cls._instance
+
+    def get_llm_config(self):
+        """Get user LLM configuration, cached for a few seconds"""
+        with self._llm_config_lock:
+            now = time.monotonic()
+            if self._llm_config is None or now - self._llm_config_time > self.config_ttl:
+                self._llm_config = self.user_llm_config_service.get_available_llm()
+                self._llm_config_time = now
+            return self._llm_config
+
+    def invalidate_llm_config(self) -> None:
+        """Force the next request to reload the user LLM configuration"""
+        with self._llm_config_lock:
+            self._llm_config = None
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, merging small requests with concurrent callers
+
+        Args:
+            texts: list of texts
+
+        Returns:
+            numpy.ndarray: one embedding row per text
+        """
+        if not texts:
+            return np.array([])
+
+        if len(texts) >= self.batch_size:
+            return np.array(self._embed_parallel(texts))
+
+        pending = _PendingEmbedding(texts)
+        self._queue.put(pending)
+        return np.array(pending.future.result())
+
+    def _embed_parallel(self, texts: List[str]) -> List[List[float]]:
+        """Split texts into batches and send them through the thread pool"""
+        batches = [
+            texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) == 1:
+            return self._request_with_retry(batches[0])
+
+        futures = [self.executor.submit(self._request_with_retry, b) for b in batches]
+        embeddings = []
+        for future in futures:
+            embeddings.extend(future.result())
+        return embeddings
+
+    def _dispatch_loop(self) -> None:
+        """Collect pending requests for a short window and send them together
+
+        A request joins a group only if the group stays within batch_size texts,
+        so every group is a single provider call; one that does not fit starts
+        the next group.
+        """
+        carry = None
+        while True:
+            group = [carry if carry is not None else self._queue.get()]
+            carry = None
+            text_count = len(group[0].texts)
+            deadline = time.monotonic() + self.coalesce_window
+            while text_count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if text_count + len(pending.texts) > self.batch_size:
+                    carry = pending
+                    break
+                group.append(pending)
+                text_count += len(pending.texts)
+
+            self._submit_group(group)
+
+    def _submit_group(self, group: List[_PendingEmbedding]) -> None:
+        future = self.executor.submit(
+            self._request_with_retry,
+            [text for pending in group for text in pending.texts],
+        )
+        future.add_done_callback(
+            lambda f, group=group: self._resolve_group(group, f)
+        )
+
+    def _resolve_group(self, group: List[_PendingEmbedding], future: Future) -> None:
+        """Hand each caller its slice of a shared response"""
+        error = future.exception()
+        if error is not None:
+            if len(group) > 1 and not getattr(error, "retryable", False):
+                # a rejected request may come from one caller's texts, retry each
+                # caller alone so the others are not failed with it
+                for pending in group:
+                    self._submit_group([pending])
+                return
+            for pending in group:
+                pending.future.set_exception(error)
+            return
+
+        embeddings = future.result()
+        offset = 0
+        for pending in group:
+            pending.future.set_result(embeddings[offset : offset + len(pending.texts)])
+            offset += len(pending.texts)
+
+    def _request_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """Send one batch to the embedding endpoint, retrying transient failures"""
+        user_llm_config = self.get_llm_config()
+        if not user_llm_config:
+            raise Exception("No LLM configuration found")
+
+        headers = {
+            "Authorization": f"Bearer {user_llm_config.embedding_api_key}",
+            "Content-Type": "application/json",
+        }
+        data = {"input": texts, "model": user_llm_config.embedding_model_name}
+
+        logger.info(f"Getting embedding for {len(texts)} texts")
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    f"{user_llm_config.embedding_endpoint}/embeddings",
+                    headers=headers,
+                    json=data,
+                    timeout=self.request_timeout,
+                )
+                response.raise_for_status()
+                result = response.json()
+                return [item["embedding"] for item in result["data"]]
+
+            except requests.exceptions.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise EmbeddingRequestError(
+                        f"Failed to get embeddings: {str(e)}", retryable=retryable
+                    )
+                delay = self.retry_backoff * (2**attempt)
+                logger.warning(
+                    f"Embedding request failed ({str(e)}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+
 class LLMClient:
     """LLM client utility class"""
 
@@ -21,6 +237,9 @@ class LLMClient:
         # self.embedding_base_url = self.user_llm_config.embedding_endpoint
         # self.embedding_model = self.user_llm_config.embedding_model_name
 
+    @property
+    def embedding_client(self) -> EmbeddingClient:
+        return EmbeddingClient.get_instance()
 
     def get_embedding(self, texts: Union[str, List[str]]) -> np.ndarray:
         """Calculate text embedding
@@ -35,34 +254,7 @@ class LLMClient:
         if isinstance(texts, str):
             texts = [texts]
 
-        user_llm_config = self.user_llm_config_service.get_available_llm()
-        if not user_llm_config:
-            raise Exception("No LLM configuration found")
-        # Prepare request data
-        headers = {
-            "Authorization": f"Bearer {user_llm_config.embedding_api_key}",
-            "Content-Type": "application/json",
-        }
-
-        data = {"input": texts, "model": user_llm_config.embedding_model_name}
-
-        logger.info(f"Getting embedding for {data}")
-        try:
-            # Send request to embedding endpoint
-            response = requests.post(
-                f"{user_llm_config.embedding_endpoint}/embeddings", headers=headers, json=data
-            )
-
-            # Check response status
-            response.raise_for_status()
-            result = response.json()
-
-            # Extract embedding vectors
-            embeddings = [item["embedding"] for item in result["data"]]
-            return np.array(embeddings)
-
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to get embeddings: {str(e)}")
+        return self.embedding_client.embed(texts)
 
     @property
     def chat_credentials(self):
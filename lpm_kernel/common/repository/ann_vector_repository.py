@@ -0,0 +1,648 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+from .vector_repository import BaseVectorRepository, VectorDocument, id_checksum
+
+logger = logging.getLogger(__name__)
+
+# metadata keys that can be used in search filters
+FILTER_KEYS = ("document_id", "tags")
+
+
+class AnnVectorRepository(BaseVectorRepository):
+    """In-process IVF-flat index over a memory-mapped float32 matrix
+
+    Vectors are L2 normalized and scored by cosine similarity. Rows loaded from a
+    snapshot stay memory-mapped, rows added afterwards live in an in-memory delta.
+    Every snapshot_every changed rows, the rows added and the ids deleted since
+    the last write are appended to disk as a delta segment; once the segments
+    hold compact_ratio of the snapshot's rows they are compacted into a new
+    snapshot, so ingest costs linear I/O. Files are written outside the lock
+    searches take. Below min_train_size rows, or when a metadata filter is given,
+    every candidate row is scored exactly.
+
+    Layout in index_dir:
+        vectors.npy         float32 (n, dim), memory-mapped on load
+        meta.json           ids, texts and metadatas, row aligned with vectors.npy,
+                            and the number of the last segment the snapshot includes
+        ivf.npz             centroids and row -> list assignment, if trained
+        delta-NNNNNN.npy    float32 rows added by a segment
+        delta-NNNNNN.json   their ids, texts and metadatas, and the ids deleted before them
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        nlist: int = 0,
+        nprobe: int = 16,
+        min_train_size: int = 20000,
+        snapshot_every: int = 1000,
+        compact_ratio: float = 0.25,
+    ):
+        """
+        Args:
+            index_dir: directory holding the snapshot
+            nlist: number of inverted lists, 0 picks sqrt(n) at training time
+            nprobe: number of lists scanned per query
+            min_train_size: rows needed before the IVF lists are trained
+            snapshot_every: changed rows after which they are written to disk, 0 disables
+            compact_ratio: segment rows, relative to the snapshot rows, that trigger a compaction
+        """
+        self.index_dir = index_dir
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.snapshot_every = snapshot_every
+        self.compact_ratio = compact_ratio
+        # set by the owner once the index is known to match its source of truth
+        self.synced = False
+        # corpus_version fingerprint of the chunk table when the owner last synced
+        self.synced_fingerprint = None
+
+        self._lock = threading.RLock()
+        # serializes disk writes, taken before _lock when both are needed
+        self._persist_lock = threading.Lock()
+        # bumped by every change of the rows, a compaction only swaps in its
+        # snapshot if nothing changed while it was written
+        self._mutations = 0
+        self._reset()
+        self.load()
+
+    def _reset(self) -> None:
+        self._dim: Optional[int] = None
+        self._base: Optional[np.ndarray] = None  # memory-mapped snapshot rows
+        self._delta: Optional[np.ndarray] = None  # rows added since the snapshot
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._filter_rows: Dict[Tuple[str, str], set] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._list_rows: List[np.ndarray] = []
+        self._list_extra: List[List[int]] = []
+        self._trained_size = 0
+        self._changes = 0
+        # rows already on disk, in the snapshot or a segment
+        self._persisted_rows = 0
+        # ids of rows on disk deleted since the last write
+        self._tombstones: List[str] = []
+        self._snapshot_rows = 0
+        # rows and deletions stored in segments since the snapshot
+        self._segment_rows = 0
+        self._last_segment = 0
+        self._needs_compaction = False
+
+    # ------------------------------------------------------------------ storage
+
+    @property
+    def _n_base(self) -> int:
+        return 0 if self._base is None else self._base.shape[0]
+
+    def count(self) -> int:
+        """Number of live vectors"""
+        with self._lock:
+            return len(self._row_of)
+
+    def id_checksum(self) -> int:
+        """Checksum of the live ids, see vector_repository.id_checksum"""
+        with self._lock:
+            return id_checksum(self._row_of)
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Gather vectors of rows from the snapshot and the delta"""
+        return self._gather(self._base, self._delta, self._dim, rows)
+
+    @staticmethod
+    def _gather(base: Optional[np.ndarray], delta: Optional[np.ndarray], dim: Optional[int],
+                rows: np.ndarray) -> np.ndarray:
+        n_base = 0 if base is None else base.shape[0]
+        base_rows = rows[rows < n_base]
+        delta_rows = rows[rows >= n_base] - n_base
+        parts = []
+        if len(base_rows):
+            parts.append(np.asarray(base[base_rows]))
+        if len(delta_rows):
+            parts.append(delta[delta_rows])
+        if not parts:
+            return np.zeros((0, dim or 0), dtype=np.float32)
+        return np.vstack(parts) if len(parts) > 1 else parts[0]
+
+    @staticmethod
+    def _filter_values(key: str, metadata: Dict) -> Iterable[str]:
+        value = metadata.get(key)
+        if value is None or value == "":
+            return []
+        if key == "tags":
+            return [tag.strip() for tag in str(value).split(",") if tag.strip()]
+        return [str(value)]
+
+    def add(self, documents: List[VectorDocument]) -> None:
+        """
+        Add or replace documents, embeddings are required
+        """
+        if not documents:
+            return
+        if any(doc.embedding is None for doc in documents):
+            raise ValueError("AnnVectorRepository requires precomputed embeddings")
+
+        vectors = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._add_locked(
+                [doc.id for doc in documents],
+                [doc.text for doc in documents],
+                [doc.metadata or {} for doc in documents],
+                vectors,
+            )
+            self._changes += len(documents)
+            self._mutations += 1
+        self._maybe_persist()
+
+    def _add_locked(self, ids: List[str], texts: List[str], metadatas: List[Dict],
+                    vectors: np.ndarray) -> None:
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dim}"
+            )
+
+        self._delete_locked([doc_id for doc_id in ids if doc_id in self._row_of])
+
+        start = len(self._ids)
+        self._delta = vectors if self._delta is None else np.vstack([self._delta, vectors])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        for offset, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            row = start + offset
+            self._ids.append(doc_id)
+            self._texts.append(text)
+            self._metadatas.append(metadata)
+            self._row_of[doc_id] = row
+            for key in FILTER_KEYS:
+                for value in self._filter_values(key, metadata):
+                    self._filter_rows.setdefault((key, value), set()).add(row)
+
+        if self._centroids is not None:
+            lists = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+            self._assign = np.concatenate([self._assign, lists])
+            for offset, list_id in enumerate(lists):
+                self._list_extra[list_id].append(start + offset)
+        else:
+            self._assign = np.concatenate(
+                [self._assign, np.full(len(ids), -1, dtype=np.int32)]
+            )
+            if len(self._row_of) >= self.min_train_size:
+                self._train_locked()
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Delete documents by their IDs
+        """
+        with self._lock:
+            self._delete_locked(ids)
+            self._changes += len(ids)
+            self._mutations += 1
+        self._maybe_persist()
+
+    def _delete_locked(self, ids: List[str]) -> None:
+        for doc_id in ids:
+            row = self._row_of.pop(doc_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            if row < self._persisted_rows:
+                self._tombstones.append(doc_id)
+            for key in FILTER_KEYS:
+                for value in self._filter_values(key, self._metadatas[row]):
+                    rows = self._filter_rows.get((key, value))
+                    if rows is not None:
+                        rows.discard(row)
+
+    def clear(self) -> None:
+        """Drop all rows from memory, the files are replaced by the next write"""
+        with self._lock:
+            self._reset()
+            self._needs_compaction = True
+            self._mutations += 1
+
+    def get_by_ids(self, ids: List[str]) -> List[VectorDocument]:
+        """
+        Retrieve documents with their embeddings by their IDs
+        """
+        with self._lock:
+            rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+            vectors = self._vectors(np.asarray(rows, dtype=np.int64))
+            return [
+                VectorDocument(
+                    id=self._ids[row],
+                    text=self._texts[row],
+                    metadata=self._metadatas[row],
+                    embedding=vectors[i].tolist(),
+                )
+                for i, row in enumerate(rows)
+            ]
+
+    # ----------------------------------------------------------------- ivf lists
+
+    def _train_locked(self) -> None:
+        """Cluster live rows into inverted lists"""
+        live_rows = np.flatnonzero(self._alive)
+        if len(live_rows) == 0:
+            return
+        nlist = self.nlist or int(np.sqrt(len(live_rows)))
+        nlist = max(1, min(nlist, len(live_rows)))
+
+        rng = np.random.default_rng(42)
+        sample_size = min(len(live_rows), max(nlist * 64, 10000))
+        sample = np.sort(rng.choice(live_rows, size=sample_size, replace=False))
+        kmeans = MiniBatchKMeans(
+            n_clusters=nlist, batch_size=4096, n_init=3, random_state=42
+        ).fit(self._vectors(sample))
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self._centroids = centroids / np.where(norms == 0, 1, norms)
+
+        assign = np.full(len(self._ids), -1, dtype=np.int32)
+        for i in range(0, len(live_rows), 65536):
+            rows = live_rows[i : i + 65536]
+            assign[rows] = np.argmax(self._vectors(rows) @ self._centroids.T, axis=1)
+        self._assign = assign
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self._list_rows = [order[bounds[i] : bounds[i + 1]] for i in range(nlist)]
+        self._list_extra = [[] for _ in range(nlist)]
+        self._trained_size = len(live_rows)
+        logger.info(f"Trained ANN index with {nlist} lists over {len(live_rows)} vectors")
+
+    def train(self) -> None:
+        """(Re)train the inverted lists on the current rows"""
+        with self._lock:
+            self._train_locked()
+
+    # -------------------------------------------------------------------- search
+
+    def _candidate_rows(self, query: np.ndarray, where: Optional[Dict]) -> np.ndarray:
+        if where:
+            allowed = None
+            for key, condition in where.items():
+                if key not in FILTER_KEYS:
+                    raise ValueError(f"Unsupported filter key: {key}")
+                values = condition.get("$in", []) if isinstance(condition, dict) else [condition]
+                rows = set()
+                for value in values:
+                    rows |= self._filter_rows.get((key, str(value)), set())
+                allowed = rows if allowed is None else allowed & rows
+            # filtered queries are scored exactly, the allowed set is usually small
+            return np.fromiter(sorted(allowed), dtype=np.int64, count=len(allowed))
+
+        if self._centroids is None:
+            return np.flatnonzero(self._alive)
+
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate(
+            [self._list_rows[p] for p in probes]
+            + [np.asarray(self._list_extra[p], dtype=np.int64) for p in probes]
+        ).astype(np.int64)
+        return rows[self._alive[rows]]
+
+    def search_with_scores(
+        self, query_vector: List[float], limit: int = 5, where: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        """
+        Search similar documents, returning cosine similarities
+
+        Args:
+            query_vector: query embedding
+            limit: maximum number of results
+            where: metadata filter on document_id/tags, a value or {"$in": [values]}
+
+        Returns:
+            List[Tuple[VectorDocument, float]]: (document, similarity) sorted by similarity descending
+        """
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        with self._lock:
+            if self._dim is None or not self._row_of:
+                return []
+            rows = self._candidate_rows(query, where)
+            if len(rows) == 0:
+                return []
+            scores = self._vectors(rows) @ query
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top])]
+            return [
+                (
+                    VectorDocument(
+                        id=self._ids[rows[i]],
+                        text=self._texts[rows[i]],
+                        metadata=self._metadatas[rows[i]],
+                    ),
+                    float(scores[i]),
+                )
+                for i in top
+            ]
+
+    def search(self, query_vector: List[float], limit: int = 5) -> List[VectorDocument]:
+        """
+        Search similar documents using a query vector
+        """
+        return [doc for doc, _ in self.search_with_scores(query_vector, limit)]
+
+    # ------------------------------------------------------------------ snapshot
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _segment_path(self, number: int, extension: str) -> str:
+        return self._path(f"delta-{number:06d}.{extension}")
+
+    def _maybe_persist(self) -> None:
+        if self.snapshot_every and self._changes >= self.snapshot_every:
+            # a write in progress is followed by another once more rows change
+            if self._persist_lock.acquire(blocking=False):
+                try:
+                    self._persist_locked()
+                finally:
+                    self._persist_lock.release()
+
+    def persist(self) -> None:
+        """Write the changes since the last write, as a segment or by compacting"""
+        with self._persist_lock:
+            self._persist_locked()
+
+    def save(self) -> None:
+        """Compact the snapshot and all changes into a new snapshot"""
+        with self._persist_lock:
+            self._compact()
+
+    def _persist_locked(self) -> None:
+        with self._lock:
+            if self._dim is None:
+                return
+            pending = len(self._ids) - self._persisted_rows + len(self._tombstones)
+            if not pending and not self._needs_compaction:
+                return
+            compact = self._needs_compaction or (
+                self._segment_rows + pending > self.compact_ratio * self._snapshot_rows
+            )
+            if not compact:
+                segment = self._take_segment_locked()
+        if compact:
+            self._compact()
+        else:
+            self._write_segment(segment)
+
+    def _take_segment_locked(self) -> Dict:
+        """Collect the changes since the last write and mark them as written"""
+        rows = np.arange(self._persisted_rows, len(self._ids))
+        rows = rows[self._alive[rows]]
+        self._last_segment += 1
+        segment = {
+            "number": self._last_segment,
+            "vectors": self._vectors(rows),
+            "meta": {
+                "dimension": self._dim,
+                "ids": [self._ids[row] for row in rows],
+                "texts": [self._texts[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+                "deleted": self._tombstones,
+            },
+        }
+        self._segment_rows += len(rows) + len(self._tombstones)
+        self._persisted_rows = len(self._ids)
+        self._tombstones = []
+        self._changes = 0
+        return segment
+
+    def _write_segment(self, segment: Dict) -> None:
+        number = segment["number"]
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            np.save(self._segment_path(number, "npy"), segment["vectors"])
+            tmp_meta = self._segment_path(number, "json.tmp")
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(segment["meta"], f, ensure_ascii=False)
+            # the .json goes last, load() stops at the first segment without one
+            os.replace(tmp_meta, self._segment_path(number, "json"))
+        except Exception as e:
+            logger.error(f"Failed to write ANN index segment {number}: {str(e)}")
+            # later segments would not apply without this one, rewrite everything instead
+            with self._lock:
+                self._needs_compaction = True
+
+    def _compact(self) -> None:
+        """Write live rows as a new snapshot and memory-map it
+
+        Rows are captured under the lock, written without it, and the new
+        snapshot is swapped in only if the rows did not change meanwhile;
+        otherwise the in-memory rows stay as they are, which is equivalent.
+        """
+        with self._lock:
+            if self._dim is None:
+                return
+            dim = self._dim
+            base, delta = self._base, self._delta
+            live_rows = np.flatnonzero(self._alive)
+            ids = [self._ids[row] for row in live_rows]
+            texts = [self._texts[row] for row in live_rows]
+            metadatas = [self._metadatas[row] for row in live_rows]
+            # retrain when the index has grown well past the size it was trained on
+            retrain = self._centroids is None or len(live_rows) > 4 * self._trained_size
+            centroids = None if retrain else self._centroids
+            assign = None if retrain else self._assign[live_rows]
+            trained_size = self._trained_size
+            covered = self._last_segment
+            mutations = self._mutations
+            # changes from here on go to segments after the new snapshot
+            self._persisted_rows = len(self._ids)
+            self._tombstones = []
+            self._changes = 0
+            self._snapshot_rows = len(live_rows)
+            self._segment_rows = 0
+            self._needs_compaction = False
+
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp_vectors = self._path("vectors.npy.tmp")
+            out = np.lib.format.open_memmap(
+                tmp_vectors, mode="w+", dtype=np.float32, shape=(len(live_rows), dim)
+            )
+            for i in range(0, len(live_rows), 65536):
+                out[i : i + 65536] = self._gather(base, delta, dim, live_rows[i : i + 65536])
+            out.flush()
+            del out
+
+            meta = {
+                "dimension": dim,
+                "segment": covered,
+                "ids": ids,
+                "texts": texts,
+                "metadatas": metadatas,
+            }
+            with open(self._path("meta.json.tmp"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            if centroids is not None:
+                np.savez(
+                    self._path("ivf.npz.tmp"),
+                    centroids=centroids,
+                    assign=assign,
+                    trained_size=trained_size,
+                )
+
+            # meta.json goes last, load() checks that the files agree
+            os.replace(tmp_vectors, self._path("vectors.npy"))
+            if os.path.exists(self._path("ivf.npz.tmp")):
+                os.replace(self._path("ivf.npz.tmp"), self._path("ivf.npz"))
+            elif os.path.exists(self._path("ivf.npz")):
+                os.remove(self._path("ivf.npz"))
+            os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+
+            for name in os.listdir(self.index_dir):
+                if name.startswith("delta-") and int(name[6:12]) <= covered:
+                    os.remove(self._path(name))
+        except Exception as e:
+            logger.error(f"Failed to write ANN index snapshot: {str(e)}")
+            with self._lock:
+                self._needs_compaction = True
+            return
+
+        # memory-map the new snapshot instead of keeping the delta in memory
+        state = self._snapshot_state(
+            np.load(self._path("vectors.npy"), mmap_mode="r"),
+            ids, texts, metadatas, centroids, assign, trained_size,
+        )
+        with self._lock:
+            if self._mutations == mutations:
+                for name, value in state.items():
+                    setattr(self, name, value)
+                self._persisted_rows = len(ids)
+                if retrain and len(self._row_of) >= self.min_train_size:
+                    self._train_locked()
+                    np.savez(
+                        self._path("ivf.npz"),
+                        centroids=self._centroids,
+                        assign=self._assign,
+                        trained_size=self._trained_size,
+                    )
+        logger.info(f"Saved ANN index snapshot with {len(ids)} vectors")
+
+    @staticmethod
+    def _snapshot_state(base: np.ndarray, ids: List[str], texts: List[str], metadatas: List[Dict],
+                        centroids: Optional[np.ndarray] = None, assign: Optional[np.ndarray] = None,
+                        trained_size: int = 0) -> Dict:
+        """Attributes of an index holding exactly the rows of a snapshot"""
+        filter_rows: Dict[Tuple[str, str], set] = {}
+        for row, metadata in enumerate(metadatas):
+            for key in FILTER_KEYS:
+                for value in AnnVectorRepository._filter_values(key, metadata):
+                    filter_rows.setdefault((key, value), set()).add(row)
+        state = {
+            "_dim": base.shape[1],
+            "_base": base,
+            "_delta": None,
+            "_ids": ids,
+            "_texts": texts,
+            "_metadatas": metadatas,
+            "_alive": np.ones(len(ids), dtype=bool),
+            "_row_of": {doc_id: row for row, doc_id in enumerate(ids)},
+            "_filter_rows": filter_rows,
+            "_centroids": None,
+            "_assign": np.full(len(ids), -1, dtype=np.int32),
+            "_list_rows": [],
+            "_list_extra": [],
+            "_trained_size": 0,
+        }
+        if centroids is not None and assign is not None and len(assign) == len(ids):
+            assign = np.asarray(assign).astype(np.int32)
+            nlist = len(centroids)
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+            state.update(
+                _centroids=centroids,
+                _assign=assign,
+                _list_rows=[order[bounds[i] : bounds[i + 1]] for i in range(nlist)],
+                _list_extra=[[] for _ in range(nlist)],
+                _trained_size=int(trained_size),
+            )
+        return state
+
+    def load(self) -> bool:
+        """Load the snapshot in index_dir and its segments if there is a consistent one"""
+        with self._lock:
+            self._reset()
+            self._mutations += 1
+            return self._load_locked()
+
+    def _load_locked(self) -> bool:
+        if not os.path.exists(self._path("meta.json")) or not os.path.exists(self._path("vectors.npy")):
+            return False
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            base = np.load(self._path("vectors.npy"), mmap_mode="r")
+            if base.shape != (len(meta["ids"]), meta["dimension"]):
+                raise ValueError("vectors.npy does not match meta.json")
+
+            centroids = assign = None
+            trained_size = 0
+            if os.path.exists(self._path("ivf.npz")):
+                ivf = np.load(self._path("ivf.npz"))
+                centroids, assign, trained_size = ivf["centroids"], ivf["assign"], ivf["trained_size"]
+            state = self._snapshot_state(
+                base, meta["ids"], meta["texts"], meta["metadatas"], centroids, assign, trained_size
+            )
+            for name, value in state.items():
+                setattr(self, name, value)
+            self._snapshot_rows = len(meta["ids"])
+            self._persisted_rows = len(meta["ids"])
+            self._last_segment = meta.get("segment", 0)
+            self._replay_segments_locked()
+            logger.info(
+                f"Loaded ANN index snapshot with {len(meta['ids'])} vectors, "
+                f"{len(self._row_of)} after {self._segment_rows} segment changes"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ANN index snapshot: {str(e)}")
+            self._reset()
+            return False
+
+    def _replay_segments_locked(self) -> None:
+        """Apply the segments written after the snapshot, in order"""
+        replayed = 0
+        number = self._last_segment + 1
+        while os.path.exists(self._segment_path(number, "json")):
+            with open(self._segment_path(number, "json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(self._segment_path(number, "npy"))
+            if len(vectors) != len(meta["ids"]):
+                raise ValueError(f"Segment {number} vectors do not match its ids")
+            self._delete_locked(meta["deleted"])
+            if len(vectors):
+                self._add_locked(meta["ids"], meta["texts"], meta["metadatas"], vectors)
+            replayed += len(vectors) + len(meta["deleted"])
+            self._last_segment = number
+            number += 1
+        # replayed rows are on disk already
+        self._segment_rows = replayed
+        self._persisted_rows = len(self._ids)
+        self._tombstones = []
@@ -0,0 +1,244 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .vector_repository import BaseVectorRepository, VectorDocument, id_checksum
+
+logger = logging.getLogger(__name__)
+
+# rows scored per block when the matrix is stored as float16
+_FLOAT16_BLOCK_ROWS = 16384
+
+
+class ExactVectorRepository(BaseVectorRepository):
+    """Exact cosine search over one contiguous normalized matrix held in memory
+
+    A single matrix-vector product plus argpartition per query, or one GEMM for a
+    batch of queries, with perfect recall. Rows stay contiguous: a delete moves the
+    last row into the freed slot. Meant for corpora up to max_size rows; once
+    that is exceeded the repository drops its rows and reports overflow, so the
+    caller can fall back to an approximate backend.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, dtype: str = "float32"):
+        """
+        Args:
+            max_size: maximum number of rows, None for no limit
+            dtype: storage type of the matrix, "float32" or "float16"
+        """
+        self.max_size = max_size
+        self.dtype = np.dtype(dtype)
+        # set by the owner once the rows are known to match its source of truth
+        self.synced = False
+        # corpus_version fingerprint of the chunk table when the owner last synced
+        self.synced_fingerprint = None
+        self.overflow = False
+
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._matrix: Optional[np.ndarray] = None  # capacity rows, first _size are used
+        self._size = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._row_of: Dict[str, int] = {}
+
+    def count(self) -> int:
+        """Number of stored vectors"""
+        with self._lock:
+            return self._size
+
+    def id_checksum(self) -> int:
+        """Checksum of the stored ids, see vector_repository.id_checksum"""
+        with self._lock:
+            return id_checksum(self._ids[: self._size])
+
+    def fits(self, size: int) -> bool:
+        return self.max_size is None or size <= self.max_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self.overflow = False
+
+    def set_overflow(self) -> None:
+        """Drop all rows, the corpus is too large for exact search"""
+        with self._lock:
+            self._reset()
+            self.overflow = True
+        logger.info(f"Exact search disabled, corpus exceeds {self.max_size} chunks")
+
+    def _grow(self, rows: int, dim: int) -> None:
+        if self._matrix is None:
+            self._matrix = np.empty((max(rows, 1024), dim), dtype=self.dtype)
+        elif self._size + rows > self._matrix.shape[0]:
+            capacity = max(self._size + rows, 2 * self._matrix.shape[0])
+            matrix = np.empty((capacity, dim), dtype=self.dtype)
+            matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+
+    def add(self, documents: List[VectorDocument]) -> None:
+        """
+        Add or replace documents, embeddings are required
+        """
+        if not documents:
+            return
+        if any(doc.embedding is None for doc in documents):
+            raise ValueError("ExactVectorRepository requires precomputed embeddings")
+
+        vectors = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.overflow:
+                return
+            if self._matrix is not None and vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._matrix.shape[1]}"
+                )
+
+            new_docs, new_vectors = [], []
+            for doc, vector in zip(documents, vectors):
+                row = self._row_of.get(doc.id)
+                if row is None:
+                    new_docs.append(doc)
+                    new_vectors.append(vector)
+                else:
+                    self._matrix[row] = vector
+                    self._texts[row] = doc.text
+                    self._metadatas[row] = doc.metadata or {}
+
+            if not self.fits(self._size + len(new_docs)):
+                self.set_overflow()
+                return
+
+            if new_docs:
+                self._grow(len(new_docs), vectors.shape[1])
+                start = self._size
+                self._matrix[start : start + len(new_docs)] = np.asarray(new_vectors)
+                for offset, doc in enumerate(new_docs):
+                    self._ids.append(doc.id)
+                    self._texts.append(doc.text)
+                    self._metadatas.append(doc.metadata or {})
+                    self._row_of[doc.id] = start + offset
+                self._size += len(new_docs)
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Delete documents by their IDs, moving the last row into each freed slot
+        """
+        with self._lock:
+            for doc_id in ids:
+                row = self._row_of.pop(doc_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._texts[row] = self._texts[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._row_of[self._ids[row]] = row
+                self._ids.pop()
+                self._texts.pop()
+                self._metadatas.pop()
+                self._size -= 1
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarities of normalized queries (q, dim) against all rows (q, n)"""
+        matrix = self._matrix[: self._size]
+        if self.dtype == np.float32:
+            return queries @ matrix.T
+        # numpy has no fast float16 GEMM, widen one block at a time
+        return np.hstack(
+            [
+                queries @ matrix[i : i + _FLOAT16_BLOCK_ROWS].astype(np.float32).T
+                for i in range(0, self._size, _FLOAT16_BLOCK_ROWS)
+            ]
+        )
+
+    def _matches(self, row: int, where: Dict) -> bool:
+        metadata = self._metadatas[row]
+        for key, condition in where.items():
+            values = condition.get("$in", []) if isinstance(condition, dict) else [condition]
+            values = {str(value) for value in values}
+            if key == "tags":
+                tags = {tag.strip() for tag in str(metadata.get("tags", "")).split(",")}
+                if not values & tags:
+                    return False
+            elif str(metadata.get(key)) not in values:
+                return False
+        return True
+
+    def search_batch(
+        self, query_vectors, limit: int = 5, where: Optional[Dict] = None
+    ) -> List[List[Tuple[VectorDocument, float]]]:
+        """
+        Search many queries with one matrix product
+
+        Args:
+            query_vectors: query embeddings, shape (q, dim)
+            limit: maximum number of results per query
+            where: metadata filter, a value or {"$in": [values]} per key
+
+        Returns:
+            List[List[Tuple[VectorDocument, float]]]: per query, (document, similarity) sorted descending
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self._size == 0:
+                return [[] for _ in range(len(queries))]
+            scores = self._scores(queries)
+            if where:
+                mask = np.fromiter(
+                    (self._matches(row, where) for row in range(self._size)),
+                    dtype=bool,
+                    count=self._size,
+                )
+                scores[:, ~mask] = -np.inf
+
+            k = min(limit, self._size)
+            if k < self._size:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(self._size), (len(queries), 1))
+            results = []
+            for q in range(len(queries)):
+                order = top[q][np.argsort(-scores[q, top[q]])]
+                results.append(
+                    [
+                        (
+                            VectorDocument(
+                                id=self._ids[row],
+                                text=self._texts[row],
+                                metadata=self._metadatas[row],
+                            ),
+                            float(scores[q, row]),
+                        )
+                        for row in order
+                        if np.isfinite(scores[q, row])
+                    ]
+                )
+            return results
+
+    def search_with_scores(
+        self, query_vector: List[float], limit: int = 5, where: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        """
+        Search similar documents, returning cosine similarities
+        """
+        return self.search_batch([query_vector], limit=limit, where=where)[0]
+
+    def search(self, query_vector: List[float], limit: int = 5) -> List[VectorDocument]:
+        """
+        Search similar documents using a query vector
+        """
+        return [doc for doc, _ in self.search_with_scores(query_vector, limit)]
@@ -1,7 +1,8 @@
+import hashlib
 import chromadb
 from chromadb.config import Settings
 from chromadb.errors import IDAlreadyExistsError
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
@@ -14,6 +15,15 @@ class VectorDocument:
     embedding: Optional[List[float]] = None
 
 
+def id_checksum(ids: Iterable[str]) -> int:
+    """Order independent checksum of a set of ids, to compare index contents cheaply"""
+    checksum = 0
+    for doc_id in ids:
+        digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+        checksum = (checksum + int.from_bytes(digest, "little")) & 0xFFFFFFFFFFFFFFFF
+    return checksum
+
+
 class BaseVectorRepository(ABC):
     @abstractmethod
     def add(self, documents: List[VectorDocument]) -> None:
@@ -23,6 +33,12 @@ class BaseVectorRepository(ABC):
     def search(self, query_vector: List[float], limit: int = 5) -> List[VectorDocument]:
         pass
 
+    @abstractmethod
+    def search_with_scores(
+        self, query_vector: List[float], limit: int = 5, where: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        pass
+
 
 class ChromaRepository(BaseVectorRepository):
     def __init__(self, collection_name: str, persist_directory: str = "./chroma_db"):
@@ -80,6 +96,31 @@ class ChromaRepository(BaseVectorRepository):
 
         return documents
 
+    def search_with_scores(
+        self, query_vector: List[float], limit: int = 5, where: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        """
+        Search similar documents, returning cosine similarities
+        """
+        results = self.collection.query(
+            query_embeddings=[query_vector],
+            n_results=limit,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+
+        documents = []
+        for i in range(len(results["ids"][0])):
+            doc = VectorDocument(
+                id=results["ids"][0][i],
+                text=results["documents"][0][i],
+                metadata=results["metadatas"][0][i],
+                embedding=None,
+            )
+            documents.append((doc, 1 - results["distances"][0][i]))
+
+        return documents
+
     def get_by_ids(self, ids: List[str]) -> List[VectorDocument]:
         """
         Retrieve documents by their IDs
@@ -1,12 +1,18 @@
 # lpm_kernel/common/repository/vector_store_factory.py
 
+import atexit
+import os
 from typing import Optional
 from .vector_repository import ChromaRepository, BaseVectorRepository
+from .ann_vector_repository import AnnVectorRepository
+from .exact_vector_repository import ExactVectorRepository
 from lpm_kernel.configs.config import Config
 
 
 class VectorStoreFactory:
     _instance: Optional[BaseVectorRepository] = None
+    _chunk_index: Optional[AnnVectorRepository] = None
+    _exact_chunk_index: Optional[ExactVectorRepository] = None
 
     @classmethod
     def get_instance(cls) -> BaseVectorRepository:
@@ -17,3 +23,46 @@ class VectorStoreFactory:
                 persist_directory=config.CHROMA_PERSIST_DIRECTORY,
             )
         return cls._instance
+
+    @classmethod
+    def get_chunk_index(cls) -> Optional[AnnVectorRepository]:
+        """In-process chunk index, or None when chunks are searched in ChromaDB
+
+        Enabled with VECTOR_STORE_BACKEND=ann. ChromaDB stays the store of record,
+        the index mirrors the document_chunks collection and serves L0 search.
+        """
+        config = Config.from_env()
+        if config.get("VECTOR_STORE_BACKEND", "chroma").lower() != "ann":
+            return None
+        if cls._chunk_index is None:
+            cls._chunk_index = AnnVectorRepository(
+                index_dir=os.path.join(
+                    config.get("ANN_INDEX_DIR", "./data/ann_index"), "document_chunks"
+                ),
+                nlist=int(config.get("ANN_NLIST", "0")),
+                nprobe=int(config.get("ANN_NPROBE", "16")),
+                min_train_size=int(config.get("ANN_MIN_TRAIN_SIZE", "20000")),
+                snapshot_every=int(config.get("ANN_SNAPSHOT_EVERY", "1000")),
+                compact_ratio=float(config.get("ANN_COMPACT_RATIO", "0.25")),
+            )
+            atexit.register(cls._chunk_index.persist)
+        return cls._chunk_index
+
+    @classmethod
+    def get_exact_chunk_index(cls) -> Optional[ExactVectorRepository]:
+        """In-memory exact chunk index, or None when exact search is off
+
+        CHUNK_SEARCH_ENGINE=auto uses it while the corpus has at most
+        EXACT_SEARCH_MAX_CHUNKS chunks, exact uses it regardless of size and
+        index searches the VECTOR_STORE_BACKEND only.
+        """
+        config = Config.from_env()
+        engine = config.get("CHUNK_SEARCH_ENGINE", "auto").lower()
+        if engine not in ("auto", "exact"):
+            return None
+        if cls._exact_chunk_index is None:
+            cls._exact_chunk_index = ExactVectorRepository(
+                max_size=int(config.get("EXACT_SEARCH_MAX_CHUNKS", "50000")) if engine == "auto" else None,
+                dtype=config.get("EXACT_SEARCH_DTYPE", "float32"),
+            )
+        return cls._exact_chunk_index
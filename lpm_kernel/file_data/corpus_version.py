@@ -0,0 +1,68 @@
+"""
+Version of the chunk corpus, changes whenever chunks or their embeddings change
+
+The local counter is bumped by the process that changes chunks. Other processes
+(the async chat server) never see those bumps, so the version also carries a
+fingerprint of the chunk table, re-read at most every
+CORPUS_VERSION_CHECK_INTERVAL seconds.
+"""
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+from lpm_kernel.configs.config import Config
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_version = 0
+_fingerprint: Optional[Tuple] = None
+_checked_at = 0.0
+_check_interval = float(Config.from_env().get("CORPUS_VERSION_CHECK_INTERVAL", "2"))
+
+
+def bump() -> int:
+    """Mark the chunk corpus as changed"""
+    global _version, _checked_at
+    with _lock:
+        _version += 1
+        # re-read the fingerprint on the next current() call
+        _checked_at = 0.0
+        return _version
+
+
+def _read_fingerprint() -> Optional[Tuple]:
+    """(chunk count, max chunk id, embedded chunk count) of the chunk table"""
+    from sqlalchemy import case, func, select
+
+    from lpm_kernel.common.repository.database_session import DatabaseSession
+    from lpm_kernel.file_data.models import ChunkModel
+
+    try:
+        with DatabaseSession.session() as session:
+            row = session.execute(
+                select(
+                    func.count(ChunkModel.id),
+                    func.max(ChunkModel.id),
+                    func.sum(case((ChunkModel.has_embedding, 1), else_=0)),
+                )
+            ).one()
+        return tuple(row)
+    except Exception as e:
+        logger.warning(f"Failed to read the chunk table fingerprint: {str(e)}")
+        return None
+
+
+def current() -> Tuple:
+    """Version of the chunk corpus as seen by this process and by the database"""
+    global _fingerprint, _checked_at
+    now = time.monotonic()
+    with _lock:
+        version = _version
+        if now - _checked_at < _check_interval:
+            return version, _fingerprint
+    fingerprint = _read_fingerprint()
+    with _lock:
+        _fingerprint, _checked_at = fingerprint, now
+        return _version, fingerprint
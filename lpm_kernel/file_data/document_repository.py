@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict
-from sqlalchemy import select
+from typing import List, Optional, Dict, Tuple
+from sqlalchemy import select, insert, delete
 from lpm_kernel.common.repository.base_repository import BaseRepository
 from lpm_kernel.file_data.document import Document
 from lpm_kernel.file_data.process_status import ProcessStatus
@@ -68,6 +68,39 @@ class DocumentRepository(BaseRepository[Document]):
             session.refresh(chunk)
             return chunk
 
+    def replace_chunks(
+        self, document_id: int, chunk_rows: List[Dict]
+    ) -> Tuple[List[int], List[int]]:
+        """replace all chunks of a document in a single transaction
+
+        Args:
+            document_id: doc ID
+            chunk_rows: column values of the new chunks
+
+        Returns:
+            Tuple[List[int], List[int]]: (ids of inserted chunks, ids of removed chunks)
+        """
+        with self._db.session() as session:
+            removed_ids = list(
+                session.scalars(
+                    select(ChunkModel.id).where(ChunkModel.document_id == document_id)
+                ).all()
+            )
+            if removed_ids:
+                session.execute(
+                    delete(ChunkModel).where(ChunkModel.document_id == document_id)
+                )
+
+            inserted_ids = []
+            if chunk_rows:
+                inserted_ids = list(
+                    session.scalars(
+                        insert(ChunkModel).returning(ChunkModel.id), chunk_rows
+                    ).all()
+                )
+            session.commit()
+            return inserted_ids, removed_ids
+
     def find_one(self, document_id: int) -> Optional[DocumentDTO]:
         """search doc by id"""
         with self._db.session() as session:
@@ -91,6 +124,25 @@ class DocumentRepository(BaseRepository[Document]):
             logger.error(f"Error updating chunk embedding status: {str(e)}")
             raise
 
+    def update_chunks_embedding_status(
+        self, chunk_ids: List[int], has_embedding: bool
+    ) -> None:
+        """update embedding status of many chunks in one statement"""
+        if not chunk_ids:
+            return
+        try:
+            with self._db.session() as session:
+                updated = (
+                    session.query(ChunkModel)
+                    .filter(ChunkModel.id.in_(chunk_ids))
+                    .update({ChunkModel.has_embedding: has_embedding}, synchronize_session=False)
+                )
+                session.commit()
+                logger.debug(f"Updated embedding status for {updated} chunks")
+        except Exception as e:
+            logger.error(f"Error updating chunks embedding status: {str(e)}")
+            raise
+
     def find_unembedding(self) -> List[DocumentDTO]:
         """search unembedding documents according to embedding_status"""
         with self._db.session() as session:
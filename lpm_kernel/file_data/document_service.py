@@ -15,6 +15,8 @@ from .document import Document
 from .document_repository import DocumentRepository
 from .dto.chunk_dto import ChunkDTO
 from .embedding_service import EmbeddingService
+from . import corpus_version
+from .lexical_index import chunk_lexical_index
 from .process_factory import ProcessorFactory
 from .process_status import ProcessStatus
 
@@ -381,9 +383,10 @@ class DocumentService:
             )
 
             # update state in db
-            for chunk_dto in processed_chunks:
-                if chunk_dto.has_embedding:
-                    self._repository.update_chunk_embedding_status(chunk_dto.id, True)
+            self._repository.update_chunks_embedding_status(
+                [chunk_dto.id for chunk_dto in processed_chunks if chunk_dto.has_embedding],
+                True,
+            )
 
             return processed_chunks
 
@@ -593,11 +596,9 @@ class DocumentService:
             # 6. delete all chunk embedding from ChromaDB
             if chunks:
                 try:
-                    chunk_ids = [str(chunk.id) for chunk in chunks]
-                    self.embedding_service.chunk_collection.delete(
-                        ids=chunk_ids
+                    self.embedding_service.delete_chunk_embeddings(
+                        [chunk.id for chunk in chunks]
                     )
-                    logger.info(f"Deleted {len(chunk_ids)} chunk embeddings from ChromaDB")
                 except Exception as e:
                     logger.error(f"Error deleting chunk embeddings: {str(e)}")
             
@@ -608,6 +609,8 @@ class DocumentService:
                     ChunkModel.document_id == document_id
                 ).delete()
                 session.commit()
+                corpus_version.bump()
+                chunk_lexical_index.remove_document(document_id)
                 logger.info(f"Deleted all related chunks")
                 
                 # delete doc record
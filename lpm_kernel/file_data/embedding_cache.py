@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Union
+
+import numpy as np
+from sqlalchemy import select, update, delete, func, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from lpm_kernel.common.llm import LLMClient
+from lpm_kernel.common.repository.database_session import DatabaseSession
+from lpm_kernel.configs.config import Config
+from lpm_kernel.models.embedding_cache import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# keep IN (...) lists below SQLite's host parameter limit
+_SQL_BATCH_SIZE = 500
+# stores between exact row counts, other processes' inserts are only seen then
+_RECOUNT_EVERY = 100
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivial differences share one entry"""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (embedding model, text hash)
+
+    Sits in front of LLMClient.get_embedding: cached vectors are read from the
+    embedding_cache table, only misses are sent to the embedding endpoint.
+    Entries are evicted least recently used first once the table exceeds
+    EMBEDDING_CACHE_MAX_ENTRIES. The row count is tracked in memory and only
+    re-read from the table when it may exceed the cap or every _RECOUNT_EVERY
+    stores.
+    """
+
+    _table_ready = False
+    _count_lock = threading.Lock()
+    # estimated rows in the table (an upper bound since the last count), None before the first count
+    _entry_count = None
+    _stores_since_count = 0
+
+    def __init__(self, llm_client: LLMClient = None):
+        config = Config.from_env()
+        self.llm_client = llm_client or LLMClient()
+        self.enabled = config.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = int(config.get("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _ensure_table(cls) -> None:
+        """Create the cache table for databases initialized before it existed"""
+        if not cls._table_ready:
+            DatabaseSession.initialize()
+            EmbeddingCacheEntry.__table__.create(
+                bind=DatabaseSession._engine, checkfirst=True
+            )
+            cls._table_ready = True
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters of this cache instance"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def get_embedding(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Get embeddings for texts, calling the embedding endpoint only for misses
+
+        Args:
+            texts (str or list): Input text or list of texts
+
+        Returns:
+            numpy.ndarray: Embedding vectors in the same order as texts
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not self.enabled or not texts:
+            return self.llm_client.get_embedding(texts)
+
+        user_llm_config = self.llm_client.embedding_client.get_llm_config()
+        if not user_llm_config:
+            raise Exception("No LLM configuration found")
+        model_name = user_llm_config.embedding_model_name or ""
+
+        hashes = [text_hash(text) for text in texts]
+        try:
+            cached = self._load(model_name, hashes)
+        except Exception as e:
+            logger.warning(f"Failed to read embedding cache: {str(e)}")
+            cached = {}
+
+        # embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for text, h in zip(texts, hashes):
+            if h not in cached and h not in missing:
+                missing[h] = text
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        if missing:
+            embeddings = self.llm_client.get_embedding(list(missing.values()))
+            if embeddings is None or len(embeddings) != len(missing):
+                raise Exception("Embedding service returned an unexpected number of vectors")
+            new_entries = {
+                h: np.asarray(embedding, dtype=np.float32)
+                for h, embedding in zip(missing.keys(), embeddings)
+            }
+            self._store(model_name, new_entries)
+            cached.update(new_entries)
+
+        logger.info(
+            f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses"
+        )
+        return np.array([cached[h] for h in hashes])
+
+    def _load(self, model_name: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Read cached vectors and refresh their access time"""
+        self._ensure_table()
+        found = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        with DatabaseSession.session() as session:
+            for i in range(0, len(unique_hashes), _SQL_BATCH_SIZE):
+                batch = unique_hashes[i : i + _SQL_BATCH_SIZE]
+                rows = session.execute(
+                    select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding)
+                    .where(EmbeddingCacheEntry.model_name == model_name)
+                    .where(EmbeddingCacheEntry.text_hash.in_(batch))
+                ).all()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    session.execute(
+                        update(EmbeddingCacheEntry)
+                        .where(EmbeddingCacheEntry.model_name == model_name)
+                        .where(EmbeddingCacheEntry.text_hash.in_([h for h, _ in rows]))
+                        .values(last_access_time=datetime.now())
+                    )
+        return found
+
+    def _store(self, model_name: str, entries: Dict[str, np.ndarray]) -> None:
+        """Insert new vectors and evict least recently used entries over the cap"""
+        now = datetime.now()
+        try:
+            self._ensure_table()
+            stmt = sqlite_insert(EmbeddingCacheEntry)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["model_name", "text_hash"],
+                set_={
+                    "dimension": stmt.excluded.dimension,
+                    "embedding": stmt.excluded.embedding,
+                    "last_access_time": stmt.excluded.last_access_time,
+                },
+            )
+            with DatabaseSession.session() as session:
+                session.execute(
+                    stmt,
+                    [
+                        {
+                            "model_name": model_name,
+                            "text_hash": h,
+                            "dimension": embedding.shape[0],
+                            "embedding": embedding.tobytes(),
+                            "last_access_time": now,
+                        }
+                        for h, embedding in entries.items()
+                    ],
+                )
+
+                cls = type(self)
+                with cls._count_lock:
+                    cls._stores_since_count += 1
+                    if cls._entry_count is not None:
+                        # conflicting rows are updated, not added, so this over-counts
+                        cls._entry_count += len(entries)
+                    recount = (
+                        cls._entry_count is None
+                        or cls._entry_count > self.max_entries
+                        or cls._stores_since_count >= _RECOUNT_EVERY
+                    )
+                if not recount:
+                    return
+
+                total = session.execute(
+                    select(func.count()).select_from(EmbeddingCacheEntry)
+                ).scalar()
+                overflow = total - self.max_entries
+                if overflow > 0:
+                    # rows are keyed by (model, text hash): the same text may be cached for other models
+                    oldest = (
+                        select(EmbeddingCacheEntry.model_name, EmbeddingCacheEntry.text_hash)
+                        .order_by(EmbeddingCacheEntry.last_access_time.asc())
+                        .limit(overflow)
+                    )
+                    session.execute(
+                        delete(EmbeddingCacheEntry).where(
+                            tuple_(EmbeddingCacheEntry.model_name, EmbeddingCacheEntry.text_hash).in_(oldest)
+                        )
+                    )
+                    logger.info(f"Evicted {overflow} entries from embedding cache")
+                with cls._count_lock:
+                    cls._entry_count = min(total, self.max_entries)
+                    cls._stores_since_count = 0
+        except Exception as e:
+            # a cache write failure must never fail the embedding itself
+            logger.warning(f"Failed to store embeddings in cache: {str(e)}")
@@ -2,20 +2,34 @@ from typing import List, Tuple
 import chromadb
 from chromadb.utils import embedding_functions
 import logging
+import numpy as np
 import os
+import threading
 from .dto.chunk_dto import ChunkDTO
 from lpm_kernel.common.llm import LLMClient
+from lpm_kernel.common.repository.vector_repository import VectorDocument, id_checksum
+from lpm_kernel.common.repository.vector_store_factory import VectorStoreFactory
+from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data import corpus_version
+from lpm_kernel.file_data.embedding_cache import EmbeddingCache
 from lpm_kernel.file_data.document_dto import DocumentDTO
 from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# one background rebuild per shared chunk index at a time
+_chunk_index_sync_lock = threading.Lock()
+_chunk_index_syncing = set()
+
 
 class EmbeddingService:
     def __init__(self):
         chroma_path = os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chroma_db")
         self.client = chromadb.PersistentClient(path=chroma_path)
         self.llm_client = LLMClient()
+        self.embedding_cache = EmbeddingCache(self.llm_client)
+        # "bulk": verify stored ids with one read-back, "none": trust the add call
+        self.verify_mode = Config.from_env().get("EMBEDDING_VERIFY_MODE", "bulk").lower()
 
         # document level collection
         self.document_collection = self.client.get_or_create_collection(
@@ -27,6 +41,10 @@ class EmbeddingService:
             name="document_chunks", metadata={"hnsw:space": "cosine", "dimension": 1536}
         )
 
+        # optional in-process indexes mirroring chunk_collection for search
+        self.chunk_index = VectorStoreFactory.get_chunk_index()
+        self.exact_chunk_index = VectorStoreFactory.get_exact_chunk_index()
+
     def generate_document_embedding(self, document: DocumentDTO) -> List[float]:
         """Process document level embedding and store in ChromaDB"""
         try:
@@ -38,7 +56,7 @@ class EmbeddingService:
 
             # get embedding
             logger.info(f"Generating embedding for document {document.id}")
-            embeddings = self.llm_client.get_embedding([document.raw_content])
+            embeddings = self.embedding_cache.get_embedding([document.raw_content])
 
             if embeddings is None or len(embeddings) == 0:
                 logger.error(f"Failed to get embedding for document {document.id}")
@@ -69,10 +87,10 @@ class EmbeddingService:
                 logger.info(f"Successfully stored embedding for document {document.id}")
 
                 # verify embedding storage
-                result = self.document_collection.get(
-                    ids=[str(document.id)], include=["embeddings"]
+                stored_ids = self._verify_stored_ids(
+                    self.document_collection, [str(document.id)]
                 )
-                if not result or not result["embeddings"]:
+                if str(document.id) not in stored_ids:
                     logger.error(
                         f"Failed to verify embedding storage for document {document.id}"
                     )
@@ -115,7 +133,7 @@ class EmbeddingService:
 
             contents = [c.content for c in unprocessed_chunks]
             logger.info("Getting embeddings from LLM service... {}".format(contents))
-            embeddings = self.llm_client.get_embedding(contents)
+            embeddings = self.embedding_cache.get_embedding(contents)
 
             if embeddings is None or len(embeddings) == 0:
                 logger.error("Failed to get embeddings from LLM service")
@@ -139,20 +157,21 @@ class EmbeddingService:
                     ],
                 )
                 logger.info("Successfully added embeddings to ChromaDB")
+                self._add_to_chunk_index(unprocessed_chunks, embeddings)
 
                 # verify embeddings storage
+                stored_ids = self._verify_stored_ids(
+                    self.chunk_collection, [str(c.id) for c in unprocessed_chunks]
+                )
                 for chunk in unprocessed_chunks:
-                    result = self.chunk_collection.get(
-                        ids=[str(chunk.id)], include=["embeddings"]
-                    )
-                    if result and result["embeddings"]:
-                        chunk.has_embedding = True
-                        logger.info(f"Verified embedding for chunk {chunk.id}")
-                    else:
+                    chunk.has_embedding = str(chunk.id) in stored_ids
+                    if not chunk.has_embedding:
                         logger.warning(
                             f"Failed to verify embedding for chunk {chunk.id}"
                         )
-                        chunk.has_embedding = False
+                logger.info(
+                    f"Verified {len(stored_ids)}/{len(unprocessed_chunks)} chunk embeddings"
+                )
 
             except Exception as e:
                 logger.error(f"Error storing embeddings in ChromaDB: {str(e)}", exc_info=True)
@@ -166,6 +185,154 @@ class EmbeddingService:
             logger.error(f"Error processing chunk embeddings: {str(e)}", exc_info=True)
             raise
 
+    def _verify_stored_ids(self, collection, ids: List[str]) -> set:
+        """Return the subset of ids that are present in the collection
+
+        Issues a single ids-only read-back instead of one get per id, or skips
+        the read-back entirely when EMBEDDING_VERIFY_MODE is "none".
+        """
+        if self.verify_mode == "none":
+            return set(ids)
+
+        result = collection.get(ids=ids, include=[])
+        if not result or not result["ids"]:
+            return set()
+        return set(result["ids"])
+
+    def delete_chunk_embeddings(self, chunk_ids: List[int]) -> None:
+        """Remove embeddings of deleted chunks from ChromaDB"""
+        if not chunk_ids:
+            return
+        ids = [str(chunk_id) for chunk_id in chunk_ids]
+        self.chunk_collection.delete(ids=ids)
+        logger.info(f"Deleted {len(chunk_ids)} chunk embeddings from ChromaDB")
+        corpus_version.bump()
+        for index in self._chunk_indexes():
+            index.delete(ids)
+
+    def _chunk_indexes(self) -> list:
+        return [index for index in (self.exact_chunk_index, self.chunk_index) if index is not None]
+
+    def _add_to_chunk_index(self, chunks: List[ChunkDTO], embeddings) -> None:
+        """Mirror newly stored chunk embeddings into the in-process indexes"""
+        corpus_version.bump()
+        documents = [
+            VectorDocument(
+                id=str(c.id),
+                text=c.content,
+                metadata={
+                    "document_id": str(c.document_id),
+                    "topic": c.topic or "",
+                    "tags": ",".join(c.tags) if c.tags else "",
+                },
+                embedding=embedding,
+            )
+            for c, embedding in zip(chunks, embeddings)
+        ]
+        for index in self._chunk_indexes():
+            try:
+                index.add(documents)
+            except Exception as e:
+                # ChromaDB has the embeddings, the index is rebuilt from it on next use
+                logger.error(f"Error adding embeddings to chunk index: {str(e)}")
+                index.synced = False
+
+    def _select_chunk_index(self):
+        """Pick the in-process index serving a search, None to search ChromaDB
+
+        The exact index is preferred while the corpus fits in it. The first call
+        mirrors chunk_collection into each index in the background, until that
+        is done, and if it fails, the next backend is used.
+        """
+        exact = self.exact_chunk_index
+        if exact is not None and self._index_ready(exact) and not exact.overflow:
+            return exact
+        if self.chunk_index is not None and self._index_ready(self.chunk_index):
+            return self.chunk_index
+        return None
+
+    def _index_ready(self, index) -> bool:
+        """Whether the index can serve searches, starting a background sync if not
+
+        Other processes (the async chat server) change chunks without touching
+        this process's indexes, so a synced index is re-validated against the
+        chunk table fingerprint of corpus_version, read at most every
+        CORPUS_VERSION_CHECK_INTERVAL seconds, and resynced when it moved.
+        """
+        if index.synced:
+            fingerprint = corpus_version.current()[1]
+            if fingerprint is None or fingerprint == index.synced_fingerprint:
+                return True
+            logger.info(f"Chunk table changed, resyncing {type(index).__name__}")
+            index.synced = False
+        with _chunk_index_sync_lock:
+            if id(index) not in _chunk_index_syncing:
+                _chunk_index_syncing.add(id(index))
+                threading.Thread(target=self._sync_chunk_index, args=(index,), daemon=True).start()
+        return False
+
+    def _collection_id_checksum(self, total: int, page_size: int = 50000) -> int:
+        """id_checksum of chunk_collection, read page by page without embeddings"""
+        ids = []
+        for offset in range(0, total, page_size):
+            ids.extend(self.chunk_collection.get(include=[], limit=page_size, offset=offset)["ids"])
+        return id_checksum(ids)
+
+    def _sync_chunk_index(self, index) -> None:
+        """Rebuild an index from ChromaDB unless it already holds the same ids
+
+        Counts are compared first; equal counts are confirmed with an id checksum,
+        since a snapshot written by another process can hold as many but different ids.
+        """
+        try:
+            # read before the collection, so changes made during the sync trigger another one
+            fingerprint = corpus_version.current()[1]
+            total = self.chunk_collection.count()
+            if index is self.exact_chunk_index and not index.fits(total):
+                index.set_overflow()
+            elif index.count() != total or (
+                total and index.id_checksum() != self._collection_id_checksum(total)
+            ):
+                logger.info(f"Rebuilding {type(index).__name__} from ChromaDB ({total} chunks)")
+                index.clear()
+                if index is self.chunk_index:
+                    # one snapshot at the end instead of one every ANN_SNAPSHOT_EVERY rows
+                    snapshot_every, index.snapshot_every = index.snapshot_every, 0
+                    try:
+                        self._copy_collection_to_index(index, total, page_size=5000)
+                    finally:
+                        index.snapshot_every = snapshot_every
+                    index.save()
+                else:
+                    self._copy_collection_to_index(index, total, page_size=5000)
+            index.synced_fingerprint = fingerprint
+            index.synced = True
+            logger.info(f"{type(index).__name__} ready with {index.count()} vectors")
+        except Exception as e:
+            logger.error(f"{type(index).__name__} unavailable: {str(e)}")
+        finally:
+            with _chunk_index_sync_lock:
+                _chunk_index_syncing.discard(id(index))
+
+    def _copy_collection_to_index(self, index, total: int, page_size: int) -> None:
+        for offset in range(0, total, page_size):
+            page = self.chunk_collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            index.add(
+                [
+                    VectorDocument(
+                        id=page["ids"][i],
+                        text=page["documents"][i],
+                        metadata=page["metadatas"][i],
+                        embedding=page["embeddings"][i],
+                    )
+                    for i in range(len(page["ids"]))
+                ]
+            )
+
     def get_chunk_embedding_by_chunk_id(self, chunk_id: int) -> Optional[List[float]]:
         """Get the corresponding embedding vector by chunk_id
 
@@ -234,14 +401,27 @@ class EmbeddingService:
             )
             raise
 
+    @staticmethod
+    def _chunk_from_vector_document(doc: VectorDocument) -> ChunkDTO:
+        tags = doc.metadata.get("tags", "")
+        return ChunkDTO(
+            id=int(doc.id),
+            document_id=int(doc.metadata["document_id"]),
+            content=doc.text,
+            topic=doc.metadata.get("topic", ""),
+            tags=tags.split(",") if tags else [],
+            has_embedding=True,
+        )
+
     def search_similar_chunks(
-        self, query: str, limit: int = 5
+        self, query: str, limit: int = 5, query_embedding=None
     ) -> List[Tuple[ChunkDTO, float]]:
         """Search similar chunks, return list of ChunkDTO objects and their similarity scores
 
         Args:
             query (str): query text
             limit (int, optional): return result limit. Defaults to 5.
+            query_embedding (optional): precomputed embedding of the query, embedded here if not given
 
         Returns:
             List[Tuple[ChunkDTO, float]]: return list of (ChunkDTO, similarity score), sorted by similarity score in descending order
@@ -258,13 +438,24 @@ class EmbeddingService:
                 raise ValueError("Limit must be positive")
 
             # calculate query text embedding
-            query_embedding = self.llm_client.get_embedding([query])
-            if query_embedding is None or len(query_embedding) == 0:
-                raise Exception("Failed to generate embedding for query")
+            if query_embedding is None:
+                embeddings = self.embedding_cache.get_embedding([query])
+                if embeddings is None or len(embeddings) == 0:
+                    raise Exception("Failed to generate embedding for query")
+                query_embedding = embeddings[0]
+
+            index = self._select_chunk_index()
+            if index is not None:
+                return [
+                    (self._chunk_from_vector_document(doc), similarity)
+                    for doc, similarity in index.search_with_scores(
+                        query_embedding, limit=limit
+                    )
+                ]
 
             # query ChromaDB
             results = self.chunk_collection.query(
-                query_embeddings=[query_embedding[0].tolist()],
+                query_embeddings=[np.asarray(query_embedding).tolist()],
                 n_results=limit,
                 include=["documents", "metadatas", "distances"],
             )
@@ -312,3 +503,35 @@ class EmbeddingService:
         except Exception as e:
             logger.error(f"Error searching similar chunks: {str(e)}")
             raise
+
+    def search_similar_chunks_batch(
+        self, queries: List[str], limit: int = 5, query_embeddings=None
+    ) -> List[List[Tuple[ChunkDTO, float]]]:
+        """Search similar chunks for many queries at once
+
+        With the exact engine all queries are scored in one matrix product,
+        otherwise each query is searched on its own.
+
+        Args:
+            queries (List[str]): query texts
+            limit (int, optional): result limit per query. Defaults to 5.
+            query_embeddings (optional): precomputed embeddings, one per query
+
+        Returns:
+            List[List[Tuple[ChunkDTO, float]]]: per query, (ChunkDTO, similarity score) sorted descending
+        """
+        if not queries:
+            return []
+        if query_embeddings is None:
+            query_embeddings = self.embedding_cache.get_embedding(queries)
+
+        index = self._select_chunk_index()
+        if index is not None and index is self.exact_chunk_index:
+            return [
+                [(self._chunk_from_vector_document(doc), similarity) for doc, similarity in results]
+                for results in index.search_batch(query_embeddings, limit=limit)
+            ]
+        return [
+            self.search_similar_chunks(query, limit=limit, query_embedding=embedding)
+            for query, embedding in zip(queries, query_embeddings)
+        ]
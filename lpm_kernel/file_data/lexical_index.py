@@ -0,0 +1,258 @@
+"""
+In-memory BM25 inverted index over chunk content
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from lpm_kernel.common.repository.database_session import DatabaseSession
+from lpm_kernel.file_data import corpus_version
+from lpm_kernel.file_data.dto.chunk_dto import ChunkDTO
+from lpm_kernel.file_data.models import ChunkModel
+
+logger = logging.getLogger(__name__)
+
+# latin words / digits, or runs of CJK characters
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased latin words, CJK runs split into character bigrams"""
+    tokens = []
+    for match in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if match[0].isascii():
+            tokens.append(match)
+        elif len(match) == 1:
+            tokens.append(match)
+        else:
+            tokens.extend(match[i : i + 2] for i in range(len(match) - 1))
+    return tokens
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[List[Hashable]], k: int = 60
+) -> Dict[Hashable, float]:
+    """Fuse ranked lists, an item scores sum(1 / (k + rank)) over the lists it is in"""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+class ChunkLexicalIndex:
+    """BM25 index over ChunkModel.content, kept in memory
+
+    Loaded from the chunk table in the background on first use, then kept up to
+    date per document by index_document/remove_document as chunks are saved or
+    deleted. Chunks changed by another process are picked up when the chunk
+    table fingerprint of corpus_version moves: documents whose chunk count or
+    newest chunk id differ from the index are re-indexed. Searching needs no
+    network round trip.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loading = False
+        self._dirty_documents: set = set()
+        # corpus_version fingerprint of the chunk table the index reflects
+        self._fingerprint = None
+        self._refresh_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._chunks: Dict[int, ChunkDTO] = {}
+        self._document_chunks: Dict[int, List[int]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def _add(self, chunk: ChunkDTO) -> None:
+        counts = Counter(tokenize(chunk.content or ""))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[chunk.id] = tf
+        length = sum(counts.values())
+        self._lengths[chunk.id] = length
+        self._total_length += length
+        self._chunks[chunk.id] = chunk
+        self._document_chunks.setdefault(chunk.document_id, []).append(chunk.id)
+
+    def _remove_document(self, document_id: int) -> None:
+        for chunk_id in self._document_chunks.pop(document_id, []):
+            chunk = self._chunks.pop(chunk_id)
+            for term in set(tokenize(chunk.content or "")):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(chunk_id, 0)
+
+    @staticmethod
+    def _query_chunks(document_ids: Optional[List[int]] = None) -> List[ChunkDTO]:
+        with DatabaseSession.session() as session:
+            stmt = select(ChunkModel)
+            if document_ids is not None:
+                stmt = stmt.where(ChunkModel.document_id.in_(document_ids))
+            return [chunk.to_dto() for chunk in session.scalars(stmt).all()]
+
+    def load(self) -> None:
+        """Build the index from the chunk table"""
+        with self._lock:
+            self._loading = True
+            self._dirty_documents.clear()
+        try:
+            fingerprint = corpus_version.current()[1]
+            chunks = self._query_chunks()
+            with self._lock:
+                self._fingerprint = fingerprint
+                self._reset()
+                for chunk in chunks:
+                    self._add(chunk)
+                # documents re-chunked while the table was being read
+                dirty, self._dirty_documents = list(self._dirty_documents), set()
+                self._loaded = True
+            if dirty:
+                self.index_document(*dirty)
+            logger.info(f"Lexical index loaded with {len(chunks)} chunks")
+        except Exception as e:
+            logger.error(f"Failed to load lexical index: {str(e)}")
+        finally:
+            with self._lock:
+                self._loading = False
+
+    @staticmethod
+    def _query_document_signatures() -> Dict[int, Tuple[int, int]]:
+        """document id -> (chunk count, newest chunk id) from the chunk table"""
+        with DatabaseSession.session() as session:
+            rows = session.execute(
+                select(ChunkModel.document_id, func.count(ChunkModel.id), func.max(ChunkModel.id))
+                .group_by(ChunkModel.document_id)
+            ).all()
+        return {document_id: (count, max_id) for document_id, count, max_id in rows}
+
+    def refresh_if_changed(self) -> None:
+        """Re-index documents changed by other processes since the index was last synced"""
+        fingerprint = corpus_version.current()[1]
+        with self._lock:
+            if not self._loaded or fingerprint is None or fingerprint == self._fingerprint:
+                return
+        # one refresh at a time, concurrent searches use the index as it is
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            signatures = self._query_document_signatures()
+            with self._lock:
+                indexed = {
+                    document_id: (len(chunk_ids), max(chunk_ids))
+                    for document_id, chunk_ids in self._document_chunks.items()
+                    if chunk_ids
+                }
+            changed = [
+                document_id
+                for document_id in set(signatures) | set(indexed)
+                if signatures.get(document_id) != indexed.get(document_id)
+            ]
+            if changed:
+                logger.info(f"Chunk table changed, re-indexing {len(changed)} documents")
+                self.index_document(*changed)
+            with self._lock:
+                self._fingerprint = fingerprint
+        except Exception as e:
+            logger.error(f"Failed to refresh lexical index: {str(e)}")
+        finally:
+            self._refresh_lock.release()
+
+    def ensure_loaded(self) -> bool:
+        """Start loading in the background if needed, return whether the index is ready"""
+        with self._lock:
+            if self._loaded:
+                return True
+            if not self._loading:
+                self._loading = True
+                threading.Thread(target=self.load, daemon=True).start()
+        return False
+
+    def index_document(self, *document_ids: int) -> None:
+        """Re-read the chunks of documents from the database and replace their entries"""
+        with self._lock:
+            if self._loading and not self._loaded:
+                self._dirty_documents.update(document_ids)
+                return
+            if not self._loaded:
+                return
+        chunks = self._query_chunks(list(document_ids))
+        with self._lock:
+            for document_id in document_ids:
+                self._remove_document(document_id)
+            for chunk in chunks:
+                self._add(chunk)
+
+    def remove_document(self, document_id: int) -> None:
+        with self._lock:
+            if self._loading and not self._loaded:
+                self._dirty_documents.add(document_id)
+            self._remove_document(document_id)
+
+    def idf(self, terms: Iterable[str]) -> Dict[str, float]:
+        """BM25 IDF of the terms that occur in the index, empty while the index is still loading"""
+        if not self.ensure_loaded():
+            return {}
+        with self._lock:
+            n = len(self._lengths)
+            weights = {}
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if postings:
+                    weights[term] = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            return weights
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[ChunkDTO, float]]:
+        """
+        Rank chunks by BM25 score
+
+        Args:
+            query: query text
+            limit: maximum number of results
+
+        Returns:
+            List[Tuple[ChunkDTO, float]]: (chunk, BM25 score) sorted by score descending,
+            empty while the index is still loading
+        """
+        if not self.ensure_loaded():
+            return []
+        self.refresh_if_changed()
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._lengths)
+            if not n or not terms:
+                return []
+            avg_length = self._total_length / n
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(self._chunks[chunk_id], score) for chunk_id, score in top]
+
+
+chunk_lexical_index = ChunkLexicalIndex()
@@ -26,6 +26,7 @@ from lpm_kernel.configs.config import Config
 from lpm_kernel.file_data.chunker import DocumentChunker
 from lpm_kernel.kernel.l1.l1_manager import generate_l1_from_l0
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from ..api.domains.trainprocess.progress import TrainProgress, Status, Step, Status
 import gc
 
@@ -65,6 +66,41 @@ class ProcessStep(Enum):
             cls.CONVERT_MODEL,
         ]
         
+    @classmethod
+    def get_dependencies(cls) -> Dict["ProcessStep", List["ProcessStep"]]:
+        """Get the steps each step needs to be completed before it can start"""
+        return {
+            cls.MODEL_DOWNLOAD: [],
+            cls.LIST_DOCUMENTS: [cls.MODEL_DOWNLOAD],
+            cls.GENERATE_DOCUMENT_EMBEDDINGS: [cls.LIST_DOCUMENTS],
+            cls.CHUNK_DOCUMENT: [cls.GENERATE_DOCUMENT_EMBEDDINGS],
+            cls.CHUNK_EMBEDDING: [cls.CHUNK_DOCUMENT],
+            cls.EXTRACT_DIMENSIONAL_TOPICS: [cls.CHUNK_EMBEDDING],
+            cls.MAP_ENTITY_NETWORK: [cls.EXTRACT_DIMENSIONAL_TOPICS],
+            # preference QA only needs the topics, self QA only the bio
+            cls.DECODE_PREFERENCE_PATTERNS: [cls.EXTRACT_DIMENSIONAL_TOPICS],
+            cls.REINFORCE_IDENTITY: [cls.EXTRACT_DIMENSIONAL_TOPICS],
+            # diversity data needs the GraphRAG entity map
+            cls.AUGMENT_CONTENT_RETENTION: [cls.MAP_ENTITY_NETWORK],
+            cls.TRAIN: [
+                cls.DECODE_PREFERENCE_PATTERNS,
+                cls.REINFORCE_IDENTITY,
+                cls.AUGMENT_CONTENT_RETENTION,
+            ],
+            cls.MERGE_WEIGHTS: [cls.TRAIN],
+            cls.CONVERT_MODEL: [cls.MERGE_WEIGHTS],
+        }
+
+    @classmethod
+    def get_l2_data_steps(cls) -> List["ProcessStep"]:
+        """Get the steps that use the prepared L2 data"""
+        return [
+            cls.MAP_ENTITY_NETWORK,
+            cls.DECODE_PREFERENCE_PATTERNS,
+            cls.REINFORCE_IDENTITY,
+            cls.AUGMENT_CONTENT_RETENTION,
+        ]
+        
     def get_method_name(self) -> str:
         """Get the corresponding method name for this step"""
         # Map from step value to method name
@@ -99,6 +135,10 @@ class Progress:
         self.progress = TrainProgress()
         self.progress_callback = progress_callback
         self.logger = logging.getLogger(__name__)
+        # step name -> ids of documents already processed by that step
+        self.completed_documents: Dict[str, set] = {}
+        # steps of the training DAG may update progress from several threads
+        self._lock = threading.RLock()
         self._load_progress()
 
     def _load_progress(self):
@@ -134,6 +174,12 @@ class Progress:
                                             step_data.get("progress", None)
                                         )
                     
+                    # Restore per-document completion of document level steps
+                    self.completed_documents = {
+                        step_name: set(doc_ids)
+                        for step_name, doc_ids in saved_progress.get("completed_documents", {}).items()
+                    }
+
                     # Restore overall progress
                     if "overall_progress" in saved_progress:
                         self.progress.overall_progress = saved_progress["overall_progress"]
@@ -150,12 +196,23 @@ class Progress:
 
     def _save_progress(self):
         """Save progress"""
-        progress_dict = self.progress.to_dict()
-        with open(self.progress_file, "w") as f:
-            json.dump(progress_dict, f, indent=2)
-        if self.progress_callback:
-            self.progress_callback(progress_dict)
-        self._load_progress()
+        with self._lock:
+            progress_dict = self.progress.to_dict()
+            with open(self.progress_file, "w") as f:
+                json.dump(
+                    {
+                        **progress_dict,
+                        "completed_documents": {
+                            step_name: sorted(doc_ids)
+                            for step_name, doc_ids in self.completed_documents.items()
+                        },
+                    },
+                    f,
+                    indent=2,
+                )
+            if self.progress_callback:
+                self.progress_callback(progress_dict)
+            self._load_progress()
 
     def _get_stage_and_step(self, step: ProcessStep) -> tuple:
         """Get the stage and step name corresponding to the step"""
@@ -191,11 +248,26 @@ class Progress:
         step_info = stage.steps.get(step_name)
         return step_info and step_info.completed
 
+    def get_completed_documents(self, step: ProcessStep) -> set:
+        """Get ids of documents already processed by a document level step"""
+        return set(self.completed_documents.get(step.value, set()))
+
+    def mark_documents_completed(self, step: ProcessStep, document_ids: List[int]):
+        """Record a batch of documents processed by a document level step"""
+        if not document_ids:
+            return
+        with self._lock:
+            self.completed_documents.setdefault(step.value, set()).update(document_ids)
+            self._save_progress()
+
     def mark_step_completed(self, step: ProcessStep):
         """Mark a step as completed"""
         stage_name, step_name = self._get_stage_and_step(step)
-        self.progress.update_progress(stage_name, step_name, Status.COMPLETED)
-        self._save_progress()
+        with self._lock:
+            self.progress.update_progress(stage_name, step_name, Status.COMPLETED)
+            # per-document records are only needed to resume an unfinished step
+            self.completed_documents.pop(step.value, None)
+            self._save_progress()
         if self.progress_callback:
             self.progress_callback({
                 "stage": stage_name,
@@ -206,8 +278,9 @@ class Progress:
     def mark_step_failed(self, step: ProcessStep):
         """Mark a step as failed"""
         stage_name, step_name = self._get_stage_and_step(step)
-        self.progress.update_progress(stage_name, step_name, Status.FAILED)
-        self._save_progress()
+        with self._lock:
+            self.progress.update_progress(stage_name, step_name, Status.FAILED)
+            self._save_progress()
         if self.progress_callback:
             self.progress_callback({
                 "stage": stage_name,
@@ -218,8 +291,9 @@ class Progress:
     def mark_step_in_progress(self, step: ProcessStep):
         """Mark a step as in progress"""
         stage_name, step_name = self._get_stage_and_step(step)
-        self.progress.update_progress(stage_name, step_name, Status.IN_PROGRESS)
-        self._save_progress()
+        with self._lock:
+            self.progress.update_progress(stage_name, step_name, Status.IN_PROGRESS)
+            self._save_progress()
         if self.progress_callback:
             self.progress_callback({
                 "stage": stage_name,
@@ -230,6 +304,7 @@ class Progress:
     def reset_progress(self):
         """Reset all progress"""
         self.progress = TrainProgress()
+        self.completed_documents = {}
         self._save_progress()
         if self.progress_callback:
             self.progress_callback({
@@ -286,6 +361,8 @@ class TrainProcessService:
                 "config_path": None
             }
             self.l2_data_prepared = False
+            # L2 data steps run in parallel and share the prepared data
+            self._l2_data_lock = threading.Lock()
         
         # Update callback function
         if progress_callback is not None:
@@ -314,25 +391,86 @@ class TrainProcessService:
             self.progress.mark_step_failed(ProcessStep.LIST_DOCUMENTS)
             return []
 
+    def _run_document_step(self, step: ProcessStep, handler, allow_failures: bool = False) -> bool:
+        """Run a document level step on a bounded worker pool
+
+        Documents are processed independently. Completed documents are recorded
+        in the progress file in batches, so a restarted step only processes the
+        documents that were not finished before.
+
+        Args:
+            step: document level step being executed
+            handler: callable taking a Document, returns True on success
+            allow_failures: if True the step succeeds even when some documents fail
+
+        Returns:
+            bool: True if the step succeeded
+        """
+        config = Config.from_env()
+        max_workers = int(config.get("TRAIN_DOCUMENT_WORKERS", "4"))
+        flush_interval = int(config.get("TRAIN_PROGRESS_FLUSH_INTERVAL", "20"))
+
+        documents = document_service.list_documents()
+        completed = self.progress.get_completed_documents(step)
+        pending = [doc for doc in documents if doc.id not in completed]
+        self.logger.info(
+            f"{step.value}: {len(pending)} documents to process, {len(completed)} already done"
+        )
+
+        failed, finished = [], []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(handler, doc): doc for doc in pending}
+            for future in as_completed(futures):
+                doc = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    self.logger.error(f"{step.value} failed for document {doc.id}: {str(e)}")
+                    success = False
+
+                if success:
+                    finished.append(doc.id)
+                else:
+                    failed.append(doc.id)
+
+                if len(finished) >= flush_interval:
+                    self.progress.mark_documents_completed(step, finished)
+                    finished = []
+
+                if self.is_stopped:
+                    for other in futures:
+                        other.cancel()
+        self.progress.mark_documents_completed(step, finished)
+
+        if self.is_stopped:
+            self.logger.info(f"{step.value} stopped before all documents were processed")
+            return False
+        if failed:
+            self.logger.warning(f"{step.value} failed for documents: {failed}")
+            return allow_failures
+        return True
+
     def generate_document_embeddings(self) -> bool:
         """Process embeddings for all documents"""
         try:
             # Mark step as in progress
             self.progress.mark_step_in_progress(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS)
-            documents = self.list_documents() 
-            for doc in documents:
-                doc_id = doc.get("id")
 
+            def embed_document(doc) -> bool:
                 # Directly call document service instead of API
-                embedding = document_service.process_document_embedding(doc_id)
+                embedding = document_service.process_document_embedding(doc.id)
                 if embedding is None:
                     self.logger.error(
-                        f"Generate document embeddings failed for doc_id: {doc_id}"
+                        f"Generate document embeddings failed for doc_id: {doc.id}"
                     )
-                    self.progress.mark_step_failed(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS)
                     return False
-                self.progress.mark_step_completed(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS)
-                self.logger.info(f"Successfully generated embedding for document {doc_id}") 
+                self.logger.info(f"Successfully generated embedding for document {doc.id}")
+                return True
+
+            if not self._run_document_step(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS, embed_document):
+                self.progress.mark_step_failed(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS)
+                return False
+            self.progress.mark_step_completed(ProcessStep.GENERATE_DOCUMENT_EMBEDDINGS)
             return True
         except Exception as e:
             self.logger.error(f"Generate document embeddings failed: {str(e)}")
@@ -349,30 +487,31 @@ class TrainProcessService:
                 chunk_size=int(config.get("DOCUMENT_CHUNK_SIZE")),
                 overlap=int(config.get("DOCUMENT_CHUNK_OVERLAP")),
             )
-            documents = document_service.list_documents()
-            processed, failed = 0, 0
-
             chunk_service = ChunkService()
-            for doc in documents:
-                try:
-                    if not doc.raw_content:
-                        self.logger.warning(f"Document {doc.id} has no content, skipping...")
-                        failed += 1
-                        continue
-
-                    # Split into chunks and save
-                    chunks = chunker.split(doc.raw_content)
-                    for chunk in chunks:
-                        chunk.document_id = doc.id
-                        chunk_service.save_chunk(chunk)
-
-                    processed += 1
-                    self.logger.info(
-                        f"Document {doc.id} processed: {len(chunks)} chunks created"
-                    )
-                except Exception as e:
-                    self.logger.error(f"Failed to process document {doc.id}: {str(e)}")
-                    failed += 1      
+
+            def chunk_document(doc) -> bool:
+                if not doc.raw_content:
+                    self.logger.warning(f"Document {doc.id} has no content, skipping...")
+                    return False
+
+                # Split into chunks and save them in one transaction,
+                # replacing chunks left over from a previous run
+                chunks = chunker.split(doc.raw_content)
+                _, replaced_ids = chunk_service.save_chunks_bulk(doc.id, chunks)
+                if replaced_ids:
+                    document_service.embedding_service.delete_chunk_embeddings(replaced_ids)
+
+                self.logger.info(
+                    f"Document {doc.id} processed: {len(chunks)} chunks created"
+                )
+                return True
+
+            # documents that fail to chunk are skipped, as before
+            if not self._run_document_step(
+                ProcessStep.CHUNK_DOCUMENT, chunk_document, allow_failures=True
+            ):
+                self.progress.mark_step_failed(ProcessStep.CHUNK_DOCUMENT)
+                return False
             self.progress.mark_step_completed(ProcessStep.CHUNK_DOCUMENT)
             return True
         except Exception as e:
@@ -385,21 +524,17 @@ class TrainProcessService:
         try:
             # Mark step as in progress
             self.progress.mark_step_in_progress(ProcessStep.CHUNK_EMBEDDING)
-            documents = self.list_documents()
-            for doc in documents:
-                doc_id = doc.get("id")
-                try:
-                    # Directly call document service to generate chunk embeddings
-                    processed_chunks = document_service.generate_document_chunk_embeddings(doc_id)
-                    if not processed_chunks:
-                        self.logger.warning(f"No chunks to process for document: {doc_id}")
-                        continue
-                except Exception as e:
-                    self.logger.error(
-                        f"Generate chunk embeddings failed for doc_id: {doc_id}: {str(e)}"
-                    )
-                    self.progress.mark_step_failed(ProcessStep.CHUNK_EMBEDDING)
-                    return False
+
+            def embed_chunks(doc) -> bool:
+                # Directly call document service to generate chunk embeddings
+                processed_chunks = document_service.generate_document_chunk_embeddings(doc.id)
+                if not processed_chunks:
+                    self.logger.warning(f"No chunks to process for document: {doc.id}")
+                return True
+
+            if not self._run_document_step(ProcessStep.CHUNK_EMBEDDING, embed_chunks):
+                self.progress.mark_step_failed(ProcessStep.CHUNK_EMBEDDING)
+                return False
             # All documents' chunks processed successfully
             self.progress.mark_step_completed(ProcessStep.CHUNK_EMBEDDING)
             return True
@@ -487,7 +622,6 @@ class TrainProcessService:
         except Exception as e:
             self.logger.error(f"Map entity network failed: {str(e)}")
             self.progress.mark_step_failed(ProcessStep.MAP_ENTITY_NETWORK)
-            self._cleanup_resources()
             return False
 
     def decode_preference_patterns(self)->bool:
@@ -532,7 +666,7 @@ class TrainProcessService:
             l2_generator = L2Generator(
                 data_path=os.path.join(os.getcwd(), "resources")
                 )  
-            l2_generator.gen_subjective_data(                
+            l2_generator.gen_selfqa_data(
                     self.l2_data["notes"],
                     self.l2_data["basic_info"],
                     self.l2_data["data_output_base_dir"],
@@ -556,10 +690,11 @@ class TrainProcessService:
         self.logger.info("Cleaning up resources to prevent memory leaks")
         
         # Clean up large data structures in l2_data dictionary
-        for key in self.l2_data:
-            self.l2_data[key] = None
-        
-        self.l2_data_prepared = False
+        with self._l2_data_lock:
+            for key in self.l2_data:
+                self.l2_data[key] = None
+            
+            self.l2_data_prepared = False
         
         # Force garbage collection
         gc.collect()
@@ -593,17 +728,11 @@ class TrainProcessService:
             # Mark step as completed
             self.logger.info("Content retention augmentation completed successfully")
             self.progress.mark_step_completed(ProcessStep.AUGMENT_CONTENT_RETENTION)
-            
-            # Clean up resources after completion
-            self._cleanup_resources()
-            
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to augment content retention: {str(e)}")
             self.progress.mark_step_failed(ProcessStep.AUGMENT_CONTENT_RETENTION)
-            # Clean up resources even if there was an error
-            self._cleanup_resources()
             return False
 
     def _prepare_l2_data(self) -> dict:
@@ -619,6 +748,11 @@ class TrainProcessService:
             - graph_path: Path to graph data
             - config_path: Path to config file
         """
+        with self._l2_data_lock:
+            return self._load_l2_data()
+
+    def _load_l2_data(self) -> dict:
+        """Fill the L2 data dictionary unless it is already prepared, caller holds _l2_data_lock"""
         # If data is already prepared, return cached data directly
         if self.l2_data_prepared and all(self.l2_data.values()):
             self.logger.info("Using cached L2 data")
@@ -691,6 +825,11 @@ class TrainProcessService:
         try:
             # Mark step as in progress
             self.progress.mark_step_in_progress(ProcessStep.TRAIN)
+
+            # Merge the data of the L2 data steps, which ran independently
+            L2Generator(data_path=os.path.join(os.getcwd(), "resources")).merge_subjective_data(
+                os.path.join(os.getcwd(), "resources/L2/data")
+            )
             
             # Get paths for the model
             paths = self._get_model_paths(self.model_name)
@@ -1144,49 +1283,79 @@ class TrainProcessService:
                     step = ProcessStep(current_step)
                     self.progress.mark_step_failed(step)
 
+    def _run_step(self, step: ProcessStep) -> bool:
+        """Execute the method of a step, returns True on success"""
+        self.logger.info(f"Starting step: {step.value}")
+        method_name = step.get_method_name()
+        if not hasattr(self, method_name):
+            self.logger.error(f"Method {method_name} not found")
+            return False
+        return getattr(self, method_name)()
+
     def start_process(self) -> bool:
-        """Start training process"""
+        """Start training process
+
+        Steps run as a dependency DAG (see ProcessStep.get_dependencies): every
+        step that is not completed yet starts as soon as its dependencies are,
+        so independent steps such as the L2 data generation steps run in
+        parallel. A failed step stops new steps from starting, steps already
+        running are allowed to finish.
+        """
+        step = None
         try:
             self.is_stopped = False
             # Store the current process PID
             self.current_pid = os.getpid()  # Store the PID
             self.logger.info(f"Training process started with PID: {self.current_pid}")
-            # Get the ordered list of all steps
-            ordered_steps = ProcessStep.get_ordered_steps()
-
-            # Get the last successfully completed step
-            last_successful_step = self.progress.get_last_successful_step()
-            start_index = 0
-            if last_successful_step:
-                start_index = ordered_steps.index(last_successful_step) + 1
-
-            # Start executing from the step after the last successful one
-            for step in ordered_steps[start_index:]:
-                self.current_step = step
-                if self.is_stopped:
-                    self.logger.info("Training process aborted during step")
-                    self.progress.mark_step_failed(step)
-                    break  # If stop is requested, exit the loop
-            
-                self.logger.info(f"Starting step: {step.value}")
+            dependencies = ProcessStep.get_dependencies()
+            l2_data_steps = set(ProcessStep.get_l2_data_steps())
+            max_parallel = int(Config.from_env().get("TRAIN_MAX_PARALLEL_STEPS", "3"))
 
-                # Execute the corresponding method
-                method_name = step.get_method_name()
-                if not hasattr(self, method_name):
-                    self.logger.error(f"Method {method_name} not found")
-                    self.progress.mark_step_failed(step)
-                    return False
+            # Completed steps are skipped, the rest run once their dependencies are done
+            done = {s for s in ProcessStep.get_ordered_steps() if self.progress.is_step_completed(s)}
+            pending = [s for s in ProcessStep.get_ordered_steps() if s not in done]
+            failed = None
+            with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                running = {}
+                while pending or running:
+                    ready = [s for s in pending if all(d in done for d in dependencies[s])]
+                    if ready and failed is None and self.is_stopped:
+                        self.logger.info("Training process aborted during step")
+                        self.progress.mark_step_failed(ready[0])
+                        failed = ready[0]
+                    if failed is None:
+                        for step in ready[: max_parallel - len(running)]:
+                            pending.remove(step)
+                            self.current_step = step
+                            running[executor.submit(self._run_step, step)] = step
+                    if not running:
+                        break
 
-                method = getattr(self, method_name)
-                success = method()
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        step = running.pop(future)
+                        try:
+                            success = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Exception occurred in step {step.value}: {str(e)}")
+                            success = False
+                        if success:
+                            self.logger.info(f"Step {step.value} completed successfully")
+                            done.add(step)
+                        else:
+                            self.logger.error(f"Step {step.value} failed")
+                            self.logger.info(f'Marking step as failed: stage={step.value}, step={step.value}')
+                            self.progress.mark_step_failed(step)
+                            failed = failed or step
 
-                if not success:
-                    self.logger.error(f"Step {step.value} failed")
-                    self.logger.info(f'Marking step as failed: stage={step.value}, step={step.value}')
-                    self.progress.mark_step_failed(step)
-                    return False
-                self.logger.info(f"Step {step.value} completed successfully")
-                # self.progress.mark_step_completed(step)
+                    # free the notes and user data once no L2 data step needs them
+                    if self.l2_data_prepared and not l2_data_steps & (set(pending) | set(running.values())):
+                        self._cleanup_resources()
+
+            if self.l2_data_prepared:
+                self._cleanup_resources()
+            if failed is not None and not self.is_stopped:
+                return False
             if self.is_stopped:
                 self.logger.info("Training process was stopped during a step")
             else:
@@ -1195,7 +1364,8 @@ class TrainProcessService:
             return True
         except Exception as e:
             self.logger.error(f"Exception occurred: {str(e)}")
-            self.progress.mark_step_failed(step)
+            if step is not None:
+                self.progress.mark_step_failed(step)
             return False
 
     def set_retrian_progress(self):
@@ -1,9 +1,13 @@
 # file_data/service.py
 import logging
+from datetime import datetime
+from typing import List, Tuple
 
 from lpm_kernel.L1.bio import Chunk
 from lpm_kernel.common.repository.database_session import DatabaseSession
 from lpm_kernel.file_data.document_repository import DocumentRepository
+from lpm_kernel.file_data import corpus_version
+from lpm_kernel.file_data.lexical_index import chunk_lexical_index
 from lpm_kernel.file_data.models import ChunkModel
 from lpm_kernel.models.l1 import (
     L1Version,
@@ -55,7 +59,8 @@ class ChunkService:
 
     def save_chunk(self, chunk: Chunk) -> None:
         """
-        Save document chunk to database
+        Save document chunk to database, call chunks_changed once the
+        document's chunks are all saved
         Args:
             chunk (Chunk): Chunk object to save
         Raises:
@@ -76,6 +81,52 @@ class ChunkService:
             logger.error(f"Error saving chunk: {str(e)}")
             raise
 
+    def chunks_changed(self, document_id: int) -> None:
+        """
+        Refresh the retrieval caches and lexical index after a document's chunks changed
+        Args:
+            document_id (int): ID of the document whose chunks changed
+        """
+        corpus_version.bump()
+        chunk_lexical_index.index_document(document_id)
+
+    def save_chunks_bulk(
+        self, document_id: int, chunks: List[Chunk]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Save all chunks of a document in one transaction, replacing existing ones
+        Args:
+            document_id (int): ID of the document the chunks belong to
+            chunks (List[Chunk]): Chunk objects to save
+        Returns:
+            Tuple[List[int], List[int]]: (new chunk ids, ids of replaced chunks)
+        Raises:
+            Exception: Error when saving fails
+        """
+        try:
+            chunk_ids, replaced_ids = self._repository.replace_chunks(
+                document_id,
+                [
+                    {
+                        "document_id": document_id,
+                        "content": chunk.content,
+                        "tags": chunk.tags,
+                        "topic": chunk.topic,
+                        "has_embedding": False,
+                        "create_time": datetime.utcnow(),
+                    }
+                    for chunk in chunks
+                ],
+            )
+            self.chunks_changed(document_id)
+            logger.debug(
+                f"Saved {len(chunk_ids)} chunks for document {document_id}, replaced {len(replaced_ids)}"
+            )
+            return chunk_ids, replaced_ids
+        except Exception as e:
+            logger.error(f"Error saving chunks for document {document_id}: {str(e)}")
+            raise
+
 
 # Usage elsewhere:
 # from lpm_kernel.kernel import chunk_service
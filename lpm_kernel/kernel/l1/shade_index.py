@@ -0,0 +1,145 @@
+"""
+Versioned in-memory embedding index of L1 shades
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lpm_kernel.common.llm import LLMClient
+from lpm_kernel.common.repository.database_session import DatabaseSession
+from lpm_kernel.models.l1 import L1Shade, L1Version
+
+logger = logging.getLogger(__name__)
+
+
+def shade_to_text(shade: Dict) -> str:
+    """Build the text that represents a shade in embedding space"""
+    return f"{shade.get('name', '')} - {shade.get('desc_third_view', '')}"
+
+
+class ShadeEmbeddingIndex:
+    """Shade embeddings of one L1 version, stacked into a normalized matrix
+
+    Embeddings are computed once per L1 version (when the version is stored, or
+    lazily on first use) and a query is scored against all shades with a single
+    matrix-vector product.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._llm_client = None
+        self._version: Optional[int] = None
+        self._shades: List[Dict] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    @property
+    def llm_client(self):
+        if self._llm_client is None:
+            self._llm_client = LLMClient()
+        return self._llm_client
+
+    def build(self, version: int, shades: List[Dict]) -> None:
+        """Embed all shades of a version and replace the current index
+
+        Args:
+            version: L1 version the shades belong to
+            shades: shade dicts with at least `name` and `desc_third_view`
+        """
+        shades = [s for s in shades if shade_to_text(s).strip(" -")]
+        matrix = None
+        if shades:
+            embeddings = self.llm_client.get_embedding(
+                [shade_to_text(s) for s in shades]
+            )
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+
+        with self._lock:
+            self._version = version
+            self._shades = shades
+            self._matrix = matrix
+        logger.info(f"Built shade embedding index for L1 version {version} ({len(shades)} shades)")
+
+    def invalidate(self) -> None:
+        """Drop the cached index, it will be rebuilt on next use"""
+        with self._lock:
+            self._version = None
+            self._shades = []
+            self._matrix = None
+
+    def ensure_latest(self) -> bool:
+        """Make sure the index matches the latest stored L1 version
+
+        Returns:
+            bool: True if an index for the latest version is available
+        """
+        with DatabaseSession.session() as session:
+            latest_version = (
+                session.query(L1Version).order_by(L1Version.version.desc()).first()
+            )
+            if not latest_version:
+                return False
+            if latest_version.version == self._version:
+                return True
+
+            shades = [
+                {
+                    "name": s.name,
+                    "aspect": s.aspect,
+                    "icon": s.icon,
+                    "desc_third_view": s.desc_third_view,
+                    "content_third_view": s.content_third_view,
+                    "desc_second_view": s.desc_second_view,
+                    "content_second_view": s.content_second_view,
+                }
+                for s in session.query(L1Shade)
+                .filter(L1Shade.version == latest_version.version)
+                .all()
+            ]
+            version_number = latest_version.version
+
+        self.build(version_number, shades)
+        return True
+
+    def search(
+        self, query_embedding, similarity_threshold: float, limit: int
+    ) -> List[Tuple[Dict, float]]:
+        """Score all shades against a query embedding
+
+        Args:
+            query_embedding: embedding vector of the query
+            similarity_threshold: minimal cosine similarity to keep a shade
+            limit: maximum number of returned shades
+
+        Returns:
+            List[Tuple[Dict, float]]: (shade, similarity) sorted by similarity descending
+        """
+        with self._lock:
+            shades, matrix = self._shades, self._matrix
+        if matrix is None or not shades:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+
+        scores = matrix @ (query / query_norm)
+        order = np.argsort(-scores)[:limit]
+        return [
+            (shades[i], float(scores[i]))
+            for i in order
+            if scores[i] >= similarity_threshold
+        ]
+
+
+# process wide shade index shared by retrievers and the L1 storage path
+shade_embedding_index = ShadeEmbeddingIndex()
@@ -0,0 +1,201 @@
+"""
+Persistent memo of LLM generated topics and tags
+"""
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import cast, func, select, BigInteger
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from lpm_kernel.common.repository.database_session import DatabaseSession
+from lpm_kernel.configs.config import Config
+from lpm_kernel.file_data.embedding_cache import text_hash
+from lpm_kernel.file_data.models import ChunkModel
+from lpm_kernel.models.l1 import L1ChunkTopic, L1Version
+from lpm_kernel.models.topic_cache import TopicCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# keep IN (...) lists below SQLite's host parameter limit
+_SQL_BATCH_SIZE = 500
+
+
+def prompt_hash(*templates: str) -> str:
+    """SHA-256 of the prompt templates an answer was produced with"""
+    return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()
+
+
+class TopicCache:
+    """Topic/tags answers keyed by (chat model, prompt template hash, content hash)
+
+    Consulted before every topic request of TopicsGenerator, so an L1 rebuild only
+    calls the LLM for chunks and clusters whose content changed. Changing the chat
+    model or a prompt template starts a fresh keyspace.
+    """
+
+    _table_ready = False
+
+    def __init__(self, model_name: Optional[str]):
+        config = Config.from_env()
+        self.enabled = (
+            config.get("TOPIC_CACHE_ENABLED", "true").lower() == "true"
+            and bool(model_name)
+        )
+        self.model_name = model_name or ""
+
+    @classmethod
+    def _ensure_table(cls) -> None:
+        """Create the cache table for databases initialized before it existed"""
+        if not cls._table_ready:
+            DatabaseSession.initialize()
+            TopicCacheEntry.__table__.create(
+                bind=DatabaseSession._engine, checkfirst=True
+            )
+            cls._table_ready = True
+
+    def get_many(
+        self, template_hash: str, contents: List[str]
+    ) -> Dict[str, Tuple[str, List[str]]]:
+        """Look up memoized answers
+
+        Args:
+            template_hash: hash of the prompt templates
+            contents: contents the answers were generated for
+
+        Returns:
+            Dict[str, Tuple[str, List[str]]]: content hash -> (topic, tags) for hits
+        """
+        if not self.enabled or not contents:
+            return {}
+        hashes = list(dict.fromkeys(text_hash(content) for content in contents))
+        found = {}
+        try:
+            self._ensure_table()
+            with DatabaseSession.session() as session:
+                for i in range(0, len(hashes), _SQL_BATCH_SIZE):
+                    rows = session.execute(
+                        select(
+                            TopicCacheEntry.content_hash,
+                            TopicCacheEntry.topic,
+                            TopicCacheEntry.tags,
+                        )
+                        .where(TopicCacheEntry.model_name == self.model_name)
+                        .where(TopicCacheEntry.prompt_hash == template_hash)
+                        .where(
+                            TopicCacheEntry.content_hash.in_(hashes[i : i + _SQL_BATCH_SIZE])
+                        )
+                    ).all()
+                    for h, topic, tags in rows:
+                        found[h] = (topic, tags or [])
+        except Exception as e:
+            logger.warning(f"Failed to read topic cache: {str(e)}")
+        return found
+
+    def put_many(
+        self, template_hash: str, answers: Dict[str, Tuple[str, List[str]]]
+    ) -> None:
+        """Store answers keyed by the content they were generated for
+
+        Args:
+            template_hash: hash of the prompt templates
+            answers: content -> (topic, tags)
+        """
+        if not self.enabled or not answers:
+            return
+        try:
+            self._ensure_table()
+            self._insert(
+                template_hash,
+                {text_hash(content): answer for content, answer in answers.items()},
+                overwrite=True,
+            )
+        except Exception as e:
+            # a cache write failure must never fail topic generation
+            logger.warning(f"Failed to store topics in cache: {str(e)}")
+
+    def _insert(
+        self,
+        template_hash: str,
+        entries: Dict[str, Tuple[str, List[str]]],
+        overwrite: bool,
+    ) -> None:
+        stmt = sqlite_insert(TopicCacheEntry)
+        if overwrite:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["model_name", "prompt_hash", "content_hash"],
+                set_={"topic": stmt.excluded.topic, "tags": stmt.excluded.tags},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+        with DatabaseSession.session() as session:
+            session.execute(
+                stmt,
+                [
+                    {
+                        "model_name": self.model_name,
+                        "prompt_hash": template_hash,
+                        "content_hash": h,
+                        "topic": topic,
+                        "tags": tags,
+                    }
+                    for h, (topic, tags) in entries.items()
+                ],
+            )
+
+    def seed_from_chunk_topics(self, template_hash: str) -> int:
+        """Seed an empty keyspace from the chunk topics of the latest L1 version
+
+        L1ChunkTopic rows carry the topic of the cluster a chunk ended up in, which
+        is used as the chunk's answer until its content changes.
+
+        Args:
+            template_hash: hash of the chunk topic prompt templates
+
+        Returns:
+            int: number of seeded entries
+        """
+        if not self.enabled:
+            return 0
+        try:
+            self._ensure_table()
+            with DatabaseSession.session() as session:
+                existing = session.execute(
+                    select(func.count())
+                    .select_from(TopicCacheEntry)
+                    .where(TopicCacheEntry.model_name == self.model_name)
+                    .where(TopicCacheEntry.prompt_hash == template_hash)
+                ).scalar()
+                if existing:
+                    return 0
+
+                latest_version = (
+                    session.query(L1Version).order_by(L1Version.version.desc()).first()
+                )
+                if not latest_version:
+                    return 0
+                version_number = latest_version.version
+
+                rows = session.execute(
+                    select(ChunkModel.content, L1ChunkTopic.topic, L1ChunkTopic.tags)
+                    .join(
+                        ChunkModel,
+                        ChunkModel.id == cast(L1ChunkTopic.chunk_id, BigInteger),
+                    )
+                    .where(L1ChunkTopic.version == version_number)
+                ).all()
+
+            entries = {
+                text_hash(content): (topic, tags or [])
+                for content, topic, tags in rows
+                if content and topic
+            }
+            if entries:
+                self._insert(template_hash, entries, overwrite=False)
+                logger.info(
+                    f"Seeded topic cache with {len(entries)} chunks of L1 version {version_number}"
+                )
+            return len(entries)
+        except Exception as e:
+            logger.warning(f"Failed to seed topic cache: {str(e)}")
+            return 0
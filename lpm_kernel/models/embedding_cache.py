@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, func
+from lpm_kernel.common.repository.database_session import Base
+
+
+class EmbeddingCacheEntry(Base):
+    """Content-addressed embedding cache table"""
+
+    __tablename__ = "embedding_cache"
+
+    model_name = Column(String(200), primary_key=True)
+    text_hash = Column(String(64), primary_key=True)
+    dimension = Column(Integer, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # float32 bytes
+    last_access_time = Column(
+        DateTime, nullable=False, server_default=func.now(), index=True
+    )
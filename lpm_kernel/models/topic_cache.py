@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, JSON, DateTime, func
+from lpm_kernel.common.repository.database_session import Base
+
+
+class TopicCacheEntry(Base):
+    """Memoized topic/tags answers keyed by (chat model, prompt hash, content hash)"""
+
+    __tablename__ = "topic_cache"
+
+    model_name = Column(String(200), primary_key=True)
+    prompt_hash = Column(String(64), primary_key=True)
+    content_hash = Column(String(64), primary_key=True)
+    topic = Column(String(500), nullable=False)
+    tags = Column(JSON)
+    create_time = Column(DateTime, nullable=False, server_default=func.now())
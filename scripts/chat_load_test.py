@@ -0,0 +1,94 @@
+"""
+Concurrent streaming chat load test
+
+Opens N concurrent SSE chat streams against a chat endpoint and reports time to
+first event, stream duration and how many streams completed. Run it against the
+Flask server and the async chat server to compare concurrent-stream capacity:
+
+    python scripts/chat_load_test.py --url http://127.0.0.1:8002/api/talk/chat -c 50
+    python scripts/chat_load_test.py --url http://127.0.0.1:8003/api/talk/chat -c 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def run_stream(session: aiohttp.ClientSession, url: str, payload: dict) -> dict:
+    start = time.perf_counter()
+    first_event = None
+    events = 0
+    try:
+        async with session.post(url, json=payload, headers={"Accept": "text/event-stream"}) as response:
+            if response.status != 200:
+                return {"ok": False, "error": f"HTTP {response.status}"}
+            async for line in response.content:
+                if not line.startswith(b"data: "):
+                    continue
+                if first_event is None:
+                    first_event = time.perf_counter() - start
+                if line.strip() == b"data: [DONE]":
+                    break
+                events += 1
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {
+        "ok": first_event is not None,
+        "ttfe": first_event,
+        "duration": time.perf_counter() - start,
+        "events": events,
+    }
+
+
+def summarize(name: str, values: list) -> str:
+    if not values:
+        return f"{name}: n/a"
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"{name}: p50={statistics.median(values):.2f}s p95={p95:.2f}s max={values[-1]:.2f}s"
+
+
+async def main(args):
+    payload = {
+        "message": args.message,
+        "stream": True,
+        "max_tokens": args.max_tokens,
+        "enable_l0_retrieval": args.retrieval,
+        "enable_l1_retrieval": False,
+    }
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[run_stream(session, args.url, payload) for _ in range(args.concurrency)]
+        )
+        elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r["ok"]]
+    errors = {}
+    for r in results:
+        if not r["ok"]:
+            errors[r.get("error", "no events")] = errors.get(r.get("error", "no events"), 0) + 1
+
+    print(f"url: {args.url}")
+    print(f"concurrent streams: {args.concurrency}, completed: {len(ok)}, wall time: {elapsed:.2f}s")
+    print(summarize("time to first event", [r["ttfe"] for r in ok]))
+    print(summarize("stream duration", [r["duration"] for r in ok]))
+    if ok:
+        print(f"events per stream: {statistics.mean(r['events'] for r in ok):.1f}")
+    for error, count in errors.items():
+        print(f"failed ({count}): {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent streaming chat load test")
+    parser.add_argument("--url", default="http://127.0.0.1:8003/api/talk/chat")
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--message", default="Briefly introduce yourself.")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--retrieval", action="store_true", help="enable L0 retrieval")
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,163 @@
+"""
+Chunk vector search benchmark: exact scan and IVF-flat index vs ChromaDB
+
+Builds the indexes over the same synthetic clustered embeddings and reports
+recall@k against exact cosine search plus p50/p99 query latency:
+
+    python scripts/vector_index_benchmark.py --sizes 10000 100000 1000000 --dim 384
+    python scripts/vector_index_benchmark.py --sizes 1000000 --skip-chroma --nprobe 8 16 32
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from lpm_kernel.common.repository.ann_vector_repository import AnnVectorRepository
+from lpm_kernel.common.repository.exact_vector_repository import ExactVectorRepository
+from lpm_kernel.common.repository.vector_repository import VectorDocument
+
+
+def make_data(n: int, dim: int, n_queries: int, seed: int = 0):
+    """Gaussian blobs around random centers, queries drawn like the data"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 500), dim)).astype(np.float32)
+    data = centers[rng.integers(len(centers), size=n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    queries = centers[rng.integers(len(centers), size=n_queries)] + 0.5 * rng.standard_normal(
+        (n_queries, dim)
+    ).astype(np.float32)
+    return data, queries
+
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> list:
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    truth = []
+    for q in queries:
+        scores = normed @ (q / np.linalg.norm(q))
+        top = np.argpartition(-scores, k - 1)[:k]
+        truth.append(set(top.tolist()))
+    return truth
+
+
+def measure(search, queries: np.ndarray, truth: list, k: int) -> dict:
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(q, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & set(int(i) for i in ids))
+    latencies = np.array(latencies)
+    return {
+        "recall": hits / (k * len(queries)),
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+    }
+
+
+def bench_ann(data, queries, truth, args, index_dir) -> list:
+    start = time.perf_counter()
+    # train once on the full set below instead of when min_train_size is crossed
+    index = AnnVectorRepository(
+        index_dir=index_dir, nlist=args.nlist, min_train_size=len(data) + 1, snapshot_every=0
+    )
+    for i in range(0, len(data), args.batch_size):
+        batch = data[i : i + args.batch_size]
+        index.add(
+            [
+                VectorDocument(id=str(i + j), text="", metadata={"document_id": str((i + j) // 20)}, embedding=v)
+                for j, v in enumerate(batch)
+            ]
+        )
+    if len(data) >= args.min_train_size:
+        index.train()
+    index.save()
+    build = time.perf_counter() - start
+
+    rows = []
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        result = measure(
+            lambda q, k: [doc.id for doc, _ in index.search_with_scores(q, limit=k)], queries, truth, args.k
+        )
+        rows.append((f"ann nprobe={nprobe}", build, result))
+    return rows
+
+
+def bench_exact(data, queries, truth, args) -> list:
+    start = time.perf_counter()
+    index = ExactVectorRepository(dtype=args.exact_dtype)
+    for i in range(0, len(data), args.batch_size):
+        batch = data[i : i + args.batch_size]
+        index.add([VectorDocument(id=str(i + j), text="", metadata={}, embedding=v) for j, v in enumerate(batch)])
+    build = time.perf_counter() - start
+
+    rows = [
+        (
+            f"exact {args.exact_dtype}",
+            build,
+            measure(lambda q, k: [doc.id for doc, _ in index.search_with_scores(q, limit=k)], queries, truth, args.k),
+        )
+    ]
+    # one GEMM for all queries, latency reported per query
+    start = time.perf_counter()
+    results = index.search_batch(queries, limit=args.k)
+    per_query = (time.perf_counter() - start) * 1000 / len(queries)
+    hits = sum(len(expected & {int(doc.id) for doc, _ in found}) for expected, found in zip(truth, results))
+    rows.append(
+        ("exact batched", build, {"recall": hits / (args.k * len(queries)), "p50": per_query, "p99": per_query})
+    )
+    return rows
+
+
+def bench_chroma(data, queries, truth, args, persist_dir) -> list:
+    import chromadb
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=persist_dir)
+    collection = client.create_collection(name="bench", metadata={"hnsw:space": "cosine"})
+    for i in range(0, len(data), args.batch_size):
+        batch = data[i : i + args.batch_size]
+        collection.add(
+            ids=[str(i + j) for j in range(len(batch))],
+            embeddings=batch.tolist(),
+            metadatas=[{"document_id": str((i + j) // 20)} for j in range(len(batch))],
+        )
+    build = time.perf_counter() - start
+
+    def search(q, k):
+        return collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])["ids"][0]
+
+    return [("chroma", build, measure(search, queries, truth, args.k))]
+
+
+def main(args):
+    print(f"{'size':>9}  {'backend':<18} {'build s':>8} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in args.sizes:
+        data, queries = make_data(n, args.dim, args.queries)
+        truth = exact_top_k(data, queries, args.k)
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = bench_ann(data, queries, truth, args, f"{tmp}/ann")
+            if not args.skip_exact:
+                rows += bench_exact(data, queries, truth, args)
+            if not args.skip_chroma:
+                rows += bench_chroma(data, queries, truth, args, f"{tmp}/chroma")
+        for name, build, result in rows:
+            print(
+                f"{n:>9}  {name:<18} {build:>8.1f} {result['recall']:>9.3f} {result['p50']:>8.2f} {result['p99']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk vector search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 uses sqrt(n)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[16])
+    parser.add_argument("--min-train-size", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--exact-dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--skip-exact", action="store_true")
+    parser.add_argument("--skip-chroma", action="store_true", help="ChromaDB ingest is slow at 1M chunks")
+    main(parser.parse_args())
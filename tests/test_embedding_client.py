@@ -0,0 +1,90 @@
+"""Tests for the request coalescing of EmbeddingClient."""
+import threading
+
+import pytest
+
+from lpm_kernel.common.llm import EmbeddingClient, EmbeddingRequestError
+
+
+class StaticConfig:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+def make_client(request):
+    client = EmbeddingClient(
+        StaticConfig({"EMBEDDING_BATCH_SIZE": "8", "EMBEDDING_COALESCE_WINDOW_MS": "200"}),
+        user_llm_config_service=None,
+    )
+    client._request_with_retry = request
+    return client
+
+
+def embed_concurrently(client, inputs, timeout=5):
+    """Call embed() for every input at once, return the result or exception of each
+
+    Daemon threads, so a caller stuck in embed() fails the test instead of hanging it.
+    """
+    outcomes = [None] * len(inputs)
+
+    def run(i, texts):
+        try:
+            outcomes[i] = client.embed(texts)
+        except EmbeddingRequestError as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, texts), daemon=True) for i, texts in enumerate(inputs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+    assert not any(thread.is_alive() for thread in threads), "embed() did not return"
+    return outcomes
+
+
+def test_retryable_failure_fails_every_coalesced_caller():
+    calls = []
+    lock = threading.Lock()
+
+    def request(texts):
+        with lock:
+            calls.append(list(texts))
+        raise EmbeddingRequestError("rate limited", retryable=True)
+
+    outcomes = embed_concurrently(make_client(request), [["a"], ["b"], ["c"]])
+
+    assert len(calls) == 1 and sorted(calls[0]) == ["a", "b", "c"]
+    assert all(isinstance(outcome, EmbeddingRequestError) for outcome in outcomes)
+
+
+def test_rejected_group_only_fails_the_bad_caller():
+    def request(texts):
+        if "bad" in texts:
+            raise EmbeddingRequestError("bad request", retryable=False)
+        return [[float(len(text))] for text in texts]
+
+    outcomes = embed_concurrently(make_client(request), [["a"], ["bad"], ["ccc"]])
+
+    assert outcomes[0].tolist() == [[1.0]]
+    assert isinstance(outcomes[1], EmbeddingRequestError)
+    assert outcomes[2].tolist() == [[3.0]]
+
+
+@pytest.mark.parametrize("sizes", [[3, 3, 3], [5, 4], [7, 1, 1]])
+def test_coalesced_groups_stay_within_batch_size(sizes):
+    batches = []
+    lock = threading.Lock()
+
+    def request(texts):
+        with lock:
+            batches.append(len(texts))
+        return [[0.0]] * len(texts)
+
+    inputs = [[f"{i}-{j}" for j in range(size)] for i, size in enumerate(sizes)]
+    outcomes = embed_concurrently(make_client(request), inputs)
+
+    assert [len(outcome) for outcome in outcomes] == sizes
+    assert max(batches) <= 8
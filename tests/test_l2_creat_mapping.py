@@ -0,0 +1,119 @@
+"""Regression tests for L2DataProcessor.creat_mapping.
+
+The mapping used to be built by scanning every document row for every text
+unit of every entity; the join based implementation must write the same file.
+"""
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from lpm_kernel.L2.data import L2DataProcessor
+
+
+def legacy_mapping(document: pd.DataFrame, entities: pd.DataFrame, note_list) -> list:
+    """The pre-join creat_mapping loop, kept as the reference output."""
+    json_data = []
+    for _, e_r in entities.iterrows():
+        json_item = {}
+        json_item["entity_id"] = e_r["id"]
+        json_item["entity_name"] = e_r["title"]
+        json_item["entity_description"] = e_r["description"]
+        json_item["doc_id"] = []
+        for text_unit_id in e_r["text_unit_ids"]:
+            for _, d_r in document.iterrows():
+                if text_unit_id in d_r["text_unit_ids"]:
+                    if "note" in d_r["title"]:
+                        json_item["doc_id"].append(
+                            note_list[
+                                int(d_r["title"].replace(".txt", "").replace("note_", ""))
+                            ].id
+                        )
+        json_data.append(json_item)
+    return json_data
+
+
+def make_documents(rows):
+    return pd.DataFrame(
+        {
+            "id": [f"d{i}" for i in range(len(rows))],
+            "title": [title for title, _ in rows],
+            "text_unit_ids": [list(units) for _, units in rows],
+        },
+        columns=["id", "title", "text_unit_ids"],
+    )
+
+
+def make_entities(rows):
+    return pd.DataFrame(
+        {
+            "id": [f"e{i}" for i in range(len(rows))],
+            "title": [f"ENTITY {i}" for i in range(len(rows))],
+            "description": [f"description {i}" for i in range(len(rows))],
+            "text_unit_ids": [list(units) for units in rows],
+        },
+        columns=["id", "title", "description", "text_unit_ids"],
+    )
+
+
+NOTES = [SimpleNamespace(id=100 + i) for i in range(5)]
+
+CASES = {
+    "basic": (
+        [("note_0.txt", ["t1", "t2"]), ("note_1.txt", ["t3"])],
+        [["t1"], ["t3", "t2"], ["t4"]],
+    ),
+    # a text unit shared by several documents, and listed twice by one entity
+    "duplicate_text_units": (
+        [("note_2.txt", ["t1", "t2"]), ("note_0.txt", ["t1"]), ("note_2.txt", ["t2", "t2"])],
+        [["t1", "t1"], ["t2", "t1"], []],
+    ),
+    # documents that are not notes never contribute doc ids
+    "non_note_documents": (
+        [("chat_0.txt", ["t1"]), ("note_3.txt", ["t1", "t2"]), ("memo.md", ["t2"])],
+        [["t1"], ["t2"]],
+    ),
+    "no_note_documents": (
+        [("chat_0.txt", ["t1"])],
+        [["t1"]],
+    ),
+    "empty_documents": (
+        [],
+        [["t1"], ["t2"]],
+    ),
+    "empty_entities": (
+        [("note_0.txt", ["t1"])],
+        [],
+    ),
+    "empty_both": ([], []),
+    # both sides end up with no text units but different key dtypes
+    "empty_documents_entities_without_text_units": (
+        [],
+        [[]],
+    ),
+    "non_note_documents_empty_entities": (
+        [("chat_0.txt", ["t1"])],
+        [],
+    ),
+    "note_without_text_units_empty_entities": (
+        [("note_0.txt", [])],
+        [],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_creat_mapping_matches_legacy_loop(tmp_path, name):
+    document_rows, entity_rows = CASES[name]
+    make_documents(document_rows).to_parquet(tmp_path / "documents.parquet")
+    make_entities(entity_rows).to_parquet(tmp_path / "entities.parquet")
+    # compare against what the legacy loop produces from the same parquet files
+    document = pd.read_parquet(tmp_path / "documents.parquet")
+    entities = pd.read_parquet(tmp_path / "entities.parquet")
+
+    mapped_json_file = tmp_path / "mapping.json"
+    L2DataProcessor().creat_mapping(str(tmp_path), NOTES, str(mapped_json_file))
+
+    expected = json.dumps(legacy_mapping(document, entities, NOTES), ensure_ascii=False, indent=4)
+    assert mapped_json_file.read_text(encoding="utf-8") == expected